@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, field_validator
 
@@ -14,7 +14,32 @@ class ETLSettings(BaseSettings):
     embedding_provider: str = Field(default="sentence-transformers", env="EMBEDDING_PROVIDER")
     embedding_model: str = Field(default="dummy", env="EMBEDDING_MODEL")
     device: str = Field(default="cpu", env="DEVICE")
+    embedding_batch_size: int = Field(default=32, env="EMBEDDING_BATCH_SIZE")
+    embedding_max_batch_tokens: Optional[int] = Field(default=None, env="EMBEDDING_MAX_BATCH_TOKENS")
+    embedding_quantize: bool = Field(default=False, env="EMBEDDING_QUANTIZE")
+    embedding_compiled_path: Optional[str] = Field(default=None, env="EMBEDDING_COMPILED_PATH")
+    chunk_embedding_mode: Literal["embed", "reuse", "pool"] = Field(default="embed", env="CHUNK_EMBEDDING_MODE")
+    embedding_truncate_dim: Optional[int] = Field(default=None, env="EMBEDDING_TRUNCATE_DIM")
+    embedding_dtype: Literal["float32", "float16"] = Field(default="float32", env="EMBEDDING_DTYPE")
+    embedding_cache_path: Optional[str] = Field(default=None, env="EMBEDDING_CACHE_PATH")
+    embedding_cache_max_entries: int = Field(default=1_000_000, env="EMBEDDING_CACHE_MAX_ENTRIES")
+    embedding_workers: int = Field(default=0, env="EMBEDDING_WORKERS")
+    embedding_threads_per_worker: Optional[int] = Field(default=None, env="EMBEDDING_THREADS_PER_WORKER")
     
+    splitter_type: Literal["semantic", "token"] = Field(default="semantic", env="SPLITTER_TYPE")
+    chunk_max_tokens: Optional[int] = Field(default=None, env="CHUNK_MAX_TOKENS")
+    split_workers: int = Field(default=0, env="SPLIT_WORKERS")
+    transform_chunk_batch_size: int = Field(default=256, env="TRANSFORM_CHUNK_BATCH_SIZE")
+    transform_async_workers: int = Field(default=4, env="TRANSFORM_ASYNC_WORKERS")
+    transform_max_in_flight: int = Field(default=4, env="TRANSFORM_MAX_IN_FLIGHT")
+    transform_dedup_chunks: bool = Field(default=True, env="TRANSFORM_DEDUP_CHUNKS")
+    transform_dedup_cache_size: int = Field(default=0, env="TRANSFORM_DEDUP_CACHE_SIZE")
+    near_dup_filter: bool = Field(default=False, env="NEAR_DUP_FILTER")
+    near_dup_threshold: float = Field(default=0.9, env="NEAR_DUP_THRESHOLD")
+    near_dup_action: Literal["skip", "merge"] = Field(default="skip", env="NEAR_DUP_ACTION")
+    near_dup_max_entries: int = Field(default=1_000_000, env="NEAR_DUP_MAX_ENTRIES")
+
+    chunk_id_mode: Literal["random", "deterministic"] = Field(default="random", env="CHUNK_ID_MODE")
     metadata_columns: List[str] = Field(default_factory=list, env="METADATA_COLUMNS")
     embedding_columns: List[str] = Field(default_factory=list, env="EMBEDDING_COLUMNS")
     
@@ -24,9 +49,23 @@ class ETLSettings(BaseSettings):
     batch_size: int = Field(..., env="BATCH_SIZE")
 
     async_mode: bool = Field(default=False, env="ASYNC_MODE")
+    pipeline_mode: bool = Field(default=False, env="PIPELINE_MODE")
+    pipeline_queue_depth: int = Field(default=2, env="PIPELINE_QUEUE_DEPTH")
+    load_concurrency: int = Field(default=2, env="LOAD_CONCURRENCY")
+    shard_count: int = Field(default=1, env="SHARD_COUNT")
+
+    # Чекпоинты включаются явно: извлечение переходит на keyset-пагинацию по SOURCE_ID,
+    # и ключ должен быть уникальным — иначе строки с тем же ключом за границей батча пропускаются
+    checkpoint_store: Literal["none", "file", "sql"] = Field(default="none", env="CHECKPOINT_STORE")
+    checkpoint_path: str = Field(default=".etl_checkpoints.json", env="CHECKPOINT_PATH")
+    checkpoint_job_id: Optional[str] = Field(default=None, env="CHECKPOINT_JOB_ID")
+
+    incremental_mode: Literal["none", "watermark", "hash"] = Field(default="none", env="INCREMENTAL_MODE")
+    updated_at_column: Optional[str] = Field(default=None, env="UPDATED_AT_COLUMN")
 
     faiss_index_path: Optional[str] = Field(None, env="FAISS_INDEX_PATH")
     faiss_metadata_path: Optional[str] = Field(None, env="FAISS_METADATA_PATH")
+    faiss_index_type: Optional[str] = Field(None, env="FAISS_INDEX_TYPE")
 
     model_config = SettingsConfigDict(
         env_file=os.path.join(BASE_DIR, ".env"),
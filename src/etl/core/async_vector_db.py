@@ -1,13 +1,24 @@
+import asyncio
+import inspect
 import logging
-from typing import Optional, List
+import time
+from functools import partial
+from typing import Any, Awaitable, Dict, Optional, List
 from etl.core.connector.async_sql_connector import AsyncSQLConnector
 from etl.core.etl.extractors.async_sql_extractor import AsyncSQLExtractor
 from etl.core.etl.transformers.transformer import Transformer
 from etl.core.etl.loaders.async_sql_loader import AsyncSQLLoader
 from etl.core.etl.base import BaseExtractor, BaseLoader, BaseTransformer
+from etl.core.etl.chunk_batch import ChunkData
+from etl.core.checkpoint import BaseCheckpointStore, resume_tracker
+from etl.core.incremental import IncrementalState
+from etl.core.stage_stats import StageStats
 
 logger = logging.getLogger(__name__)
 
+# Маркер конца потока в очередях конвейера
+_DONE = object()
+
 
 class AsyncVectorDB:
     def __init__(
@@ -16,15 +27,33 @@ class AsyncVectorDB:
         transformer: BaseTransformer,
         loader: BaseLoader,
         batch_size: int = 100,
+        load_concurrency: int = 2,
+        queue_depth: int = 2,
+        checkpoint_store: Optional[BaseCheckpointStore] = None,
+        job_id: str = "default",
+        incremental: Optional[IncrementalState] = None,
     ):
         """
-        Универсальный асинхронный VectorDB.
-        Поддерживает только SQL-based loader'ы (FAISS не поддерживает async).
+        Универсальный асинхронный VectorDB — конвейер producer/consumer:
+        извлечение следующего батча идёт, пока текущий эмбеддится, до load_concurrency
+        загрузок выполняются одновременно в отдельных сессиях (соединениях пула),
+        очереди глубиной queue_depth ограничивают память на больших таблицах.
+        Загрузчики без orm_class (FAISS) работают в потоке и без параллелизма.
+        checkpoint_store — чекпоинт продвигается по непрерывному префиксу полностью загруженных
+        батчей (загрузки завершаются в любом порядке), прерванный прогон job_id продолжается с него.
+        incremental — только новые/изменённые строки; старые чанки изменённых source_id
+        удаляются до постановки новых в очередь загрузки.
         """
         self.extractor = extractor
         self.transformer = transformer
         self.loader = loader
         self.batch_size = batch_size
+        self.load_concurrency = max(1, load_concurrency) if hasattr(loader, "orm_class") else 1
+        self.queue_depth = max(1, queue_depth)
+        self.checkpoint_store = checkpoint_store
+        self.job_id = job_id
+        self.incremental = incremental
+        self.last_run_stats: Dict[str, StageStats] = {}
         logger.info("Initialized AsyncVectorDB with extractor, transformer, loader")
 
     async def async_transform_table(
@@ -36,31 +65,145 @@ class AsyncVectorDB:
     ):
         if not text_column:
             raise ValueError("text_column is required")
-        logger.info(f"Starting async transform from '{source_table}'")
-        async for batch in self.extractor.extract_batches(
-            table_name=source_table,
-            batch_size=self.batch_size,
-            columns=columns,
-        ):
-            if not batch:
-                continue
-            transformed_chunks = await self.transformer.atransform(
-                batch_rows=batch,
-                text_column=text_column,
-                source_id_column=source_id_column,
+        logger.info(
+            f"Starting async transform from '{source_table}' "
+            f"({self.load_concurrency} concurrent loads, queue depth {self.queue_depth})"
+        )
+        stats = {name: StageStats(name) for name in ("extract", "transform", "load")}
+        self.last_run_stats = stats
+        extracted: asyncio.Queue = asyncio.Queue(maxsize=self.queue_depth)
+        transformed: asyncio.Queue = asyncio.Queue(maxsize=self.queue_depth)
+        incremental = self.incremental
+        tracker = await asyncio.to_thread(
+            resume_tracker, self.checkpoint_store, self.job_id, source_id_column, incremental is not None
+        )
+        resume_options = (
+            {"key_column": source_id_column, "after_key": tracker.checkpoint.last_key} if tracker else {}
+        )
+        if incremental:
+            resume_options["row_filter"] = incremental.row_filter()
+            columns = incremental.extract_columns(columns)
+
+        async def extract() -> None:
+            batches = self.extractor.extract_batches(
+                table_name=source_table,
+                batch_size=self.batch_size,
+                columns=columns,
+                **resume_options,
             )
-            if transformed_chunks:
-                if hasattr(self.loader, "orm_class"):
-                    session = await self.extractor.connector.connect()
-                    try:
-                        await self.loader.load(session, transformed_chunks)
-                        await session.commit()
-                    except Exception:
-                        await session.rollback()
-                        raise
-                    finally:
-                        await session.close()
-                else:
-                    await self.loader.load(transformed_chunks)
+            try:
+                started = time.perf_counter()
+                async for batch in batches:
+                    stats["extract"].record(time.perf_counter() - started)
+                    if batch:
+                        await extracted.put(batch)
+                    started = time.perf_counter()
+            finally:
+                await batches.aclose()
+            await extracted.put(_DONE)
+
+        async def transform() -> None:
+            while True:
+                stats["transform"].observe_queue(extracted.qsize())
+                batch = await extracted.get()
+                if batch is _DONE:
+                    break
+                seq = None
+                if tracker:
+                    on_loaded = partial(incremental.batch_loaded, batch) if incremental else None
+                    seq = tracker.begin_batch(batch[-1][source_id_column], len(batch), on_loaded=on_loaded)
+                if incremental:
+                    # Другие source_id, чем у батчей, которые ещё загружаются, — гонки с ними нет
+                    await self._delete_sources(incremental.source_ids(batch))
+                started = time.perf_counter()
+                async for transformed_chunks in self.transformer.atransform_stream(
+                    batch_rows=batch,
+                    text_column=text_column,
+                    source_id_column=source_id_column,
+                ):
+                    stats["transform"].record(time.perf_counter() - started)
+                    if tracker:
+                        tracker.add_part(seq)
+                    await transformed.put((seq, transformed_chunks))
+                    started = time.perf_counter()
+                if tracker:
+                    await asyncio.to_thread(tracker.seal, seq)
+            for _ in range(self.load_concurrency):
+                await transformed.put(_DONE)
+
+        async def load() -> None:
+            while True:
+                stats["load"].observe_queue(transformed.qsize())
+                item = await transformed.get()
+                if item is _DONE:
+                    return
+                seq, transformed_chunks = item
+                started = time.perf_counter()
+                await self._load(transformed_chunks)
+                stats["load"].record(time.perf_counter() - started)
+                if tracker:
+                    # Сохранение чекпоинта — синхронный I/O, не в event loop
+                    await asyncio.to_thread(tracker.part_done, seq)
+
+        wall_started = time.perf_counter()
+        await self._run_stages([extract(), transform(), *(load() for _ in range(self.load_concurrency))])
+
+        wall_seconds = time.perf_counter() - wall_started
+        for stage in stats.values():
+            logger.info(f"  {stage.summary(wall_seconds)}")
+        if tracker:
+            await asyncio.to_thread(tracker.finish)
+        if incremental:
+            await asyncio.to_thread(incremental.finish)
+        logger.info("✅ Async ETL pipeline completed successfully.")
+
+    @staticmethod
+    async def _run_stages(stages: List[Awaitable[None]]) -> None:
+        """Запускает стадии конвейера; при ошибке любой из них отменяет остальные и пробрасывает её."""
+        tasks = [asyncio.ensure_future(stage) for stage in stages]
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        except BaseException:
+            done, pending = set(), set(tasks)
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            if task.exception() is not None:
+                logger.error(f"Async ETL pipeline failed: {task.exception()}")
+                raise task.exception()
+
+    async def _delete_sources(self, source_ids: List[str]) -> None:
+        if hasattr(self.loader, "orm_class"):
+            session = await self.extractor.connector.connect()
+            try:
+                await self.loader.delete_sources(session, source_ids)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                await session.close()
+        else:
+            await asyncio.to_thread(self.loader.delete_sources, source_ids)
 
-        logger.info("✅ Async ETL pipeline completed successfully.")
\ No newline at end of file
+    async def _load(self, transformed_chunks: ChunkData) -> None:
+        if not transformed_chunks:
+            return
+        if hasattr(self.loader, "orm_class"):
+            # Своя сессия на каждую загрузку — параллельные транзакции на разных соединениях пула
+            session = await self.extractor.connector.connect()
+            try:
+                await self.loader.load(session, transformed_chunks)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                await session.close()
+        elif inspect.iscoroutinefunction(self.loader.load):
+            await self.loader.load(transformed_chunks)
+        else:
+            await asyncio.to_thread(self.loader.load, transformed_chunks)
@@ -0,0 +1,260 @@
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, Text, delete, select
+from sqlalchemy.engine import Engine
+
+from etl.core.incremental import dump_watermark, load_watermark
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TABLE = "etl_checkpoints"
+
+
+@dataclass
+class Checkpoint:
+    """Последний полностью загруженный батч задания: ключ его последней строки и счётчики."""
+    last_key: Any
+    batches: int = 0
+    rows: int = 0
+    updated_at: float = field(default_factory=time.time)
+
+
+class BaseCheckpointStore(ABC):
+    @abstractmethod
+    def load(self, job_id: str) -> Optional[Checkpoint]:
+        pass
+
+    @abstractmethod
+    def save(self, job_id: str, checkpoint: Checkpoint) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self, job_id: str) -> None:
+        pass
+
+
+class FileCheckpointStore(BaseCheckpointStore):
+    """
+    JSON-файл {job_id: checkpoint}; запись через временный файл и os.replace — файл всегда целый.
+    last_key хранится в JSON с типом значения (dump_watermark): ключи UUID/datetime/Decimal не теряются.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def load(self, job_id: str) -> Optional[Checkpoint]:
+        with self._lock:
+            data = self._read().get(job_id)
+        if not data:
+            return None
+        return Checkpoint(**{**data, "last_key": load_watermark(data["last_key"])})
+
+    def save(self, job_id: str, checkpoint: Checkpoint) -> None:
+        with self._lock:
+            data = self._read()
+            data[job_id] = {**asdict(checkpoint), "last_key": dump_watermark(checkpoint.last_key)}
+            self._write(data)
+
+    def clear(self, job_id: str) -> None:
+        with self._lock:
+            data = self._read()
+            if data.pop(job_id, None) is not None:
+                self._write(data)
+
+
+class SQLCheckpointStore(BaseCheckpointStore):
+    """Таблица etl_checkpoints в целевой БД; каждое сохранение — отдельная короткая транзакция."""
+
+    def __init__(self, engine: Engine, table_name: str = CHECKPOINT_TABLE):
+        self.engine = engine
+        self.table = Table(
+            table_name,
+            MetaData(),
+            Column("job_id", String(255), primary_key=True),
+            Column("checkpoint", Text, nullable=False),
+            Column("batches", Integer, nullable=False),
+            Column("rows", Integer, nullable=False),
+            Column("updated_at", Float, nullable=False),
+        )
+        self.table.create(engine, checkfirst=True)
+
+    def load(self, job_id: str) -> Optional[Checkpoint]:
+        with self.engine.connect() as conn:
+            row = conn.execute(select(self.table).where(self.table.c.job_id == job_id)).mappings().first()
+        if row is None:
+            return None
+        return Checkpoint(
+            last_key=load_watermark(row["checkpoint"]),
+            batches=row["batches"],
+            rows=row["rows"],
+            updated_at=row["updated_at"],
+        )
+
+    def save(self, job_id: str, checkpoint: Checkpoint) -> None:
+        values = {
+            "checkpoint": dump_watermark(checkpoint.last_key),
+            "batches": checkpoint.batches,
+            "rows": checkpoint.rows,
+            "updated_at": checkpoint.updated_at,
+        }
+        with self.engine.begin() as conn:
+            updated = conn.execute(
+                self.table.update().where(self.table.c.job_id == job_id).values(**values)
+            ).rowcount
+            if not updated:
+                conn.execute(self.table.insert().values(job_id=job_id, **values))
+
+    def clear(self, job_id: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.job_id == job_id))
+
+
+class ReportingCheckpointStore(BaseCheckpointStore):
+    """
+    Обёртка, сообщающая о каждом сохранённом чекпоинте (прогресс задания) в on_save.
+    inner=None — чекпоинты не сохраняются, только отчёт о прогрессе.
+    """
+
+    def __init__(self, inner: Optional[BaseCheckpointStore], on_save: Callable[[str, Checkpoint], None]):
+        self.inner = inner
+        self.on_save = on_save
+
+    def load(self, job_id: str) -> Optional[Checkpoint]:
+        return self.inner.load(job_id) if self.inner is not None else None
+
+    def save(self, job_id: str, checkpoint: Checkpoint) -> None:
+        if self.inner is not None:
+            self.inner.save(job_id, checkpoint)
+        self.on_save(job_id, checkpoint)
+
+    def clear(self, job_id: str) -> None:
+        if self.inner is not None:
+            self.inner.clear(job_id)
+
+
+class CheckpointTracker:
+    """
+    Продвигает чекпоинт только по непрерывному префиксу полностью загруженных батчей:
+    под-батчи разных батчей могут загружаться параллельно и завершаться в любом порядке.
+    """
+
+    def __init__(
+        self,
+        store: Optional[BaseCheckpointStore],
+        job_id: str,
+        start: Optional[Checkpoint] = None,
+    ):
+        """store=None — чекпоинты не сохраняются, трекер только вызывает on_loaded батчей по порядку."""
+        self.store = store
+        self.job_id = job_id
+        self.checkpoint = start or Checkpoint(last_key=None)
+        self._batches: Dict[int, Tuple[Any, int, Optional[Callable[[], None]]]] = {}
+        self._remaining: Dict[int, int] = {}
+        self._sealed: set = set()
+        self._next_seq = 0
+        self._registered = 0
+        self._lock = threading.Lock()
+
+    def finish(self) -> None:
+        """Задание дошло до конца таблицы — следующий запуск начнёт с начала."""
+        if self.store is None:
+            return
+        self.store.clear(self.job_id)
+        logger.info(
+            f"Job '{self.job_id}' completed ({self.checkpoint.batches} batches, {self.checkpoint.rows} rows), "
+            f"checkpoint cleared"
+        )
+
+    def begin_batch(self, last_key: Any, rows: int, on_loaded: Optional[Callable[[], None]] = None) -> int:
+        """
+        Регистрирует очередной извлечённый батч и возвращает его порядковый номер.
+        on_loaded вызывается, когда батч и все предыдущие полностью загружены, до сохранения чекпоинта.
+        """
+        with self._lock:
+            seq = self._registered
+            self._registered += 1
+            self._batches[seq] = (last_key, rows, on_loaded)
+            self._remaining[seq] = 0
+        return seq
+
+    def add_part(self, seq: int) -> None:
+        with self._lock:
+            self._remaining[seq] += 1
+
+    def part_done(self, seq: int) -> None:
+        with self._lock:
+            self._remaining[seq] -= 1
+        self._advance()
+
+    def seal(self, seq: int) -> None:
+        """Все под-батчи батча seq поставлены в очередь загрузки."""
+        with self._lock:
+            self._sealed.add(seq)
+        self._advance()
+
+    def _advance(self) -> None:
+        with self._lock:
+            advanced = False
+            while self._next_seq in self._sealed and self._remaining.get(self._next_seq) == 0:
+                seq = self._next_seq
+                last_key, rows, on_loaded = self._batches.pop(seq)
+                if on_loaded is not None:
+                    on_loaded()
+                self._remaining.pop(seq)
+                self._sealed.discard(seq)
+                self.checkpoint = Checkpoint(
+                    last_key=last_key,
+                    batches=self.checkpoint.batches + 1,
+                    rows=self.checkpoint.rows + rows,
+                )
+                self._next_seq += 1
+                advanced = True
+            if advanced and self.store is not None:
+                self.store.save(self.job_id, self.checkpoint)
+                logger.debug(f"Checkpoint '{self.job_id}': {self.checkpoint.batches} batches, key {self.checkpoint.last_key}")
+
+
+def resume_tracker(
+    store: Optional[BaseCheckpointStore],
+    job_id: str,
+    key_column: Optional[str],
+    always: bool = False,
+) -> Optional[CheckpointTracker]:
+    """
+    Трекер, продолжающий задание с сохранённого чекпоинта. Без хранилища — None,
+    либо (always=True, нужен порядок батчей для инкрементального режима) трекер без сохранения.
+    """
+    if store is None and not always:
+        return None
+    if not key_column:
+        raise ValueError("Checkpointing requires a unique source_id column to order and resume extraction")
+    start = store.load(job_id) if store is not None else None
+    if start is not None:
+        logger.info(
+            f"Resuming job '{job_id}' after {key_column}={start.last_key!r} "
+            f"({start.batches} batches, {start.rows} rows already loaded)"
+        )
+    return CheckpointTracker(store, job_id, start)
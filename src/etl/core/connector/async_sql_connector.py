@@ -2,12 +2,13 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 from .base import BaseConnector 
 
 class AsyncSQLConnector(BaseConnector):
-    def __init__(self, db_url: str):
+    def __init__(self, db_url: str, pool_size: int = 5):
         if db_url.startswith("postgresql://"):
             db_url = db_url.replace("postgresql://", "postgresql+asyncpg://")
         elif not db_url.startswith("postgresql+asyncpg://"):
             raise ValueError("Only PostgreSQL with asyncpg is supported in AsyncSQLConnector")
-        self.engine = create_async_engine(db_url, echo=False)
+        # pool_size >= числа одновременных загрузок + соединение экстрактора
+        self.engine = create_async_engine(db_url, echo=False, pool_size=pool_size)
         self.SessionLocal = async_sessionmaker(self.engine, expire_on_commit=False)
 
     async def connect(self) -> AsyncSession:
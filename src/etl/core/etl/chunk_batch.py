@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Sequence, Union
+import numpy as np
+
+
+@dataclass
+class ChunkBatch:
+    """
+    Колоночный батч чанков: тексты, непрерывная матрица эмбеддингов (n, dim)
+    и метаданные в параллельных списках. Загрузчики берут матрицу целиком,
+    без повторной сборки векторов из построчных словарей.
+    """
+    texts: List[str]
+    embeddings: np.ndarray
+    metadata: List[Dict[str, Any]]
+
+    def __post_init__(self):
+        if self.embeddings.ndim != 2 or not (len(self.texts) == len(self.metadata) == self.embeddings.shape[0]):
+            raise ValueError(
+                f"Inconsistent ChunkBatch: {len(self.texts)} texts, {len(self.metadata)} metadata, "
+                f"embeddings {self.embeddings.shape}"
+            )
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getitem__(self, index: slice) -> "ChunkBatch":
+        if not isinstance(index, slice):
+            raise TypeError("ChunkBatch supports slicing only; use rows() for per-chunk access")
+        return ChunkBatch(self.texts[index], self.embeddings[index], self.metadata[index])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.rows())
+
+    @property
+    def dim(self) -> int:
+        return self.embeddings.shape[1]
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Построчные словари в прежнем формате; embedding — view строки матрицы, без копирования."""
+        return [
+            {"chunk_text": text, "embedding": embedding, "metadata_": metadata}
+            for text, embedding, metadata in zip(self.texts, self.embeddings, self.metadata)
+        ]
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]]) -> "ChunkBatch":
+        embeddings = np.asarray([row["embedding"] for row in rows], dtype=np.float32)
+        return cls(
+            texts=[row.get("chunk_text", "") for row in rows],
+            embeddings=embeddings.reshape(len(rows), -1),
+            metadata=[row.get("metadata_", {}) for row in rows],
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["ChunkBatch"]) -> "ChunkBatch":
+        if not batches:
+            return cls([], np.empty((0, 0), dtype=np.float32), [])
+        return cls(
+            texts=[text for batch in batches for text in batch.texts],
+            embeddings=np.concatenate([batch.embeddings for batch in batches]),
+            metadata=[meta for batch in batches for meta in batch.metadata],
+        )
+
+
+ChunkData = Union[ChunkBatch, List[Dict[str, Any]]]
+
+
+def as_chunk_batch(data: ChunkData) -> ChunkBatch:
+    return data if isinstance(data, ChunkBatch) else ChunkBatch.from_rows(data)
+
+
+def as_chunk_rows(data: ChunkData) -> List[Dict[str, Any]]:
+    return data.rows() if isinstance(data, ChunkBatch) else data
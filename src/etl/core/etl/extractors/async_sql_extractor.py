@@ -2,6 +2,8 @@ import logging
 from typing import List, Dict, Any, Optional, AsyncGenerator
 from sqlalchemy.sql import text
 from etl.core.connector.async_sql_connector import AsyncSQLConnector
+from etl.core.etl.extractors.sql_extractor import keyset_query
+from etl.core.incremental import RowFilter
 
 logger = logging.getLogger(__name__)
 
@@ -30,24 +32,70 @@ class AsyncSQLExtractor:
         self,
         table_name: str,
         batch_size: int = 100,
-        columns: Optional[List[str]] = None
+        columns: Optional[List[str]] = None,
+        key_column: Optional[str] = None,
+        after_key: Any = None,
+        row_filter: Optional[RowFilter] = None,
     ) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        """С key_column — keyset-пагинация после after_key и row_filter, иначе LIMIT/OFFSET (см. SQLExtractor)."""
+        if key_column:
+            async for batch in self._extract_batches_by_key(
+                table_name, batch_size, columns, key_column, after_key, row_filter
+            ):
+                yield batch
+            return
+        if row_filter is not None:
+            raise ValueError("row_filter requires keyset extraction (key_column)")
         columns_select = ", ".join(columns) if columns else "*"
         offset = 0
         logger.info(f"Starting async batch extraction from {table_name} (batch_size={batch_size})")
         
-        while True:
-            session = await self.connector.connect()
-            async with session.begin():
-                query = text(
-                    f'SELECT {columns_select} FROM {table_name} LIMIT :limit OFFSET :offset'
-                )
-                result = await session.execute(query, {'limit': int(batch_size), 'offset': int(offset)})
-                rows = result.mappings().all()
+        # Одна сессия на всё извлечение; соединение берётся из пула только на время запроса,
+        # транзакция не держится открытой, пока потребитель обрабатывает батч
+        session = await self.connector.connect()
+        try:
+            while True:
+                async with session.begin():
+                    query = text(
+                        f'SELECT {columns_select} FROM {table_name} LIMIT :limit OFFSET :offset'
+                    )
+                    result = await session.execute(query, {'limit': int(batch_size), 'offset': int(offset)})
+                    rows = result.mappings().all()
                 if not rows:
                     break
                 logger.debug(f"Batch at offset {offset}: {len(rows)} rows")
                 yield [dict(row) for row in rows]
                 offset += batch_size
+        finally:
+            await session.close()
         
-        logger.info("Async batch extraction completed")
\ No newline at end of file
+        logger.info("Async batch extraction completed")
+
+    async def _extract_batches_by_key(
+        self,
+        table_name: str,
+        batch_size: int,
+        columns: Optional[List[str]],
+        key_column: str,
+        after_key: Any,
+        row_filter: Optional[RowFilter] = None,
+    ) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        logger.info(
+            f"Starting async keyset batch extraction from {table_name} by '{key_column}' "
+            f"(batch_size={batch_size}, after={after_key!r}, filtered={row_filter is not None})"
+        )
+        session = await self.connector.connect()
+        try:
+            while True:
+                query, params = keyset_query(table_name, columns, key_column, after_key, batch_size, row_filter)
+                async with session.begin():
+                    result = await session.execute(query, params)
+                    rows = result.mappings().all()
+                if not rows:
+                    break
+                after_key = rows[-1][key_column]
+                logger.debug(f"Batch up to {key_column}={after_key!r}: {len(rows)} rows")
+                yield [dict(row) for row in rows]
+        finally:
+            await session.close()
+        logger.info("Async batch extraction completed")
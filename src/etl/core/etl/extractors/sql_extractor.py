@@ -1,8 +1,9 @@
 import logging
 from etl.core.etl.base import BaseExtractor
 from etl.core.connector.sql_connector import SQLConnector
-from typing import Generator, List, Dict, Any, Optional
-from sqlalchemy.sql import text
+from typing import Generator, List, Dict, Any, Optional, Tuple
+from sqlalchemy.sql import text, TextClause
+from etl.core.incremental import RowFilter
 
 logger = logging.getLogger(__name__)
 
@@ -25,8 +26,25 @@ class SQLExtractor(BaseExtractor):
         
     def extract_batches(self, table_name:str,
                       batch_size: int = 100,
-                      columns: Optional[List[str]] = None
+                      columns: Optional[List[str]] = None,
+                      key_column: Optional[str] = None,
+                      after_key: Any = None,
+                      row_filter: Optional[RowFilter] = None,
+                      until_key: Any = None,
                       ) -> Generator[List[Dict[str, Any]], None, None]:
+        """
+        Батчи строк таблицы. С key_column — keyset-пагинация по уникальному ключу
+        (WHERE key > :after ORDER BY key), с возможностью продолжить после after_key,
+        остановиться на until_key (включительно, диапазон шарда) и дополнительным
+        фильтром row_filter (инкрементальный режим); иначе — LIMIT/OFFSET.
+        """
+        if key_column:
+            yield from self._extract_batches_by_key(
+                table_name, batch_size, columns, key_column, after_key, row_filter, until_key
+            )
+            return
+        if row_filter is not None or until_key is not None:
+            raise ValueError("row_filter and until_key require keyset extraction (key_column)")
         columns_select = ", ".join(columns) if columns else "*"
         offset = 0
         logger.info(f"Starting batch extraction from {table_name} (batch_size={batch_size})")
@@ -45,4 +63,90 @@ class SQLExtractor(BaseExtractor):
                 offset += batch_size
         logger.info("Batch extraction completed")
 
+    def _extract_batches_by_key(self, table_name: str,
+                                batch_size: int,
+                                columns: Optional[List[str]],
+                                key_column: str,
+                                after_key: Any,
+                                row_filter: Optional[RowFilter] = None,
+                                until_key: Any = None,
+                                ) -> Generator[List[Dict[str, Any]], None, None]:
+        logger.info(
+            f"Starting keyset batch extraction from {table_name} by '{key_column}' "
+            f"(batch_size={batch_size}, after={after_key!r}, until={until_key!r}, "
+            f"filtered={row_filter is not None})"
+        )
+        while True:
+            query, params = keyset_query(
+                table_name, columns, key_column, after_key, batch_size, row_filter, until_key
+            )
+            with self.connector.connect() as session:
+                rows = session.execute(query, params).mappings().all()
+            if not rows:
+                break
+            after_key = rows[-1][key_column]
+            logger.debug(f"Batch up to {key_column}={after_key!r}: {len(rows)} rows")
+            yield [dict(row) for row in rows]
+        logger.info("Batch extraction completed")
+
+    def key_boundaries(self, table_name: str, key_column: str, parts: int) -> List[Any]:
+        """
+        Границы разбиения таблицы на parts диапазонов ключа с примерно равным числом строк:
+        ключи на позициях count·i/parts (i = 1..parts-1), без повторов.
+        """
+        with self.connector.connect() as session:
+            count = session.execute(text(f'SELECT COUNT(*) FROM {table_name}')).scalar() or 0
+            boundaries: List[Any] = []
+            for i in range(1, parts):
+                offset = count * i // parts - 1
+                if offset < 0:
+                    continue
+                key = session.execute(
+                    text(f'SELECT {key_column} FROM {table_name} ORDER BY {key_column} LIMIT 1 OFFSET :offset'),
+                    {'offset': offset},
+                ).scalar()
+                if key is not None and (not boundaries or key != boundaries[-1]):
+                    boundaries.append(key)
+        logger.info(f"{table_name}: {count} rows split by '{key_column}' at {boundaries}")
+        return boundaries
+
 
+def keyset_query(
+    table_name: str,
+    columns: Optional[List[str]],
+    key_column: str,
+    after_key: Any,
+    batch_size: int,
+    row_filter: Optional[RowFilter] = None,
+    until_key: Any = None,
+) -> Tuple[TextClause, Dict[str, Any]]:
+    """
+    SELECT очередного батча по ключу: источник под алиасом src, колонки квалифицированы
+    (row_filter может присоединять свои таблицы), ключ пагинации всегда в выборке.
+    """
+    if columns:
+        selected = list(dict.fromkeys([*columns, key_column]))
+        columns_select = ", ".join(f"src.{column}" for column in selected)
+    else:
+        columns_select = "src.*"
+    conditions = []
+    params: Dict[str, Any] = {'limit': int(batch_size)}
+    if after_key is not None:
+        conditions.append(f"src.{key_column} > :after")
+        params['after'] = after_key
+    if until_key is not None:
+        conditions.append(f"src.{key_column} <= :until")
+        params['until'] = until_key
+    join = ""
+    if row_filter is not None:
+        if row_filter.select:
+            columns_select = f"{columns_select}, {row_filter.select}"
+        join = f" {row_filter.join}" if row_filter.join else ""
+        if row_filter.where:
+            conditions.append(row_filter.where)
+        params.update(row_filter.params)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = text(
+        f'SELECT {columns_select} FROM {table_name} AS src{join}{where} ORDER BY src.{key_column} LIMIT :limit'
+    )
+    return query, params
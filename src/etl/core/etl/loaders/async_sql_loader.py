@@ -5,6 +5,9 @@ from sqlalchemy.dialects.postgresql import insert as pg_insert
 from shared.utils import batched
 
 from etl.core.etl.base import BaseLoader
+from etl.core.etl.chunk_batch import ChunkData, as_chunk_rows
+from sqlalchemy import delete
+from etl.core.etl.loaders.sql_loader import attach_chunk_ids, source_id_in, to_column_rows
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +19,7 @@ class AsyncSQLLoader(BaseLoader):
         batch_size: int = 100,
         conflict_update: Optional[List[str]] = None,
         conflict_target: Optional[List[str]] = None,
+        skip_existing: bool = False,
     ):
         if orm_class is None:
             raise ValueError("orm_class is required")
@@ -24,18 +28,23 @@ class AsyncSQLLoader(BaseLoader):
         self.batch_size = batch_size
         self.conflict_update = conflict_update
         self.conflict_target = conflict_target or ["id"]
+        # INSERT ... ON CONFLICT (conflict_target) DO NOTHING — для детерминированных chunk_id
+        self.skip_existing = skip_existing
         logger.debug(f"AsyncSQLLoader initialized for table '{self.table.name}'")
 
-    async def load(self, session: AsyncSession, data: List[Dict[str, Any]]):
+    async def load(self, session: AsyncSession, data: ChunkData):
         if not data:
             logger.debug("No data to load")
             return
+        data = as_chunk_rows(data)
 
         logger.info(f"Loading {len(data)} records into '{self.table.name}'")
 
         try:
             for batch in batched(data, self.batch_size):
-                if self.conflict_update:
+                if self.skip_existing:
+                    await self._insert_new(session, batch)
+                elif self.conflict_update:
                     await self._upsert(session, batch)
                 else:
                     await self._bulk_insert(session, batch)
@@ -44,10 +53,30 @@ class AsyncSQLLoader(BaseLoader):
             logger.error(f"Error during async load: {e}")
             raise
 
+    async def delete_sources(self, session: AsyncSession, source_ids: List[str]) -> int:
+        """Удаляет все чанки указанных source_id (перед загрузкой новой версии строк источника)."""
+        if not source_ids:
+            return 0
+        stmt = delete(self.table).where(source_id_in(self.table, source_ids, session.bind.dialect.name))
+        result = await session.execute(stmt)
+        logger.info(f"Deleted {result.rowcount} chunks of {len(source_ids)} changed sources from '{self.table.name}'")
+        return result.rowcount
+
     async def _bulk_insert(self, session: AsyncSession, data: List[Dict[str, Any]]):
-        objects = [self.orm_class(**item) for item in data]
+        objects = [self.orm_class(**item) for item in attach_chunk_ids(self.table, data)]
         session.add_all(objects)
 
+    async def _insert_new(self, session: AsyncSession, data: List[Dict[str, Any]]):
+        dialect = session.bind.dialect.name
+        if dialect != "postgresql":
+            logger.warning(f"Insert-if-absent not supported for dialect '{dialect}', using INSERT")
+            await self._bulk_insert(session, data)
+            return
+        rows = to_column_rows(self.table, data, self.orm_class)
+        stmt = pg_insert(self.table).values(rows).on_conflict_do_nothing(index_elements=self.conflict_target)
+        result = await session.execute(stmt)
+        logger.debug(f"Inserted {result.rowcount} new of {len(rows)} records")
+
     async def _upsert(self, session: AsyncSession, data: List[Dict[str, Any]]):
         column_map = {c.key: c.name for c in self.table.columns}
         mapped_data = []
@@ -1,10 +1,14 @@
 import json
 import logging
+import os
+import threading
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set, Tuple
 import numpy as np
 import faiss
 from etl.core.etl.base import BaseLoader
+from etl.core.etl.chunk_batch import ChunkBatch, ChunkData, as_chunk_batch
+from etl.core.metadata.metadata_builder import chunk_id_to_int64
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +19,19 @@ class FAISSLoader(BaseLoader):
         metadata_path: str,
         embedding_dim: int,
         faiss_index_type: str = "FlatIP",
-        metadata_format: str = "jsonl"
+        metadata_format: str = "jsonl",
+        use_chunk_ids: bool = False,
     ):
+        """
+        use_chunk_ids=True — индекс оборачивается в IndexIDMap2, id вектора выводится из
+        metadata_.chunk_id; уже загруженные чанки при повторном прогоне пропускаются.
+        """
         self.index_path = Path(index_path)
         self.metadata_path = Path(metadata_path)
         self.embedding_dim = embedding_dim
         self.faiss_index_type = faiss_index_type
         self.metadata_format = metadata_format
+        self.use_chunk_ids = use_chunk_ids
 
         if self.metadata_format != "jsonl":
             raise NotImplementedError(f"Метаданные формата '{self.metadata_format}' пока не поддерживаются. Используйте 'jsonl'.")
@@ -29,14 +39,26 @@ class FAISSLoader(BaseLoader):
         self._index: faiss.Index = None
         self._metadata_list: List[Dict[str, Any]] = []
         self._current_id = 0
+        self._known_ids: Set[int] = set()
+        # load и delete_sources могут вызываться из разных потоков (async/pipelined режимы)
+        self._lock = threading.Lock()
 
         self._load_existing_data()
 
     def _create_index(self) -> faiss.Index:
+        index = self._create_base_index()
+        return faiss.IndexIDMap2(index) if self.use_chunk_ids else index
+
+    def _create_base_index(self) -> faiss.Index:
         if self.faiss_index_type == "FlatIP":
             return faiss.IndexFlatIP(self.embedding_dim)
         elif self.faiss_index_type == "FlatL2":
             return faiss.IndexFlatL2(self.embedding_dim)
+        elif self.faiss_index_type == "SQfp16":
+            # Векторы хранятся в float16 — вдвое меньше памяти, метрика inner product
+            return faiss.IndexScalarQuantizer(
+                self.embedding_dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT
+            )
         else:
             raise NotImplementedError(f"Тип индекса FAISS '{self.faiss_index_type}' пока не поддерживается.")
 
@@ -57,58 +79,182 @@ class FAISSLoader(BaseLoader):
 
         if self.metadata_path.exists():
             logger.info(f"Загрузка существующих метаданных из {self.metadata_path}")
-            with open(self.metadata_path, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if line:
-                        try:
-                            self._metadata_list.append(json.loads(line))
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Ошибка при чтении JSON строки {line_num} в {self.metadata_path}: {e}")
-                            raise
+            self._metadata_list = read_metadata(self.metadata_path)
             logger.info(f"Загружено {len(self._metadata_list)} записей метаданных.")
             self._current_id = len(self._metadata_list)
         else:
             logger.info(f"Файл метаданных {self.metadata_path} не найден, будет создан.")
             self._current_id = 0
 
+        if self.use_chunk_ids and not isinstance(self._index, faiss.IndexIDMap):
+            if self._index.ntotal > 0:
+                raise ValueError(
+                    f"Индекс {self.index_path} создан без chunk_id (не IndexIDMap); "
+                    f"для детерминированных chunk_id нужен новый индекс."
+                )
+            self._index = faiss.IndexIDMap2(self._index)
+        if self.use_chunk_ids:
+            self._known_ids = {meta["faiss_id"] for meta in self._metadata_list if "faiss_id" in meta}
+
     def _ensure_normalized_for_ip(self, vectors: np.ndarray) -> np.ndarray:
-        if self.faiss_index_type == "FlatIP":
+        if self._index.metric_type == faiss.METRIC_INNER_PRODUCT:
             faiss.normalize_L2(vectors)
         return vectors
 
-    def load(self, data: List[Dict[str, Any]]) -> None:
+    def _new_items_with_ids(self, batch: ChunkBatch) -> Tuple[ChunkBatch, List[int]]:
+        """Отбрасывает чанки, уже загруженные ранее (или повторённые в батче); возвращает (batch, ids)."""
+        keep, ids = [], []
+        seen: Set[int] = set()
+        for position, meta in enumerate(batch.metadata):
+            faiss_id = chunk_id_to_int64(meta['chunk_id'])
+            if faiss_id in self._known_ids or faiss_id in seen:
+                continue
+            seen.add(faiss_id)
+            keep.append(position)
+            ids.append(faiss_id)
+        skipped = len(batch) - len(keep)
+        if not skipped:
+            return batch, ids
+        logger.info(f"Пропущено {skipped} уже загруженных чанков.")
+        return ChunkBatch(
+            texts=[batch.texts[i] for i in keep],
+            embeddings=batch.embeddings[keep],
+            metadata=[batch.metadata[i] for i in keep],
+        ), ids
+
+    def delete_sources(self, source_ids: List[str]) -> int:
+        """Удаляет векторы и метаданные всех чанков указанных source_id."""
+        targets = {str(source_id) for source_id in source_ids}
+        with self._lock:
+            doomed = [
+                position for position, meta in enumerate(self._metadata_list)
+                if str(meta.get("metadata", {}).get("source_id")) in targets
+            ]
+            if not doomed:
+                return 0
+            if self.use_chunk_ids:
+                ids = [self._metadata_list[position]["faiss_id"] for position in doomed]
+                self._known_ids.difference_update(ids)
+            else:
+                # Flat-индексы сохраняют порядок оставшихся векторов — позиции метаданных остаются согласованы
+                ids = doomed
+            self._index.remove_ids(np.array(ids, dtype=np.int64))
+            doomed_set = set(doomed)
+            self._metadata_list = [
+                meta for position, meta in enumerate(self._metadata_list) if position not in doomed_set
+            ]
+            self._current_id = len(self._metadata_list)
+            self._rewrite_metadata()
+            faiss.write_index(self._index, str(self.index_path))
+        logger.info(f"Удалено {len(doomed)} чанков {len(targets)} изменённых источников из FAISS индекса.")
+        return len(doomed)
+
+    def _rewrite_metadata(self) -> None:
+        tmp_path = self.metadata_path.with_name(f"{self.metadata_path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f_meta:
+            for meta in self._metadata_list:
+                f_meta.write(json.dumps(meta, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.metadata_path)
+
+    def load(self, data: ChunkData) -> None:
+        with self._lock:
+            self._load(data)
+
+    def _load(self, data: ChunkData) -> None:
         if not data:
             logger.debug("Нет данных для загрузки в FAISS.")
             return
 
         logger.info(f"Загрузка {len(data)} записей в FAISS индекс и {self.metadata_path}.")
+        if not self._append(as_chunk_batch(data)):
+            logger.info("Все чанки уже есть в FAISS индексе, загрузка пропущена.")
+            return
+
+        faiss.write_index(self._index, str(self.index_path))
+        logger.info(f"FAISS индекс сохранен в {self.index_path}. Всего векторов: {self._index.ntotal}")
 
-        first_embedding = data[0]['embedding']
-        if isinstance(first_embedding, list):
-             first_embedding = np.array(first_embedding)
-        if first_embedding.shape[0] != self.embedding_dim:
+    def _append(self, batch: ChunkBatch) -> int:
+        """Добавляет батч в индекс и файл метаданных (без записи индекса на диск); возвращает число новых чанков."""
+        if batch.dim != self.embedding_dim:
             raise ValueError(
-                f"Размерность эмбеддинга в данных ({first_embedding.shape[0]}) "
+                f"Размерность эмбеддинга в данных ({batch.dim}) "
                 f"не совпадает с ожидаемой ({self.embedding_dim})."
             )
 
-        embeddings_list = [item['embedding'] for item in data]
-        embeddings_array = np.array(embeddings_list).astype('float32')
+        ids = None
+        if self.use_chunk_ids:
+            batch, ids = self._new_items_with_ids(batch)
+            if not batch:
+                return 0
+
+        # float32-матрица батча используется как есть (нормализация — на месте), без копии
+        embeddings_array = np.ascontiguousarray(batch.embeddings, dtype=np.float32)
         embeddings_array = self._ensure_normalized_for_ip(embeddings_array)
 
-        self._index.add(embeddings_array)
-        logger.debug(f"Добавлено {len(embeddings_list)} векторов в индекс.")
+        if ids is None:
+            self._index.add(embeddings_array)
+        else:
+            self._index.add_with_ids(embeddings_array, np.array(ids, dtype=np.int64))
+            self._known_ids.update(ids)
+        logger.debug(f"Добавлено {len(batch)} векторов в индекс.")
 
         with open(self.metadata_path, 'a', encoding='utf-8') as f_meta:
-            for item in data:
+            for position, (chunk_text, metadata) in enumerate(zip(batch.texts, batch.metadata)):
                 meta_to_save = {
-                    "chunk_text": item.get('chunk_text', ''),
-                    "metadata": item.get('metadata_', {})
+                    "chunk_text": chunk_text,
+                    "metadata": metadata
                 }
+                if ids is not None:
+                    meta_to_save["faiss_id"] = ids[position]
                 f_meta.write(json.dumps(meta_to_save, ensure_ascii=False) + '\n')
                 self._metadata_list.append(meta_to_save)
                 self._current_id += 1
+        return len(batch)
 
-        faiss.write_index(self._index, str(self.index_path))
-        logger.info(f"FAISS индекс сохранен в {self.index_path}. Всего векторов: {self._index.ntotal}")
+    def merge_from(
+        self,
+        index: faiss.Index,
+        metadata: List[Dict[str, Any]],
+        replace_sources: bool = False,
+        slice_size: int = 65536,
+    ) -> int:
+        """
+        Переносит векторы и метаданные другого индекса (шарда) в этот; индекс пишется на диск один раз.
+        replace_sources=True — сначала удаляются чанки тех же source_id (инкрементальный прогон).
+        Векторы восстанавливаются из индекса (reconstruct), для SQfp16 — с точностью float16.
+        """
+        total = index.ntotal
+        if total != len(metadata):
+            raise ValueError(f"Индекс ({total} векторов) не согласован с метаданными ({len(metadata)} записей).")
+        if replace_sources:
+            self.delete_sources(list({str(meta["metadata"].get("source_id")) for meta in metadata}))
+        # Позиции векторов базового индекса совпадают с порядком метаданных (и для IndexIDMap2)
+        storage = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+        added = 0
+        with self._lock:
+            for start in range(0, total, slice_size):
+                stop = min(start + slice_size, total)
+                metas = metadata[start:stop]
+                added += self._append(ChunkBatch(
+                    texts=[meta["chunk_text"] for meta in metas],
+                    embeddings=storage.reconstruct_n(start, stop - start),
+                    metadata=[meta["metadata"] for meta in metas],
+                ))
+            faiss.write_index(self._index, str(self.index_path))
+        logger.info(f"В FAISS индекс {self.index_path} добавлено {added} из {total} векторов.")
+        return added
+
+
+def read_metadata(metadata_path: Path) -> List[Dict[str, Any]]:
+    """Записи метаданных FAISS из jsonl-файла (по строке на вектор)."""
+    metadata = []
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if line:
+                try:
+                    metadata.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    logger.error(f"Ошибка при чтении JSON строки {line_num} в {metadata_path}: {e}")
+                    raise
+    return metadata
@@ -1,16 +1,58 @@
 import logging
 from typing import List, Dict, Any, Optional, Type
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import Table, MetaData, insert
+from sqlalchemy import Table, MetaData, cast, delete, func, inspect, literal_column
 from sqlalchemy.orm import Session
-from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from etl.core.etl.base import BaseLoader
+from etl.core.etl.chunk_batch import ChunkData, as_chunk_rows
 from etl.core.connector.sql_connector import SQLConnector
 
 logger = logging.getLogger(__name__)
 
+
+def attach_chunk_ids(table: Table, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Если в таблице есть колонка chunk_id, а в строке нет — берёт его из метаданных чанка."""
+    if "chunk_id" not in table.columns:
+        return data
+    return [
+        item if "chunk_id" in item else {**item, "chunk_id": (item.get("metadata_") or {}).get("chunk_id")}
+        for item in data
+    ]
+
+
+def to_column_rows(
+    table: Table,
+    data: List[Dict[str, Any]],
+    orm_class: Optional[Type] = None,
+) -> List[Dict[str, Any]]:
+    """Переводит ключи ORM-атрибутов (metadata_) в имена колонок (metadata)."""
+    if orm_class is not None:
+        column_map = {attr.key: attr.columns[0].name for attr in inspect(orm_class).column_attrs}
+    else:
+        column_map = {c.key: c.name for c in table.columns}
+    return [
+        {column_map.get(k, k): v for k, v in item.items()}
+        for item in attach_chunk_ids(table, data)
+    ]
+
+
+def source_id_in(table: Table, source_ids: List[str], dialect: str):
+    """
+    Условие metadata.source_id IN (...) для таблицы чанков.
+    UTF8JSON сериализует метаданные сам, и колонка хранит JSON-строку с объектом внутри:
+    значение сначала разворачивается (#>> '{}' / json_extract '$'); с объектом это тоже работает.
+    """
+    column = table.c.metadata
+    if dialect == "postgresql":
+        unwrapped = cast(column.op("#>>")(literal_column("'{}'")), JSONB)
+        return unwrapped["source_id"].astext.in_(source_ids)
+    return func.json_extract(func.json_extract(column, "$"), "$.source_id").in_(source_ids)
+
+
 class SQLLoader(BaseLoader):
     def __init__(
             self,
@@ -19,7 +61,8 @@ class SQLLoader(BaseLoader):
             batch_size: int = 100,
             conflict_update: Optional[List[str]] = None,
             conflict_target: Optional[List[str]] = None,
-            orm_class: Optional[Type] = None
+            orm_class: Optional[Type] = None,
+            skip_existing: bool = False,
             ):
         self.connector = connector
         self.table_name = table_name
@@ -27,16 +70,22 @@ class SQLLoader(BaseLoader):
         self.conflict_update = conflict_update
         self.conflict_target = conflict_target
         self.orm_class = orm_class
+        # INSERT ... ON CONFLICT (conflict_target) DO NOTHING — для детерминированных chunk_id
+        self.skip_existing = skip_existing
         logger.debug(f"SQLLoader initialized for table '{table_name}'")
     
-    def load(self, data: List[Dict[str, Any]]):
+    def load(self, data: ChunkData):
         if not data:
             logger.debug("No data to load")
             return
+        # ChunkBatch → строки для executemany; embedding остаётся view строки матрицы
+        data = as_chunk_rows(data)
         logger.info(f"Loading {len(data)} records into '{self.table_name}'")
         try:
             with self.connector.connect() as session:  # 🔑 SQLConnector.connect()
-                if self.conflict_update:
+                if self.skip_existing:
+                    self.insert_new(session, data)
+                elif self.conflict_update:
                     pk = self.conflict_target[0] if self.conflict_target else "id"
                     self.upsert(session, data, pk=pk)
                 else:
@@ -48,15 +97,49 @@ class SQLLoader(BaseLoader):
             raise
 
 
+    def delete_sources(self, source_ids: List[str]) -> int:
+        """Удаляет все чанки указанных source_id (перед загрузкой новой версии строк источника)."""
+        if not source_ids:
+            return 0
+        with self.connector.connect() as session:
+            table = self.orm_class.__table__ if self.orm_class is not None else self._table_class(session)
+            stmt = delete(table).where(source_id_in(table, source_ids, session.bind.dialect.name))
+            deleted = session.execute(stmt).rowcount or 0
+            session.commit()
+        logger.info(f"Deleted {deleted} chunks of {len(source_ids)} changed sources from '{self.table_name}'")
+        return deleted
+
     def _bulk_insert(self, session: Session, data: List[Dict]):
         if self.orm_class is None:
             raise ValueError("Для bulk insert требуется orm_class")
         logger.debug(f"Bulk inserting {len(data)} records")
+        data = attach_chunk_ids(self.orm_class.__table__, data)
         for i in range(0, len(data), self.batch_size):
             batch = data[i : i + self.batch_size]
             session.bulk_insert_mappings(self.orm_class, batch)
 
 
+    def insert_new(self, session: Session, data: List[Dict[str, Any]]):
+        """Вставляет только строки, которых ещё нет (конфликт по conflict_target пропускается)."""
+        table = self.orm_class.__table__ if self.orm_class is not None else self._table_class(session)
+        target = self.conflict_target or ["id"]
+        rows = to_column_rows(table, data, self.orm_class)
+        dialect = session.bind.dialect.name
+
+        inserted = 0
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i : i + self.batch_size]
+            if dialect == "postgresql":
+                stmt = pg_insert(table).values(batch).on_conflict_do_nothing(index_elements=target)
+            elif dialect in ("mysql", "mariadb"):
+                stmt = mysql_insert(table).values(batch).prefix_with("IGNORE")
+            elif dialect == "sqlite":
+                stmt = sqlite_insert(table).values(batch).on_conflict_do_nothing(index_elements=target)
+            else:
+                raise NotImplementedError(f"Insert-if-absent не поддержан для {dialect}")
+            inserted += session.execute(stmt).rowcount or 0
+        logger.info(f"Inserted {inserted} new of {len(rows)} records (existing {target} skipped)")
+
     def _table_class(self, session: Session):
         meta = MetaData()
         table = Table(self.table_name, meta, autoload_with=session.bind)
@@ -81,7 +164,7 @@ class SQLLoader(BaseLoader):
             stmt = stmt.on_duplicate_key_update(**update_dict)
 
         elif dialect == "sqlite":
-            stmt = insert(table).values(data)
+            stmt = sqlite_insert(table).values(data)
             update_dict = {c.name: stmt.excluded[c.name] for c in table.columns if c.name != pk}
             stmt = stmt.on_conflict_do_update(index_elements=[pk], set_=update_dict)
 
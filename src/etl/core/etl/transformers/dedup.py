@@ -0,0 +1,80 @@
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, Dict, List
+from shared.embedding.cache import text_hash
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Ключ дедупликации: текст с обрезанными краями и схлопнутыми пробельными символами."""
+    return " ".join(text.split())
+
+
+class ChunkDeduplicator:
+    """
+    Точная дедупликация чанков перед эмбеддингом: каждый уникальный (после нормализации)
+    текст проходит через модель один раз, вектор раздаётся всем его вхождениям.
+    cache_size > 0 дополнительно хранит векторы последних уникальных текстов между батчами (LRU).
+    """
+
+    def __init__(self, cache_size: int = 0):
+        if cache_size < 0:
+            raise ValueError("cache_size must be >= 0")
+        self.cache_size = cache_size
+        self.saved_passes = 0
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if not self.cache_size:
+            return {}
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    found[key] = vector
+        return found
+
+    def _remember(self, vectors: Dict[str, np.ndarray]) -> None:
+        if not self.cache_size:
+            return
+        with self._lock:
+            for key, vector in vectors.items():
+                # Копия, чтобы кэш не удерживал всю матрицу батча
+                self._cache[key] = vector.copy()
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def embed(self, texts: List[str], embed_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Матрица (len(texts), dim); embed_fn вызывается только для уникальных текстов, которых нет в кэше."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        keys = [text_hash(normalize_chunk_text(text)) for text in texts]
+        first_seen: Dict[str, int] = {}
+        for i, key in enumerate(keys):
+            first_seen.setdefault(key, i)
+        unique_keys = list(first_seen)
+
+        vectors = self._cached(unique_keys)
+        to_embed = [key for key in unique_keys if key not in vectors]
+        if to_embed:
+            computed = np.asarray(embed_fn([texts[first_seen[key]] for key in to_embed]))
+            fresh = dict(zip(to_embed, computed))
+            self._remember(fresh)
+            vectors.update(fresh)
+
+        saved = len(texts) - len(to_embed)
+        if saved:
+            with self._lock:
+                self.saved_passes += saved
+            logger.debug(f"Dedup: {len(texts)} chunks → {len(to_embed)} embedded, {saved} forward passes saved")
+        # Одна выборка по индексам даёт непрерывную матрицу в порядке входных текстов
+        unique = np.stack([vectors[key] for key in unique_keys])
+        position = {key: i for i, key in enumerate(unique_keys)}
+        return unique[[position[key] for key in keys]]
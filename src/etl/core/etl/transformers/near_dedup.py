@@ -0,0 +1,120 @@
+import logging
+import threading
+import zlib
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from etl.core.etl.transformers.dedup import normalize_chunk_text
+
+logger = logging.getLogger(__name__)
+
+NEAR_DUP_ACTIONS = ("skip", "merge")
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+@dataclass
+class NearDuplicateEntry:
+    """Канонический чанк в LSH-индексе: сигнатура, ссылка на чанк и (для merge) его вектор."""
+    entry_id: int
+    signature: np.ndarray
+    band_keys: List[bytes]
+    canonical: Dict[str, Any]
+    vector: Optional[np.ndarray] = None
+
+
+class NearDuplicateFilter:
+    """
+    Поиск почти-дубликатов чанков по MinHash-сигнатурам символьных шинглов с LSH-бакетами.
+    Чанк считается дубликатом, если оценка сходства Жаккара с уже виденным чанком >= threshold.
+    Хранится не больше max_entries канонических чанков (вытесняются давно не совпадавшие).
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 5,
+        max_entries: int = 1_000_000,
+        seed: int = 1,
+    ):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.duplicates = 0
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._entries: "OrderedDict[int, NearDuplicateEntry]" = OrderedDict()
+        self._buckets: List[Dict[bytes, set]] = [{} for _ in range(bands)]
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def signature(self, text: str) -> np.ndarray:
+        text = normalize_chunk_text(text).casefold()
+        k = self.shingle_size
+        shingles = {text[i:i + k] for i in range(max(1, len(text) - k + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        # Универсальное хеширование (a·x + b) mod p; переполнение uint64 допустимо, как в datasketch
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        r = self.rows_per_band
+        return [signature[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    def find_or_add(self, text: str, canonical: Dict[str, Any]) -> Tuple[NearDuplicateEntry, bool]:
+        """
+        Возвращает (канонический чанк, True), если text — почти-дубликат уже виденного,
+        иначе регистрирует text как канонический и возвращает (его запись, False).
+        """
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(band_keys):
+                candidates.update(self._buckets[band].get(key, ()))
+
+            best, best_similarity = None, self.threshold
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                similarity = float(np.mean(entry.signature == signature))
+                if similarity >= best_similarity:
+                    best, best_similarity = entry, similarity
+            if best is not None:
+                self._entries.move_to_end(best.entry_id)
+                self.duplicates += 1
+                return best, True
+
+            entry = NearDuplicateEntry(self._next_id, signature, band_keys, canonical)
+            self._next_id += 1
+            self._entries[entry.entry_id] = entry
+            for band, key in enumerate(band_keys):
+                self._buckets[band].setdefault(key, set()).add(entry.entry_id)
+            if len(self._entries) > self.max_entries:
+                self._evict(self._entries.popitem(last=False)[1])
+            return entry, False
+
+    def _evict(self, entry: NearDuplicateEntry) -> None:
+        for band, key in enumerate(entry.band_keys):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(entry.entry_id)
+                if not bucket:
+                    del self._buckets[band][key]
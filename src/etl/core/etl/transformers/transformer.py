@@ -1,35 +1,124 @@
 import logging
 import asyncio
-from typing import Optional, List, Dict, Any, Generator
+import multiprocessing as mp
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import groupby
+from operator import attrgetter
+from typing import Optional, List, Dict, Any, AsyncIterator, Generator, Iterator, NamedTuple, Set, Tuple
 from etl.core.etl.base import BaseTransformer
+from etl.core.etl.chunk_batch import ChunkBatch
+from etl.core.etl.transformers.dedup import ChunkDeduplicator
+from etl.core.etl.transformers.near_dedup import NEAR_DUP_ACTIONS, NearDuplicateFilter
 from shared.embedding.base import BaseEmbedding
-from etl.core.splitters.base import BaseSplitter
+from etl.core.splitters.base import BaseSplitter, Chunk
 from etl.core.metadata.metadata_builder import MetadataBuilder
 
 logger = logging.getLogger(__name__)
 
+CHUNK_EMBEDDING_MODES = ("embed", "reuse", "pool")
+
+
+class PendingChunk(NamedTuple):
+    """Непустой чанк строки батча, ожидающий эмбеддинга."""
+    row_idx: int
+    metadata_row: Dict[str, Any]
+    source_id: Optional[str]
+    total_chunks: int
+    chunk_index: int
+    chunk: Chunk
+
+
+# Сплиттер (без модели), загруженный один раз в каждом процессе-воркере
+_worker_splitter: Optional[BaseSplitter] = None
+
+
+def _init_split_worker(splitter: BaseSplitter) -> None:
+    global _worker_splitter
+    _worker_splitter = splitter
+
+
+def _prepare_in_worker(text: str) -> Any:
+    return _worker_splitter.prepare(text)
+
+
 class Transformer(BaseTransformer):
     def __init__(
         self,
         embedding: BaseEmbedding,
         splitter: BaseSplitter,
         metadata_builder: Optional[MetadataBuilder] = None,
-        metadata_columns: Optional[List[str]] = None
+        metadata_columns: Optional[List[str]] = None,
+        embedding_batch_size: int = 32,
+        chunk_embedding_mode: str = "embed",
+        split_workers: int = 0,
+        chunk_batch_size: int = 256,
+        async_workers: int = 4,
+        max_in_flight: int = 4,
+        dedup_chunks: bool = False,
+        dedup_cache_size: int = 0,
+        near_dup_filter: Optional[NearDuplicateFilter] = None,
+        near_dup_action: str = "skip",
     ):
+        """
+        chunk_embedding_mode:
+          "embed" — каждый чанк эмбеддится моделью;
+          "reuse" — чанк из одного предложения берёт эмбеддинг, уже посчитанный сплиттером;
+          "pool"  — как "reuse", а многопредложенные чанки получают нормированное среднее эмбеддингов предложений.
+        split_workers > 0 включает разбиение строк батча в пуле процессов (порядок строк сохраняется);
+        в воркерах выполняется только CPU-стадия сплиттера (prepare), модель остаётся в основном процессе.
+        chunk_batch_size — сколько чанков (из любых строк) эмбеддится и отдаётся загрузчику за раз.
+        async_workers / max_in_flight — размер выделенного пула потоков atransform_stream
+        и предел одновременно выполняемых под-батчей.
+        dedup_chunks — одинаковые (после нормализации пробелов) тексты чанков эмбеддятся один раз;
+        dedup_cache_size > 0 — LRU последних векторов между батчами.
+        near_dup_filter — фильтр почти-дубликатов до эмбеддинга; near_dup_action:
+          "skip"  — дубликат не эмбеддится и не загружается;
+          "merge" — дубликат загружается с вектором канонического чанка,
+                    ссылка на канонический чанк пишется в metadata["near_duplicate_of"].
+        """
+        if chunk_embedding_mode not in CHUNK_EMBEDDING_MODES:
+            raise ValueError(
+                f"Unsupported chunk_embedding_mode '{chunk_embedding_mode}', expected one of {CHUNK_EMBEDDING_MODES}"
+            )
         self.embedding = embedding
         self.splitter = splitter
         self.metadata_builder = metadata_builder or MetadataBuilder()
         self.metadata_columns = metadata_columns or []
+        self.embedding_batch_size = embedding_batch_size
+        self.chunk_embedding_mode = chunk_embedding_mode
+        self.reused_embeddings = 0
+        # _embed_chunks выполняется параллельно в потоках atransform_stream
+        self._reused_lock = threading.Lock()
+        self.split_workers = split_workers
+        self.chunk_batch_size = chunk_batch_size
+        self.async_workers = async_workers
+        self.max_in_flight = max(1, max_in_flight)
+        if near_dup_action not in NEAR_DUP_ACTIONS:
+            raise ValueError(f"Unsupported near_dup_action '{near_dup_action}', expected one of {NEAR_DUP_ACTIONS}")
+        self.near_dup_filter = near_dup_filter
+        self.near_dup_action = near_dup_action
+        self.deduplicator = ChunkDeduplicator(dedup_cache_size) if dedup_chunks else None
+        self._async_executor: Optional[ThreadPoolExecutor] = None
+        self._split_pool: Optional[ProcessPoolExecutor] = None
+        if split_workers > 0:
+            self._split_pool = ProcessPoolExecutor(
+                max_workers=split_workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_split_worker,
+                initargs=(splitter.preparer(),),
+            )
+            logger.info(f"Transformer: splitting in a pool of {split_workers} processes")
         logger.debug("Transformer initialized")
 
-    def transform(
+    def _valid_rows(
         self,
         batch_rows: List[Dict[str, Any]],
-        text_column: str = "",
-        source_id_column: Optional[str] = None,
-    ) -> Generator[List[Dict[str, Any]], None, None]:
-        results = []
-        logger.info(f"Transforming batch of {len(batch_rows)} rows")
+        text_column: str,
+    ) -> List[Tuple[int, Dict[str, Any], str]]:
+        """Строки с непустым текстом: (индекс строки, строка, текст)."""
+        valid_rows = []
         for row_idx, row in enumerate(batch_rows):
             raw_text = row.get(text_column)
             if not raw_text or not isinstance(raw_text, str):
@@ -37,119 +126,285 @@ class Transformer(BaseTransformer):
                     f"Row {row_idx}: skipped. Value in '{text_column}' = {repr(raw_text)} (type: {type(raw_text).__name__})"
                 )
                 continue
+            valid_rows.append((row_idx, row, raw_text))
+        return valid_rows
 
-            metadata_row = {}
-            if self.metadata_columns:
-                for col in self.metadata_columns:
-                    if col in row:
-                        metadata_row[col] = row[col]
-            else:
-                metadata_row = {}
+    def _split_rows(self, texts: List[str]) -> List[List[Chunk]]:
+        """Разбивает тексты строк батча; при split_workers CPU-стадия идёт параллельно в процессах."""
+        if self._split_pool is None or len(texts) < 2:
+            return self.splitter.split_chunks(texts)
+        chunksize = max(1, len(texts) // (self.split_workers * 4))
+        prepared = list(self._split_pool.map(_prepare_in_worker, texts, chunksize=chunksize))
+        return self.splitter.finalize(prepared)
 
-            chunks = self.splitter.split(raw_text)
-            total_chunks = len(chunks)
-            source_id = str(row[source_id_column]) if source_id_column and source_id_column in row else None
+    def close(self) -> None:
+        if self._async_executor is not None:
+            self._async_executor.shutdown(wait=True)
+            self._async_executor = None
+        if self._split_pool is not None:
+            self._split_pool.shutdown(wait=True)
+            self._split_pool = None
+            logger.info("Transformer split workers stopped")
 
-            logger.debug(f"Row {row_idx}: split into {total_chunks} chunks")
-            for idx, chunk in enumerate(chunks):
-                if not chunk.strip():
-                    continue
-
-                embedding = self.embedding.embed_text(chunk)
-                
-                metadata = self.metadata_builder.build(
-                    row_data=metadata_row,
-                    chunk_index=idx,
-                    total_chunks=total_chunks,
-                    source_id=source_id,
-                )
-                results.append({
-                    "chunk_text": chunk,
-                    "embedding": embedding,
-                    "metadata_": metadata,
-                })
-        logger.info(f"Produced {len(results)} transformed chunks")
-        yield results
+    def _reusable_embedding(self, chunk: Chunk) -> Optional[np.ndarray]:
+        """Эмбеддинг чанка из уже посчитанных эмбеддингов предложений или None, если нужен forward-проход."""
+        vectors = chunk.sentence_embeddings
+        if self.chunk_embedding_mode == "embed" or vectors is None or len(vectors) == 0:
+            return None
+        if len(vectors) == 1:
+            return vectors[0]
+        if self.chunk_embedding_mode == "pool":
+            pooled = vectors.astype(np.float32).mean(axis=0)
+            pooled /= max(float(np.linalg.norm(pooled)), 1e-12)
+            return pooled.astype(vectors.dtype, copy=False)
+        return None
 
-    async def atransform(
-        self,
-        batch_rows: List[Dict[str, Any]],
-        text_column: str = "",
-        source_id_column: Optional[str] = None,
-    ) -> List[Dict[str, Any]]:
-        results = []
-        logger.info(f"Async-transforming batch of {len(batch_rows)} rows")
+    def _embed_texts(self, texts: List[str]) -> np.ndarray:
+        def embed(unique_texts: List[str]) -> np.ndarray:
+            return np.asarray(self.embedding.embed_texts(unique_texts, batch_size=self.embedding_batch_size))
 
-        loop = asyncio.get_running_loop()
-        tasks = []
+        if self.deduplicator is None:
+            return embed(texts)
+        return self.deduplicator.embed(texts, embed)
 
-        for row_idx, row in enumerate(batch_rows):
-            raw_text = row.get(text_column)
-            if not raw_text or not isinstance(raw_text, str):
-                logger.warning(
-                    f"Row {row_idx}: skipped. Value in '{text_column}' = {repr(raw_text)} (type: {type(raw_text).__name__})"
-                )
-                continue
+    @property
+    def dedup_saved_passes(self) -> int:
+        return self.deduplicator.saved_passes if self.deduplicator else 0
+
+    @property
+    def near_duplicates(self) -> int:
+        return self.near_dup_filter.duplicates if self.near_dup_filter else 0
+
+    def _embed_chunks(self, chunks: List[Chunk]) -> np.ndarray:
+        """
+        Матрица эмбеддингов чанков (n, dim): переиспользованные где возможно,
+        остальные — одним батчевым вызовом модели.
+        """
+        reused = [self._reusable_embedding(chunk) for chunk in chunks]
+        missing = [i for i, embedding in enumerate(reused) if embedding is None]
+        with self._reused_lock:
+            self.reused_embeddings += len(chunks) - len(missing)
 
+        computed = None
+        if missing:
+            computed = self._embed_texts([chunks[i].text for i in missing])
+            if len(missing) == len(chunks):
+                return computed
+
+        reference = computed if computed is not None else reused[0]
+        embeddings = np.empty((len(chunks), reference.shape[-1]), dtype=reference.dtype)
+        for i, embedding in enumerate(reused):
+            if embedding is not None:
+                embeddings[i] = embedding
+        if computed is not None:
+            embeddings[missing] = computed
+        return embeddings
+
+    def _pending_chunks(
+        self,
+        valid_rows: List[Tuple[int, Dict[str, Any], str]],
+        chunks_per_row: List[List[Chunk]],
+        source_id_column: Optional[str],
+    ) -> List[PendingChunk]:
+        """Все непустые чанки батча (всех строк) в порядке строк и чанков."""
+        pending = []
+        for (row_idx, row, _), chunks in zip(valid_rows, chunks_per_row):
             metadata_row = {
                 col: row[col] for col in self.metadata_columns if col in row
             } if self.metadata_columns else {}
 
-            chunks = self.splitter.split(raw_text)
             total_chunks = len(chunks)
             source_id = str(row[source_id_column]) if source_id_column and source_id_column in row else None
             logger.debug(f"Row {row_idx}: split into {total_chunks} chunks")
 
-            for idx, chunk in enumerate(chunks):
-                if not chunk.strip():
-                    continue
-                task = loop.run_in_executor(
-                    None,
-                    self._safe_embed_and_build,
-                    chunk,
-                    metadata_row,
-                    idx,
-                    total_chunks,
-                    source_id,
-                    row_idx
-                )
-                tasks.append(task)
+            pending.extend(
+                PendingChunk(row_idx, metadata_row, source_id, total_chunks, idx, chunk)
+                for idx, chunk in enumerate(chunks)
+                if chunk.text.strip()
+            )
+        return pending
 
-        completed = await asyncio.gather(*tasks, return_exceptions=True)
+    def _filter_near_duplicates(
+        self,
+        pending: List[PendingChunk],
+    ) -> Tuple[List[PendingChunk], np.ndarray, List[Optional[Dict[str, Any]]]]:
+        """
+        Пропускает чанки через фильтр почти-дубликатов до вызова модели.
+        Возвращает (оставшиеся чанки, их эмбеддинги, ссылку на канонический чанк или None для каждого).
+        """
+        matches = [
+            self.near_dup_filter.find_or_add(
+                item.chunk.text,
+                {"source_id": item.source_id, "chunk_index": item.chunk_index},
+            )
+            for item in pending
+        ]
+        if self.near_dup_action == "skip":
+            kept = [item for item, (_, duplicate) in zip(pending, matches) if not duplicate]
+            if len(kept) < len(pending):
+                logger.debug(f"Near-duplicate filter: skipped {len(pending) - len(kept)} of {len(pending)} chunks")
+            if not kept:
+                return kept, np.empty((0, 0), dtype=np.float32), []
+            return kept, self._embed_chunks([item.chunk for item in kept]), [None] * len(kept)
 
-        for res in completed:
-            if isinstance(res, Exception):
-                logger.error(f"Async transform task failed: {res}")
-                continue
-            if res is not None:
-                results.append(res)
+        # merge: канонический чанк из этого же под-батча или с уже сохранённым вектором
+        batch_position = {entry.entry_id: pos for pos, (entry, duplicate) in enumerate(matches) if not duplicate}
+        to_embed = [
+            pos for pos, (entry, duplicate) in enumerate(matches)
+            if not duplicate or (entry.vector is None and entry.entry_id not in batch_position)
+        ]
+        computed = {}
+        if to_embed:
+            computed = dict(zip(to_embed, self._embed_chunks([pending[pos].chunk for pos in to_embed])))
+        vectors = []
+        for pos, (entry, duplicate) in enumerate(matches):
+            if pos in computed:
+                vectors.append(computed[pos])
+            elif entry.vector is not None:
+                vectors.append(entry.vector)
+            else:
+                vectors.append(computed[batch_position[entry.entry_id]])
+        for pos in batch_position.values():
+            matches[pos][0].vector = computed[pos].copy()
+        canonical = [entry.canonical if duplicate else None for entry, duplicate in matches]
+        return pending, np.stack(vectors), canonical
 
-        logger.info(f"Async transformation produced {len(results)} chunks")
-        return results
-    
+    def _build_results(self, pending: List[PendingChunk]) -> ChunkBatch:
+        """Эмбеддинги для пачки чанков (из разных строк) одним вызовом модели + метаданные по строкам."""
+        canonical = None
+        if self.near_dup_filter is not None:
+            pending, embeddings, canonical = self._filter_near_duplicates(pending)
+            if not pending:
+                return ChunkBatch([], embeddings, [])
+        else:
+            embeddings = self._embed_chunks([item.chunk for item in pending])
+        metadatas = []
+        for _, group in groupby(pending, key=attrgetter("row_idx")):
+            group = list(group)
+            first = group[0]
+            metadatas.extend(self.metadata_builder.build_for_row(
+                row_data=first.metadata_row,
+                n_chunks=first.total_chunks,
+                source_id=first.source_id,
+                chunk_indices=[item.chunk_index for item in group],
+                chunk_texts=[item.chunk.text for item in group],
+            ))
+        if canonical is not None:
+            for metadata, reference in zip(metadatas, canonical):
+                if reference is not None:
+                    metadata["near_duplicate_of"] = reference
+        return ChunkBatch(
+            texts=[item.chunk.text for item in pending],
+            embeddings=embeddings,
+            metadata=metadatas,
+        )
 
-    def _safe_embed_and_build(
+    def _sub_batches(self, pending: List[PendingChunk]) -> Iterator[List[PendingChunk]]:
+        for start in range(0, len(pending), self.chunk_batch_size):
+            yield pending[start:start + self.chunk_batch_size]
+
+    def transform(
         self,
-        chunk: str,
-        metadata_row: Dict[str, Any],
-        chunk_index: int,
-        total_chunks: int,
-        source_id: Optional[str],
-        row_idx: int
-    ) -> Optional[Dict[str, Any]]:
-        try:
-            embedding = self.embedding.embed_text(chunk)
-            metadata = self.metadata_builder.build(
-                row_data=metadata_row,
-                chunk_index=chunk_index,
-                total_chunks=total_chunks,
-                source_id=source_id,
+        batch_rows: List[Dict[str, Any]],
+        text_column: str = "",
+        source_id_column: Optional[str] = None,
+    ) -> Generator[ChunkBatch, None, None]:
+        """
+        Разбивает все строки батча, затем эмбеддит чанки разных строк общими вызовами модели
+        и отдаёт результат под-батчами по chunk_batch_size чанков — загрузчик стартует раньше,
+        а пик памяти ограничен размером под-батча.
+        """
+        logger.info(f"Transforming batch of {len(batch_rows)} rows")
+        valid_rows = self._valid_rows(batch_rows, text_column)
+        chunks_per_row = self._split_rows([raw_text for _, _, raw_text in valid_rows])
+        pending = self._pending_chunks(valid_rows, chunks_per_row, source_id_column)
+        produced = 0
+        for sub_batch in self._sub_batches(pending):
+            results = self._build_results(sub_batch)
+            if results:
+                produced += len(results)
+                yield results
+        logger.info(
+            f"Produced {produced} transformed chunks "
+            f"(so far: reused embeddings {self.reused_embeddings}, "
+            f"forward passes saved by dedup {self.dedup_saved_passes}, "
+            f"near-duplicates {self.near_duplicates})"
+        )
+
+    def _get_async_executor(self) -> ThreadPoolExecutor:
+        if self._async_executor is None:
+            self._async_executor = ThreadPoolExecutor(
+                max_workers=self.async_workers,
+                thread_name_prefix="transform",
             )
-            return {
-                "chunk_text": chunk,
-                "embedding": embedding,
-                "metadata_": metadata,
-            }
+        return self._async_executor
+
+    async def atransform_stream(
+        self,
+        batch_rows: List[Dict[str, Any]],
+        text_column: str = "",
+        source_id_column: Optional[str] = None,
+    ) -> AsyncIterator[ChunkBatch]:
+        """
+        Асинхронная трансформация с ограниченным параллелизмом: под-батчи по chunk_batch_size
+        чанков эмбеддятся в выделенном пуле потоков, одновременно выполняется не больше
+        max_in_flight задач, результаты отдаются по мере готовности (порядок не сохраняется).
+        """
+        logger.info(f"Async-transforming batch of {len(batch_rows)} rows")
+        loop = asyncio.get_running_loop()
+        executor = self._get_async_executor()
+
+        valid_rows = self._valid_rows(batch_rows, text_column)
+        # Разбиение не блокирует event loop
+        chunks_per_row = await loop.run_in_executor(
+            executor, self._split_rows, [raw_text for _, _, raw_text in valid_rows]
+        )
+        pending = self._pending_chunks(valid_rows, chunks_per_row, source_id_column)
+
+        produced = 0
+        in_flight: Set[asyncio.Future] = set()
+        sub_batches = self._sub_batches(pending)
+        try:
+            while True:
+                for sub_batch in sub_batches:
+                    in_flight.add(loop.run_in_executor(executor, self._logged_build_results, sub_batch))
+                    if len(in_flight) >= self.max_in_flight:
+                        break
+                if not in_flight:
+                    break
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    # Ошибка под-батча прерывает батч: иначе чекпоинт/инкрементальное состояние
+                    # продвинулись бы за строки, чанки которых не загружены
+                    results = future.result()
+                    if results:
+                        produced += len(results)
+                        yield results
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+        logger.info(
+            f"Async transformation produced {produced} chunks "
+            f"(so far: forward passes saved by dedup {self.dedup_saved_passes}, "
+            f"near-duplicates {self.near_duplicates})"
+        )
+
+    async def atransform(
+        self,
+        batch_rows: List[Dict[str, Any]],
+        text_column: str = "",
+        source_id_column: Optional[str] = None,
+    ) -> ChunkBatch:
+        sub_batches = [
+            sub_batch async for sub_batch in self.atransform_stream(batch_rows, text_column, source_id_column)
+        ]
+        return ChunkBatch.concat(sub_batches)
+
+    def _logged_build_results(self, pending: List[PendingChunk]) -> ChunkBatch:
+        try:
+            return self._build_results(pending)
         except Exception as e:
-            logger.error(f"Failed to embed chunk in row {row_idx}, index {chunk_index}: {e}")
-            return None
\ No newline at end of file
+            rows = sorted({item.row_idx for item in pending})
+            logger.error(f"Failed to embed chunks of rows {rows[0]}..{rows[-1]}: {e}")
+            raise
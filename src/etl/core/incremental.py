@@ -0,0 +1,210 @@
+import datetime
+import decimal
+import json
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Column, MetaData, String, Table, Text, delete, select
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+INCREMENTAL_MODES = ("none", "watermark", "hash")
+HASH_TABLE = "etl_source_hashes"
+WATERMARK_TABLE = "etl_watermarks"
+
+# Разделитель колонок при хешировании (concat_ws пропускает NULL-колонки)
+HASH_SEPARATOR = "\x1f"
+# Диалекты с md5() и concat_ws() — хеш режима hash считается в SQL источника
+HASH_DIALECTS = ("postgresql",)
+# Хеш строки, посчитанный БД в запросе извлечения, — под этим именем в строках батча
+HASH_RESULT_COLUMN = "etl_content_hash"
+
+
+def dump_watermark(value: Any) -> str:
+    """JSON с типом значения: отметки и ключи чекпоинтов (datetime, UUID, Decimal) восстанавливаются без потерь."""
+    if isinstance(value, datetime.datetime):
+        return json.dumps({"type": "datetime", "value": value.isoformat()})
+    if isinstance(value, datetime.date):
+        return json.dumps({"type": "date", "value": value.isoformat()})
+    if isinstance(value, uuid.UUID):
+        return json.dumps({"type": "uuid", "value": str(value)})
+    if isinstance(value, decimal.Decimal):
+        return json.dumps({"type": "decimal", "value": str(value)})
+    return json.dumps({"type": "value", "value": value})
+
+
+def load_watermark(raw: str) -> Any:
+    data = json.loads(raw)
+    if data["type"] == "datetime":
+        return datetime.datetime.fromisoformat(data["value"])
+    if data["type"] == "date":
+        return datetime.date.fromisoformat(data["value"])
+    if data["type"] == "uuid":
+        return uuid.UUID(data["value"])
+    if data["type"] == "decimal":
+        return decimal.Decimal(data["value"])
+    return data["value"]
+
+
+@dataclass
+class RowFilter:
+    """Фрагменты SQL для извлечения только новых/изменённых строк (источник под алиасом src)."""
+    join: str = ""
+    where: str = ""
+    # Дополнительные выражения SELECT (с алиасами)
+    select: str = ""
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+class IncrementalState:
+    """
+    Состояние инкрементального режима задания в БД источника:
+      "watermark" — обрабатываются строки с updated_at_column > сохранённой отметки,
+                    отметка (максимум по прогону) сохраняется после успешного завершения;
+      "hash"      — обрабатываются строки, у которых md5 колонок (в текстовом виде БД) отличается
+                    от сохранённого в etl_source_hashes (хеш пишется после загрузки батча).
+                    Хеш считает только БД — в фильтре и в выборке, — поэтому сохранённое значение
+                    совпадает с тем, с чем сравнивается, для колонок любого типа.
+    В обоих режимах фильтр выполняется в SQL экстрактора, неизменённые строки не читаются.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        job_id: str,
+        mode: str,
+        key_column: str,
+        updated_at_column: Optional[str] = None,
+        hash_columns: Optional[List[str]] = None,
+        commit_watermark: bool = True,
+    ):
+        """
+        commit_watermark=False — finish() не сохраняет отметку: процессы-шарды отдают max_seen
+        родителю, который сохраняет общий максимум, когда успешно завершились все шарды.
+        """
+        if mode not in INCREMENTAL_MODES or mode == "none":
+            raise ValueError(f"Unsupported incremental mode '{mode}', expected 'watermark' or 'hash'")
+        if mode == "watermark" and not updated_at_column:
+            raise ValueError("Watermark mode requires updated_at_column")
+        if mode == "hash" and not hash_columns:
+            raise ValueError("Hash mode requires hash_columns")
+        if mode == "hash" and engine.dialect.name not in HASH_DIALECTS:
+            raise ValueError(
+                f"Hash mode computes md5/concat_ws in the source query and is supported only on "
+                f"{', '.join(HASH_DIALECTS)}, not '{engine.dialect.name}'; use watermark mode instead"
+            )
+        self.engine = engine
+        self.job_id = job_id
+        self.mode = mode
+        self.key_column = key_column
+        self.updated_at_column = updated_at_column
+        self.hash_columns = hash_columns or []
+        self.commit_watermark = commit_watermark
+        self._max_seen: Any = None
+        self._lock = threading.Lock()
+
+        metadata = MetaData()
+        self.hash_table = Table(
+            HASH_TABLE,
+            metadata,
+            Column("job_id", String(255), primary_key=True),
+            Column("source_id", String(255), primary_key=True),
+            Column("content_hash", String(32), nullable=False),
+        )
+        self.watermark_table = Table(
+            WATERMARK_TABLE,
+            metadata,
+            Column("job_id", String(255), primary_key=True),
+            Column("watermark", Text, nullable=False),
+        )
+        metadata.create_all(engine, tables=[self.hash_table if mode == "hash" else self.watermark_table])
+        self.watermark = self._read_watermark() if mode == "watermark" else None
+        logger.info(
+            f"Incremental mode '{mode}' for job '{job_id}'"
+            + (f", watermark {self.updated_at_column} > {self.watermark!r}" if mode == "watermark" else "")
+        )
+
+    def required_columns(self) -> List[str]:
+        """Колонки, которые должны быть в выборке для отметки (хеш режима hash считается в SQL)."""
+        return [self.updated_at_column] if self.mode == "watermark" else []
+
+    def extract_columns(self, columns: Optional[List[str]]) -> Optional[List[str]]:
+        if not columns:
+            return columns
+        return list(dict.fromkeys([*columns, *self.required_columns()]))
+
+    def source_ids(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """source_id строк батча в том виде, в каком они записаны в метаданные чанков."""
+        return [str(row[self.key_column]) for row in rows]
+
+    def _read_watermark(self) -> Any:
+        with self.engine.connect() as conn:
+            raw = conn.execute(
+                select(self.watermark_table.c.watermark).where(self.watermark_table.c.job_id == self.job_id)
+            ).scalar()
+        return load_watermark(raw) if raw is not None else None
+
+    def row_filter(self) -> Optional[RowFilter]:
+        """Фильтр извлечения; None — фильтровать нечего (первый прогон в режиме watermark)."""
+        if self.mode == "watermark":
+            if self.watermark is None:
+                return None
+            return RowFilter(
+                where=f"src.{self.updated_at_column} > :incremental_watermark",
+                params={"incremental_watermark": self.watermark},
+            )
+        hashed = ", ".join(f"CAST(src.{column} AS TEXT)" for column in self.hash_columns)
+        content_hash = f"md5(concat_ws(CAST(:incremental_sep AS VARCHAR(1)), {hashed}))"
+        return RowFilter(
+            join=(
+                f"LEFT JOIN {HASH_TABLE} h ON h.job_id = :incremental_job "
+                f"AND h.source_id = CAST(src.{self.key_column} AS VARCHAR(255))"
+            ),
+            where=f"(h.content_hash IS NULL OR h.content_hash <> {content_hash})",
+            select=f"{content_hash} AS {HASH_RESULT_COLUMN}",
+            params={"incremental_job": self.job_id, "incremental_sep": HASH_SEPARATOR},
+        )
+
+    def batch_loaded(self, rows: List[Dict[str, Any]]) -> None:
+        """Батч полностью загружен: запоминает хеши строк или продвигает максимум updated_at."""
+        if self.mode == "watermark":
+            values = [row[self.updated_at_column] for row in rows if row.get(self.updated_at_column) is not None]
+            self.observe_watermark(max(values, default=None))
+            return
+
+        hashes = {str(row[self.key_column]): row[HASH_RESULT_COLUMN] for row in rows}
+        table = self.hash_table
+        with self.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.job_id == self.job_id, table.c.source_id.in_(list(hashes))))
+            conn.execute(
+                table.insert(),
+                [{"job_id": self.job_id, "source_id": key, "content_hash": value} for key, value in hashes.items()],
+            )
+
+    @property
+    def max_seen(self) -> Any:
+        """Максимум updated_at_column по загруженным в этом прогоне строкам."""
+        return self._max_seen
+
+    def observe_watermark(self, value: Any) -> None:
+        if value is None:
+            return
+        with self._lock:
+            if self._max_seen is None or value > self._max_seen:
+                self._max_seen = value
+
+    def finish(self) -> None:
+        """Прогон успешно завершён: сохраняет новую отметку режима watermark."""
+        if self.mode != "watermark" or self._max_seen is None or not self.commit_watermark:
+            return
+        if self.watermark is not None and self._max_seen <= self.watermark:
+            return
+        table = self.watermark_table
+        with self.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.job_id == self.job_id))
+            conn.execute(table.insert().values(job_id=self.job_id, watermark=dump_watermark(self._max_seen)))
+        logger.info(f"Watermark of job '{self.job_id}' advanced to {self._max_seen!r}")
+        self.watermark = self._max_seen
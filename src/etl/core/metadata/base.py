@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional
 
 class BaseMetadata(ABC):
     @abstractmethod
@@ -8,7 +8,24 @@ class BaseMetadata(ABC):
         row_data: Dict[str, Any],
         chunk_index: int,
         total_chunks: int,
-        source_id: Optional[str] = None
+        source_id: Optional[str] = None,
+        chunk_text: Optional[str] = None,
     ) -> Dict[str, Any]:
         return NotImplementedError
-    
\ No newline at end of file
+
+    def build_for_row(
+        self,
+        row_data: Dict[str, Any],
+        n_chunks: int,
+        source_id: Optional[str] = None,
+        chunk_indices: Optional[Iterable[int]] = None,
+        chunk_texts: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Метаданные для чанков одной строки. chunk_indices — индексы чанков,
+        для которых нужны метаданные (по умолчанию все n_chunks);
+        chunk_texts — их тексты в том же порядке (нужны для детерминированных chunk_id).
+        """
+        indices = list(range(n_chunks) if chunk_indices is None else chunk_indices)
+        texts = chunk_texts if chunk_texts is not None else [None] * len(indices)
+        return [self.build(row_data, idx, n_chunks, source_id, text) for idx, text in zip(indices, texts)]
@@ -1,11 +1,30 @@
 import logging
 from .base import BaseMetadata
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List
 from pydantic import BaseModel, Field, model_validator, ValidationInfo
-from uuid import uuid4
+from uuid import NAMESPACE_URL, UUID, uuid4, uuid5
 
 logger = logging.getLogger(__name__)
 
+CHUNK_ID_MODES = ("random", "deterministic")
+_CHUNK_ID_NAMESPACE = uuid5(NAMESPACE_URL, "vectordb/chunk")
+
+
+def deterministic_chunk_id(
+    source_id: Optional[str],
+    chunk_index: int,
+    model_name: Optional[str],
+    chunk_text: str,
+) -> str:
+    """UUIDv5 из source_id, индекса чанка, имени модели и текста: одинаковый чанк → одинаковый id при перезапуске."""
+    name = "\x1f".join((str(source_id), str(chunk_index), model_name or "", chunk_text))
+    return str(uuid5(_CHUNK_ID_NAMESPACE, name))
+
+
+def chunk_id_to_int64(chunk_id: str) -> int:
+    """Неотрицательный int64 из chunk_id — id вектора в FAISS IndexIDMap."""
+    return UUID(chunk_id).int >> 65
+
 class MetadataModel(BaseModel):
     """
     Модель метаданных для одного чанка текста.
@@ -33,25 +52,47 @@ class MetadataBuilder(BaseMetadata):
     def __init__(
             self, 
             field_mapping: Optional[Dict[str, str]] = None,
-            include_system_fields: bool = True
+            include_system_fields: bool = True,
+            strict: bool = False,
+            chunk_id_mode: str = "random",
+            model_name: Optional[str] = None,
              ):
+        """
+        strict=True — build_for_row валидирует каждый чанк через MetadataModel (для тестов);
+        иначе инварианты строки проверяются один раз, а словари чанков собираются напрямую.
+        chunk_id_mode="deterministic" — chunk_id выводится из source_id, индекса, model_name и текста чанка.
+        """
+        if chunk_id_mode not in CHUNK_ID_MODES:
+            raise ValueError(f"Unsupported chunk_id_mode '{chunk_id_mode}', expected one of {CHUNK_ID_MODES}")
         self.field_mapping = field_mapping or {}
         self.include_system_fields = include_system_fields
+        self.strict = strict
+        self.chunk_id_mode = chunk_id_mode
+        self.model_name = model_name
         logger.debug("MetadataBuilder initialized")
     
     def _map_fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
         return {self.field_mapping.get(k, k): v for k, v in data.items()}
 
+    def _chunk_id(self, source_id: Optional[str], chunk_index: int, chunk_text: Optional[str]) -> str:
+        if self.chunk_id_mode == "random":
+            return str(uuid4())
+        if chunk_text is None:
+            raise ValueError("chunk_text is required for deterministic chunk_id")
+        return deterministic_chunk_id(source_id, chunk_index, self.model_name, chunk_text)
+
     def build(
         self,
         row_data: Dict[str, Any],
         chunk_index: int,
         total_chunks: int,
         source_id: Optional[str] = None,
+        chunk_text: Optional[str] = None,
     ) -> Dict[str, Any]:
         mapped = self._map_fields(row_data)
 
         metadata = MetadataModel(
+            chunk_id=self._chunk_id(source_id, chunk_index, chunk_text),
             chunk_index=chunk_index,
             total_chunks=total_chunks,
             source_id=source_id,
@@ -59,3 +100,38 @@ class MetadataBuilder(BaseMetadata):
         )
         logger.debug(f"Built metadata for chunk {chunk_index}/{total_chunks}")
         return metadata.model_dump()
+
+    def build_for_row(
+        self,
+        row_data: Dict[str, Any],
+        n_chunks: int,
+        source_id: Optional[str] = None,
+        chunk_indices: Optional[Iterable[int]] = None,
+        chunk_texts: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        indices = range(n_chunks) if chunk_indices is None else list(chunk_indices)
+        if self.strict:
+            return super().build_for_row(row_data, n_chunks, source_id, indices, chunk_texts)
+
+        if not isinstance(n_chunks, int) or n_chunks <= 0:
+            raise ValueError(f"total_chunks must be a positive integer, got {n_chunks!r}")
+        if indices and (min(indices) < 0 or max(indices) >= n_chunks):
+            raise ValueError(f"chunk indices must be in [0, {n_chunks}), got {min(indices)}..{max(indices)}")
+
+        if chunk_texts is not None and len(chunk_texts) != len(indices):
+            raise ValueError(f"Got {len(chunk_texts)} chunk texts for {len(indices)} chunk indices")
+        texts = chunk_texts if chunk_texts is not None else [None] * len(indices)
+
+        mapped = self._map_fields(row_data)
+        metadata = [
+            {
+                "chunk_id": self._chunk_id(source_id, idx, text),
+                "chunk_index": idx,
+                "total_chunks": n_chunks,
+                "source_id": source_id,
+                "data": dict(mapped),
+            }
+            for idx, text in zip(indices, texts)
+        ]
+        logger.debug(f"Built metadata for {len(metadata)} chunks of {n_chunks}")
+        return metadata
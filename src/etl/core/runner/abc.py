@@ -1,10 +1,16 @@
 from abc import ABC, abstractmethod
 from typing import Optional
+import logging
 from etl.config import ETLSettings
+from etl.core.checkpoint import BaseCheckpointStore
+
+logger = logging.getLogger(__name__)
 
 class IETLRunner(ABC):
-    def __init__(self, settings: ETLSettings):
+    def __init__(self, settings: ETLSettings, restart: bool = False):
         self.settings = settings
+        # restart=True — сохранённый чекпоинт задания сбрасывается, прогон начинается с начала таблицы
+        self.restart = restart
         self._status: str = "initialized"  # Например: "initialized", "running", "completed", "failed", "shutdown"
 
     @property
@@ -30,6 +36,22 @@ class IETLRunner(ABC):
         """
         pass
 
+    def prepare_checkpoint_store(self, factory) -> Optional[BaseCheckpointStore]:
+        """Хранилище чекпоинтов из настроек; при restart чекпоинт задания удаляется."""
+        store = factory.create_checkpoint_store()
+        if store is None:
+            return None
+        job_id = factory.get_checkpoint_job_id()
+        if self.restart:
+            store.clear(job_id)
+            logger.info(f"Checkpoint of job '{job_id}' cleared, starting from the beginning")
+        if self.settings.chunk_id_mode != "deterministic":
+            logger.info(
+                "Checkpointing with random chunk ids: the batch in flight at a crash may be loaded twice "
+                "on resume; CHUNK_ID_MODE=deterministic makes the replay a no-op"
+            )
+        return store
+
     @abstractmethod
     async def shutdown(self) -> None:
         """
@@ -1,13 +1,14 @@
 import logging
 from etl.core.runner.abc import IETLRunner
+from shared.embedding.registry import release_embedder
 from etl.factory.async_factory import AsyncComponentFactory
 from etl.schema.async_schema_manager import AsyncSchemaManager
 from etl.core.async_vector_db import AsyncVectorDB
 logger = logging.getLogger(__name__)
 
 class AsyncETLRunner(IETLRunner):
-    def __init__(self, settings):
-        super().__init__(settings)
+    def __init__(self, settings, restart: bool = False):
+        super().__init__(settings, restart=restart)
         self.factory = None
         self.connector = None
         self.embedder = None
@@ -48,6 +49,11 @@ class AsyncETLRunner(IETLRunner):
             transformer=self.transformer,
             loader=self.loader,
             batch_size=self.settings.batch_size,
+            load_concurrency=self.settings.load_concurrency,
+            queue_depth=self.settings.pipeline_queue_depth,
+            checkpoint_store=self.prepare_checkpoint_store(self.factory),
+            job_id=self.factory.get_checkpoint_job_id(),
+            incremental=self.factory.create_incremental_state(),
         )
         logger.info("AsyncETLRunner initialized successfully.")
 
@@ -74,4 +80,8 @@ class AsyncETLRunner(IETLRunner):
         """Завершение работы (опционально закрытие соединений)."""
         if self.connector:
             await self.connector.close()
+        if self.transformer is not None:
+            self.transformer.close()
+        if self.embedder is not None:
+            release_embedder(self.embedder)
         logger.info("AsyncETLRunner shut down.")
\ No newline at end of file
@@ -0,0 +1,350 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import queue
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import faiss
+from etl.config import ETLSettings
+from etl.core.checkpoint import BaseCheckpointStore, Checkpoint, ReportingCheckpointStore
+from etl.core.etl.extractors.sql_extractor import SQLExtractor
+from etl.core.etl.loaders.faiss_loader import read_metadata
+from etl.core.incremental import IncrementalState, dump_watermark, load_watermark
+from etl.core.runner.abc import IETLRunner
+from etl.core.runner.sync_runner import SyncETLRunner
+from etl.factory.sync_factory import SyncComponentFactory
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ShardSpec:
+    """Шард исходной таблицы: диапазон ключа (after_key, until_key] и своё задание чекпоинтов."""
+    index: int
+    count: int
+    after_key: Any
+    until_key: Any
+    job_id: str
+
+    @property
+    def name(self) -> str:
+        return f"shard {self.index + 1}/{self.count}"
+
+
+@dataclass
+class ShardEvent:
+    """Сообщение процесса-шарда родителю: "progress", "done" или "failed"."""
+    shard: int
+    kind: str
+    batches: int = 0
+    rows: int = 0
+    watermark: Any = None
+    error: Optional[str] = None
+
+
+def shard_settings(settings: ETLSettings, shard: ShardSpec) -> ETLSettings:
+    """Настройки процесса-шарда: свой файл чекпоинтов и (для FAISS) свой индекс, который потом сливается."""
+    update: Dict[str, Any] = {
+        "shard_count": 1,
+        "checkpoint_path": f"{settings.checkpoint_path}.shard{shard.index}",
+    }
+    if settings.faiss_index_path and settings.faiss_metadata_path:
+        update["faiss_index_path"] = f"{settings.faiss_index_path}.shard{shard.index}"
+        update["faiss_metadata_path"] = f"{settings.faiss_metadata_path}.shard{shard.index}"
+    return settings.model_copy(update=update)
+
+
+class _ShardComponentFactory(SyncComponentFactory):
+    def __init__(self, settings: ETLSettings, shard: ShardSpec, table_job_id: str, events):
+        super().__init__(settings)
+        self.shard = shard
+        self.table_job_id = table_job_id
+        self.events = events
+
+    def get_checkpoint_job_id(self) -> str:
+        return self.shard.job_id
+
+    def create_checkpoint_store(self) -> Optional[BaseCheckpointStore]:
+        # Каждый сохранённый чекпоинт шарда — отчёт о прогрессе родителю
+        return ReportingCheckpointStore(super().create_checkpoint_store(), self._report_progress)
+
+    def _report_progress(self, job_id: str, checkpoint: Checkpoint) -> None:
+        self.events.put(ShardEvent(self.shard.index, "progress", checkpoint.batches, checkpoint.rows))
+
+    def create_incremental_state(
+        self,
+        job_id: Optional[str] = None,
+        commit_watermark: bool = True,
+    ) -> Optional[IncrementalState]:
+        # Хеши строк — общие для таблицы (шарды не пересекаются), отметку сохраняет родитель
+        return super().create_incremental_state(job_id=self.table_job_id, commit_watermark=False)
+
+
+class _ShardWorkerRunner(SyncETLRunner):
+    def __init__(
+        self,
+        settings: ETLSettings,
+        shard: ShardSpec,
+        table_job_id: str,
+        events,
+        schema_lock,
+        restart: bool,
+    ):
+        super().__init__(settings, restart=restart, key_range=(shard.after_key, shard.until_key))
+        self.shard = shard
+        self.table_job_id = table_job_id
+        self.events = events
+        self.schema_lock = schema_lock
+
+    def create_factory(self) -> SyncComponentFactory:
+        return _ShardComponentFactory(self.settings, self.shard, self.table_job_id, self.events)
+
+    def initialize_schema(self) -> None:
+        # Одновременные CREATE EXTENSION / CREATE TABLE из нескольких процессов конфликтуют в PostgreSQL
+        with self.schema_lock:
+            super().initialize_schema()
+
+
+def _limit_torch_threads(settings: ETLSettings, shards: int) -> None:
+    """Ядра делятся между процессами-шардами (пул эмбеддинга задаёт потоки своих воркеров сам)."""
+    if settings.embedding_workers > 0:
+        return
+    import torch
+
+    torch.set_num_threads(settings.embedding_threads_per_worker or max(1, (os.cpu_count() or 1) // shards))
+
+
+def run_shard(settings: ETLSettings, shard: ShardSpec, table_job_id: str, restart: bool, events, schema_lock) -> None:
+    """Точка входа процесса-шарда: свои коннектор, эмбеддер и конвейер на диапазоне ключа."""
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    if not root_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(f"[%(asctime)s] [%(levelname)s] [{shard.name}] %(name)s: %(message)s"))
+        root_logger.addHandler(handler)
+
+    async def execute(runner: SyncETLRunner) -> None:
+        try:
+            await runner.run()
+        finally:
+            await runner.shutdown()
+
+    try:
+        _limit_torch_threads(settings, shard.count)
+        runner = _ShardWorkerRunner(shard_settings(settings, shard), shard, table_job_id, events, schema_lock, restart)
+        asyncio.run(execute(runner))
+        incremental = runner.vdb.incremental
+        events.put(ShardEvent(shard.index, "done", watermark=incremental.max_seen if incremental else None))
+    except BaseException:
+        events.put(ShardEvent(shard.index, "failed", error=traceback.format_exc()))
+        raise SystemExit(1)
+
+
+class ShardedETLRunner(IETLRunner):
+    """
+    Таблица делится на shard_count непересекающихся диапазонов ключа source_id с примерно равным
+    числом строк; каждый шард обрабатывается отдельным процессом (spawn) со своими коннектором,
+    эмбеддером и чекпоинтом. Родитель сводит прогресс и ошибки шардов; для FAISS шарды пишут
+    свои индексы, которые в конце сливаются в целевой.
+    План (границы шардов и завершённые шарды) хранится в чекпоинте задания: повторный запуск
+    после сбоя доделывает только незавершённые шарды.
+    """
+
+    # Точка входа процесса-шарда (модульная функция — передаётся в spawn)
+    worker_target = staticmethod(run_shard)
+
+    def __init__(self, settings: ETLSettings, restart: bool = False):
+        super().__init__(settings, restart=restart)
+        self.factory = SyncComponentFactory(settings)
+        self.job_id = self.factory.get_checkpoint_job_id()
+        self.store: Optional[BaseCheckpointStore] = None
+        self.incremental: Optional[IncrementalState] = None
+        self.shards: Optional[List[ShardSpec]] = None
+        self.boundaries: List[Any] = []
+        self.done: Dict[int, Any] = {}
+        self.progress: Dict[int, ShardEvent] = {}
+        self._processes: Dict[int, mp.Process] = {}
+
+    async def initialize(self) -> None:
+        """План шардов и общие таблицы состояния создаются в родителе до запуска процессов."""
+        logger.info(f"Initializing ShardedETLRunner ({self.settings.shard_count} shards)...")
+        self.store = self.prepare_checkpoint_store(self.factory)
+        self.incremental = self.factory.create_incremental_state()
+        self.shards = self._plan_shards()
+        for shard in self.shards:
+            logger.info(f"  {shard.name}: {self.settings.source_id} in ({shard.after_key!r}, {shard.until_key!r}]")
+
+    def _plan_shards(self) -> List[ShardSpec]:
+        requested = self.settings.shard_count
+        saved = self.store.load(self.job_id) if self.store is not None else None
+        if saved is not None and isinstance(saved.last_key, dict) and saved.last_key.get("shards") == requested:
+            boundaries = [load_watermark(raw) for raw in saved.last_key["boundaries"]]
+            self.done = {
+                int(index): load_watermark(raw) if raw is not None else None
+                for index, raw in saved.last_key["done"].items()
+            }
+            logger.info(f"Resuming sharded job '{self.job_id}', shards already done: {sorted(self.done)}")
+        else:
+            connector = self.factory.create_connector()
+            try:
+                boundaries = SQLExtractor(connector).key_boundaries(
+                    self.settings.extract_table_name, self.settings.source_id, requested
+                )
+            finally:
+                connector.close()
+            # Новый план — шардовые FAISS-индексы прошлых прогонов не переиспользуются
+            for index in range(requested):
+                self._remove_shard_outputs(index)
+            self.done = {}
+
+        self.boundaries = boundaries
+        edges = [None, *boundaries, None]
+        count = len(edges) - 1
+        shards = [
+            ShardSpec(index, count, edges[index], edges[index + 1], f"{self.job_id}#shard{index + 1}of{count}")
+            for index in range(count)
+        ]
+        self._save_plan()
+        return shards
+
+    def _save_plan(self) -> None:
+        if self.store is None:
+            return
+        plan = {
+            "shards": self.settings.shard_count,
+            "boundaries": [dump_watermark(value) for value in self.boundaries],
+            "done": {
+                str(index): dump_watermark(value) if value is not None else None
+                for index, value in self.done.items()
+            },
+        }
+        self.store.save(self.job_id, Checkpoint(last_key=plan, batches=len(self.done)))
+
+    def _shard_faiss_paths(self, index: int) -> Optional[Tuple[Path, Path]]:
+        if not (self.settings.faiss_index_path and self.settings.faiss_metadata_path):
+            return None
+        return (
+            Path(f"{self.settings.faiss_index_path}.shard{index}"),
+            Path(f"{self.settings.faiss_metadata_path}.shard{index}"),
+        )
+
+    def _remove_shard_outputs(self, index: int) -> None:
+        paths = self._shard_faiss_paths(index)
+        for path in paths or ():
+            if path.exists():
+                path.unlink()
+
+    async def run(self) -> None:
+        if self.shards is None:
+            await self.initialize()
+
+        pending = [shard for shard in self.shards if shard.index not in self.done]
+        logger.info(
+            f"Begin sharded ETL: '{self.settings.extract_table_name}', "
+            f"{len(pending)} of {len(self.shards)} shards to run"
+        )
+        context = mp.get_context("spawn")
+        events = context.Queue()
+        schema_lock = context.Lock()
+        for shard in pending:
+            process = context.Process(
+                target=self.worker_target,
+                args=(self.settings, shard, self.job_id, self.restart, events, schema_lock),
+                name=f"etl-shard-{shard.index + 1}",
+            )
+            process.start()
+            self._processes[shard.index] = process
+
+        failures = self._monitor(events)
+        if failures:
+            for index, error in sorted(failures.items()):
+                logger.error(f"{self.shards[index].name} failed:\n{error}")
+            raise RuntimeError(
+                f"{len(failures)} of {len(self.shards)} shards failed "
+                f"({', '.join(self.shards[index].name for index in sorted(failures))}); "
+                f"completed shards are kept, rerun to process the rest"
+            )
+
+        self._merge_faiss_shards()
+        if self.incremental is not None:
+            for watermark in self.done.values():
+                self.incremental.observe_watermark(watermark)
+            self.incremental.finish()
+        if self.store is not None:
+            self.store.clear(self.job_id)
+        logger.info(f"Sharded ETL-pipeline complete: {self._total_rows()} rows in {len(self.shards)} shards.")
+
+    def _monitor(self, events) -> Dict[int, str]:
+        """Собирает события шардов до завершения всех процессов; возвращает ошибки по шардам."""
+        failures: Dict[int, str] = {}
+        running = dict(self._processes)
+        while running:
+            try:
+                self._handle_event(events.get(timeout=1.0), failures)
+            except queue.Empty:
+                pass
+            for index, process in list(running.items()):
+                if not process.is_alive():
+                    process.join()
+                    del running[index]
+        # События, отправленные процессами непосредственно перед выходом
+        while True:
+            try:
+                self._handle_event(events.get(timeout=0.1), failures)
+            except queue.Empty:
+                break
+        for index, process in self._processes.items():
+            if index not in self.done and index not in failures:
+                failures[index] = f"process exited with code {process.exitcode} without reporting a result"
+        self._processes.clear()
+        return failures
+
+    def _handle_event(self, event: ShardEvent, failures: Dict[int, str]) -> None:
+        shard = self.shards[event.shard]
+        if event.kind == "progress":
+            self.progress[event.shard] = event
+            logger.info(
+                f"[{shard.name}] {event.batches} batches, {event.rows} rows | "
+                f"total {self._total_rows()} rows, {len(self.done)}/{len(self.shards)} shards done"
+            )
+        elif event.kind == "done":
+            self.done[event.shard] = event.watermark
+            self._save_plan()
+            logger.info(f"[{shard.name}] completed, {len(self.done)}/{len(self.shards)} shards done")
+        elif event.kind == "failed":
+            failures[event.shard] = event.error or "unknown error"
+
+    def _total_rows(self) -> int:
+        return sum(event.rows for event in self.progress.values())
+
+    def _merge_faiss_shards(self) -> None:
+        """Сливает индексы шардов в целевой по порядку шардов; слитый шард удаляется."""
+        target = None
+        for shard in self.shards:
+            paths = self._shard_faiss_paths(shard.index)
+            if paths is None:
+                return
+            index_path, metadata_path = paths
+            if not index_path.exists():
+                continue
+            index = faiss.read_index(str(index_path))
+            metadata = read_metadata(metadata_path) if metadata_path.exists() else []
+            if target is None:
+                target = self.factory.create_faiss_loader(
+                    self.settings.faiss_index_path, self.settings.faiss_metadata_path, index.d
+                )
+            target.merge_from(index, metadata, replace_sources=self.settings.incremental_mode != "none")
+            self._remove_shard_outputs(shard.index)
+            logger.info(f"[{shard.name}] FAISS index merged into {self.settings.faiss_index_path}")
+
+    async def shutdown(self) -> None:
+        """Прерванный запуск (Ctrl+C и т.п.): процессы-шарды останавливаются, их чекпоинты остаются."""
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        self._processes.clear()
+        logger.info("ShardedETLRunner shut down.")
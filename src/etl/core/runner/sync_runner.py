@@ -1,30 +1,35 @@
 import logging
+from typing import Any, Tuple
 from etl.core.runner.abc import IETLRunner
+from shared.embedding.registry import release_embedder
 from etl.factory.sync_factory import SyncComponentFactory
 from etl.schema.schema_manager import SchemaManager
 from etl.core.vector_db import VectorDB
 logger = logging.getLogger(__name__)
 
 class SyncETLRunner(IETLRunner):
-    def __init__(self, settings):
-        super().__init__(settings)
+    def __init__(self, settings, restart: bool = False, key_range: Tuple[Any, Any] = (None, None)):
+        """key_range — диапазон (after, until] ключа source_id: процесс обрабатывает только свой шард таблицы."""
+        super().__init__(settings, restart=restart)
+        self.key_range = key_range
         self.factory = None
         self.connector = None
+        self.embedder = None
         self.vdb = None
 
     async def initialize(self) -> None:
         """Инициализация компонентов и схемы базы данных (синхронная)."""
         logger.info("Initializing SyncETLRunner components...")
-        self.factory = SyncComponentFactory(self.settings)
+        self.factory = self.create_factory()
 
         self.connector = self.factory.create_connector()
         embedder = self.factory.create_embedder()
+        self.embedder = embedder
         embedding_dim = self.factory.get_embedding_dim(embedder)
         orm_model = self.factory.create_orm_model(embedding_dim)
 
         if not (self.settings.faiss_index_path and self.settings.faiss_metadata_path):
-            schema_manager = SchemaManager(self.connector.engine)
-            schema_manager.initialize()
+            self.initialize_schema()
 
         splitter = self.factory.create_splitter()
         metadata_builder = self.factory.create_metadata_builder()
@@ -42,9 +47,20 @@ class SyncETLRunner(IETLRunner):
             transformer=transformer,
             loader=loader,
             batch_size=self.settings.batch_size,
+            pipelined=self.settings.pipeline_mode,
+            queue_depth=self.settings.pipeline_queue_depth,
+            checkpoint_store=self.prepare_checkpoint_store(self.factory),
+            job_id=self.factory.get_checkpoint_job_id(),
+            incremental=self.factory.create_incremental_state(),
         )
         logger.info("SyncETLRunner initialized successfully.")
 
+    def create_factory(self) -> SyncComponentFactory:
+        return SyncComponentFactory(self.settings)
+
+    def initialize_schema(self) -> None:
+        SchemaManager(self.connector.engine).initialize()
+
     async def run(self) -> None:
         """Запуск синхронного ETL-процесса."""
         if self.vdb is None:
@@ -60,6 +76,8 @@ class SyncETLRunner(IETLRunner):
             text_column=text_column,
             source_id_column=self.settings.source_id,
             columns=columns,
+            after_key=self.key_range[0],
+            until_key=self.key_range[1],
         )
         logger.info("Sync ETL-pipeline complete.")
 
@@ -67,4 +85,8 @@ class SyncETLRunner(IETLRunner):
         """Завершение работы."""
         if self.connector:
             self.connector.close()
+        if self.vdb is not None:
+            self.vdb.transformer.close()
+        if self.embedder is not None:
+            release_embedder(self.embedder)
         logger.info("SyncETLRunner shut down.")
\ No newline at end of file
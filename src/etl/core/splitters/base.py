@@ -1,5 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import List
+from dataclasses import dataclass
+from typing import Any, List, Optional
+import numpy as np
+
+
+@dataclass
+class Chunk:
+    """
+    Чанк документа. sentence_embeddings — эмбеддинги его предложений (k, dim),
+    если сплиттер уже посчитал их при разбиении; иначе None.
+    """
+    text: str
+    sentence_embeddings: Optional[np.ndarray] = None
+
 
 class BaseSplitter(ABC):
     @abstractmethod
@@ -8,4 +21,30 @@ class BaseSplitter(ABC):
 
     @abstractmethod
     def normalize_text(self, text:str) -> str:
-        pass
\ No newline at end of file
+        pass
+
+    def split_many(self, texts: List[str]) -> List[List[str]]:
+        """
+        Разбивает несколько документов за один вызов.
+        Наследники переопределяют, если могут обработать батч эффективнее.
+        """
+        return [self.split(text) for text in texts]
+
+    def split_chunks(self, texts: List[str]) -> List[List[Chunk]]:
+        """Как split_many, но возвращает Chunk с уже посчитанными эмбеддингами предложений, если они есть."""
+        return [[Chunk(text=chunk) for chunk in chunks] for chunks in self.split_many(texts)]
+
+    def preparer(self) -> "BaseSplitter":
+        """
+        Объект без модели, чей prepare() можно выполнять в процессах-воркерах
+        (должен пиклиться). По умолчанию — сам сплиттер.
+        """
+        return self
+
+    def prepare(self, text: str) -> Any:
+        """CPU-стадия разбиения одного документа (без обращения к модели)."""
+        return self.split(text)
+
+    def finalize(self, prepared: List[Any]) -> List[List[Chunk]]:
+        """Завершает разбиение по результатам prepare() для пачки документов."""
+        return [[Chunk(text=chunk) for chunk in chunks] for chunks in prepared]
@@ -1,8 +1,7 @@
 import logging
-from typing import List, Optional
-from .base import BaseSplitter
+from typing import List, Optional, Tuple
+from .base import BaseSplitter, Chunk
 from shared.embedding.base import BaseEmbedding
-from shared.utils import cosine_similarity
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -15,61 +14,98 @@ class SemanticChunker(BaseSplitter):
         sentence_splitter: Optional[BaseSplitter] = None,
         threshold: float = 0.4,
         min_chunk_size: int = 1,
+        embedding_batch_size: int = 32,
     ):
         self.embedder = embedder
         self.sentence_splitter = sentence_splitter
         self.threshold = threshold
         self.min_chunk_size = min_chunk_size
+        self.embedding_batch_size = embedding_batch_size
         logger.info(f"SemanticChunker initialized with threshold={threshold}")
 
     def normalize_text(self, text: str) -> str:
         return self.sentence_splitter.normalize_text(text)
 
     def split(self, text: str) -> List[str]:
-        text = self.normalize_text(text)
-        if not text.strip():
-            return []
+        return self.split_many([text])[0]
 
-        sentences = self.sentence_splitter.split(text)
-        if len(sentences) == 0:
-            return [text] if text else []
-        if len(sentences) == 1:
-            return sentences
+    def split_many(self, texts: List[str]) -> List[List[str]]:
+        return [[chunk.text for chunk in chunks] for chunks in self.split_chunks(texts)]
 
+    def split_chunks(self, texts: List[str]) -> List[List[Chunk]]:
+        return self.finalize([self.prepare(text) for text in texts])
+
+    def preparer(self) -> BaseSplitter:
+        # Разбиение на предложения не требует модели и выполняется SentenceSplitter'ом
+        return self.sentence_splitter
+
+    def prepare(self, text: str) -> List[str]:
+        return self.sentence_splitter.split(text)
+
+    def finalize(self, prepared: List[List[str]]) -> List[List[Chunk]]:
+        """
+        Семантическое разбиение пачки документов по их предложениям: предложения
+        всех документов эмбеддятся одним батчевым вызовом, границы ищутся векторно.
+        Каждый Chunk несёт эмбеддинги своих предложений для повторного использования.
+        """
+        results: List[List[Chunk]] = [[] for _ in prepared]
+        documents = []  # (индекс документа, предложения)
+        for doc_idx, sentences in enumerate(prepared):
+            sentences = [sentence for sentence in sentences if sentence]
+            if len(sentences) == 1:
+                # Границ искать не нужно — эмбеддинг посчитает трансформер
+                results[doc_idx] = [Chunk(text=sentences[0])]
+            elif sentences:
+                documents.append((doc_idx, sentences))
+
+        if not documents:
+            return results
+
+        all_sentences = [sentence for _, sentences in documents for sentence in sentences]
         try:
-            embeddings = [self.embedder.embed_text(sent) for sent in sentences]
+            embeddings = np.asarray(
+                self.embedder.embed_texts(all_sentences, batch_size=self.embedding_batch_size)
+            )
         except Exception as e:
             logger.warning(f"Failed to embed sentences: {e}. Falling back to sentence splitting.")
-            return sentences
-
-        distances = []
-        for i in range(1, len(embeddings)):
-            sim = cosine_similarity(embeddings[i - 1], embeddings[i])
-            sim = max(0.0, min(1.0, sim))
-            dist = 1.0 - sim
-            distances.append(dist)
-
-        chunk_boundaries = [0]
-        for i, dist in enumerate(distances):
-            if dist > self.threshold:
-                chunk_boundaries.append(i + 1)
-        chunk_boundaries.append(len(sentences))
-
-        chunks = []
-        for i in range(len(chunk_boundaries) - 1):
-            start = chunk_boundaries[i]
-            end = chunk_boundaries[i + 1]
-            chunk_sentences = sentences[start:end]
-            if len(chunk_sentences) >= self.min_chunk_size:
-                chunk = " ".join(chunk_sentences)
-                chunks.append(chunk.strip())
-            else:
-                if chunks:
-                    chunks[-1] += " " + " ".join(chunk_sentences)
-                else:
-                    chunks.append(" ".join(chunk_sentences))
+            for doc_idx, sentences in documents:
+                results[doc_idx] = [Chunk(text=sentence) for sentence in sentences]
+            return results
+
+        offset = 0
+        for doc_idx, sentences in documents:
+            doc_embeddings = embeddings[offset:offset + len(sentences)]
+            offset += len(sentences)
+            spans = self._group_sentences(len(sentences), self._chunk_boundaries(doc_embeddings))
+            results[doc_idx] = [
+                Chunk(text=" ".join(sentences[start:end]).strip(), sentence_embeddings=doc_embeddings[start:end])
+                for start, end in spans
+            ]
+            logger.debug(
+                f"SemanticChunker: {len(sentences)} sentences → {len(spans)} chunks (threshold={self.threshold})"
+            )
 
         logger.debug(
-            f"SemanticChunker: {len(sentences)} sentences → {len(chunks)} chunks (threshold={self.threshold})"
+            f"SemanticChunker: {len(all_sentences)} sentences in {len(documents)} documents embedded in one call"
         )
-        return chunks
\ No newline at end of file
+        return results
+
+    def _chunk_boundaries(self, embeddings: np.ndarray) -> np.ndarray:
+        """Индексы предложений, с которых начинается новый чанк (косинусное расстояние соседей > threshold)."""
+        embeddings = embeddings.astype(np.float32, copy=False)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-8
+        unit = embeddings / norms
+        similarities = np.clip(np.einsum("ij,ij->i", unit[:-1], unit[1:]), 0.0, 1.0)
+        return np.flatnonzero(1.0 - similarities > self.threshold) + 1
+
+    def _group_sentences(self, n_sentences: int, boundaries: np.ndarray) -> List[Tuple[int, int]]:
+        """Диапазоны предложений [start, end) для чанков; короткие чанки присоединяются к предыдущему."""
+        chunk_boundaries = [0, *boundaries.tolist(), n_sentences]
+
+        spans: List[Tuple[int, int]] = []
+        for start, end in zip(chunk_boundaries[:-1], chunk_boundaries[1:]):
+            if end - start < self.min_chunk_size and spans:
+                spans[-1] = (spans[-1][0], end)
+            else:
+                spans.append((start, end))
+        return spans
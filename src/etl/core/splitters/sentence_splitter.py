@@ -1,11 +1,14 @@
 import re
 import logging
-from itertools import zip_longest
-from typing import List
+from typing import Iterator, List, Tuple
 from .base import BaseSplitter
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE = re.compile(r'\s+')
+_SENTENCE_END = re.compile(r'([.!?]["»”\']?)\s+')
+
+
 class SentenceSplitter(BaseSplitter):
     def __init__(self, abbreviations: List[str] | None = None):
         self.abbreviations = abbreviations or [
@@ -16,34 +19,36 @@ class SentenceSplitter(BaseSplitter):
             r'\b(?:' + '|'.join(map(re.escape, self.abbreviations)) + r')\.$',
             re.IGNORECASE
         )
+        # Сокращение ищется только в хвосте предложения такой длины
+        self._abbr_window = max(map(len, self.abbreviations), default=0) + 1
         logger.debug("SentenceSplitter initialized")
 
     def normalize_text(self, text: str) -> str:
-        text = text.replace("\n", " ").replace("\r", " ")
-        text = re.sub(r'\s+', ' ', text)
-        text = text.replace("…", ".")
-        return text.strip()
+        return _WHITESPACE.sub(' ', text).replace("…", ".").strip()
+
+    def iter_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        Один линейный проход по уже нормализованному тексту: отдаёт границы
+        предложений (start, end). Точка после сокращения не завершает предложение.
+        """
+        start = 0
+        for match in _SENTENCE_END.finditer(text):
+            end = match.end(1)
+            window_start = max(start, end - self._abbr_window)
+            if self.abbr_regex.search(text, window_start, end):
+                continue
+            yield start, end
+            start = match.end()
+        yield start, len(text)
+
+    def split_spans(self, text: str) -> Tuple[str, List[Tuple[int, int]]]:
+        """Нормализованный текст и границы его предложений — без копирования строк."""
+        text = self.normalize_text(text)
+        return text, list(self.iter_spans(text))
 
     def split(self, text: str) -> List[str]:
         original_len = len(text)
-        text = self.normalize_text(text)
-        parts = re.split(r'([.!?]["»”\']?\s+)', text)
-        if not parts:
-            return []
-
-        sentences = []
-        buffer: list[str] = []
-
-        for text_chunk, separator in zip_longest(parts[::2], parts[1::2], fillvalue=''):
-            buffer.append(text_chunk)
-            buffer.append(separator)
-
-            current_sentence = ''.join(buffer).strip()
-
-            if not self.abbr_regex.search(current_sentence):
-                sentences.append(current_sentence)
-                buffer.clear()
-        if buffer:
-            sentences.append(''.join(buffer).strip())
+        text, spans = self.split_spans(text)
+        sentences = [text[start:end] for start, end in spans]
         logger.debug(f"Split text (len={original_len}) into {len(sentences)} sentences")
-        return sentences
\ No newline at end of file
+        return sentences
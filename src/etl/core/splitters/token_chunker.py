@@ -0,0 +1,131 @@
+import logging
+from typing import List, Optional, Tuple
+from .base import BaseSplitter
+from .sentence_splitter import SentenceSplitter
+
+logger = logging.getLogger(__name__)
+
+# Некоторые токенизаторы не задают model_max_length и возвращают огромное число
+_UNSET_MAX_LENGTH = 1_000_000
+_FALLBACK_MAX_LENGTH = 512
+
+
+class TokenChunker(BaseSplitter):
+    """
+    Упаковывает предложения в чанки до max_tokens токенов модели.
+    Предложения всех документов токенизируются одним батчевым вызовом fast-токенизатора;
+    предложение длиннее max_tokens режется по offset_mapping, поэтому текст не теряется при truncation.
+    Длина чанка считается как сумма длин предложений — для WordPiece это точно,
+    для BPE/SentencePiece возможна погрешность в единицы токенов.
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        max_tokens: Optional[int] = None,
+        sentence_splitter: Optional[SentenceSplitter] = None,
+    ):
+        if not getattr(tokenizer, "is_fast", False):
+            raise ValueError("TokenChunker requires a fast tokenizer (offset mapping support)")
+        self.tokenizer = tokenizer
+        self.sentence_splitter = sentence_splitter or SentenceSplitter()
+        self.max_tokens = max_tokens or self._default_max_tokens(tokenizer)
+        if self.max_tokens < 1:
+            raise ValueError(f"max_tokens must be >= 1, got {self.max_tokens}")
+        logger.info(f"TokenChunker initialized with max_tokens={self.max_tokens}")
+
+    @staticmethod
+    def _default_max_tokens(tokenizer) -> int:
+        max_length = tokenizer.model_max_length
+        if not max_length or max_length > _UNSET_MAX_LENGTH:
+            max_length = _FALLBACK_MAX_LENGTH
+        return max_length - tokenizer.num_special_tokens_to_add(pair=False)
+
+    def normalize_text(self, text: str) -> str:
+        return self.sentence_splitter.normalize_text(text)
+
+    def split(self, text: str) -> List[str]:
+        return self.split_many([text])[0]
+
+    def split_many(self, texts: List[str]) -> List[List[str]]:
+        documents = []  # (нормализованный текст, границы предложений)
+        sentences = []
+        for text in texts:
+            normalized, spans = self.sentence_splitter.split_spans(text)
+            spans = [(start, end) for start, end in spans if end > start]
+            documents.append((normalized, spans))
+            sentences.extend(normalized[start:end] for start, end in spans)
+
+        if not sentences:
+            return [[] for _ in texts]
+
+        encoded = self.tokenizer(
+            sentences,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        offsets = encoded["offset_mapping"]
+
+        results = []
+        sentence_idx = 0
+        for normalized, spans in documents:
+            doc_offsets = offsets[sentence_idx:sentence_idx + len(spans)]
+            sentence_idx += len(spans)
+            chunk_spans = self._pack(spans, doc_offsets)
+            results.append([normalized[start:end] for start, end in chunk_spans])
+
+        logger.debug(
+            f"TokenChunker: {len(sentences)} sentences in {len(texts)} documents → "
+            f"{sum(len(chunks) for chunks in results)} chunks"
+        )
+        return results
+
+    def _pack(
+        self,
+        spans: List[Tuple[int, int]],
+        offsets: List[List[Tuple[int, int]]],
+    ) -> List[Tuple[int, int]]:
+        """Жадная упаковка предложений в чанки; возвращает символьные границы чанков."""
+        chunks: List[Tuple[int, int]] = []
+        chunk_start: Optional[int] = None
+        chunk_end = 0
+        chunk_tokens = 0
+
+        for (start, end), sentence_offsets in zip(spans, offsets):
+            n_tokens = len(sentence_offsets)
+            if n_tokens > self.max_tokens:
+                if chunk_start is not None:
+                    chunks.append((chunk_start, chunk_end))
+                    chunk_start, chunk_tokens = None, 0
+                chunks.extend(self._split_long_sentence(start, end, sentence_offsets))
+                continue
+
+            if chunk_start is not None and chunk_tokens + n_tokens > self.max_tokens:
+                chunks.append((chunk_start, chunk_end))
+                chunk_start, chunk_tokens = None, 0
+
+            if chunk_start is None:
+                chunk_start = start
+            chunk_end = end
+            chunk_tokens += n_tokens
+
+        if chunk_start is not None:
+            chunks.append((chunk_start, chunk_end))
+        return chunks
+
+    def _split_long_sentence(
+        self,
+        start: int,
+        end: int,
+        offsets: List[Tuple[int, int]],
+    ) -> List[Tuple[int, int]]:
+        """Режет предложение на куски по max_tokens токенов по границам токенов."""
+        pieces = []
+        for i in range(0, len(offsets), self.max_tokens):
+            piece_start = start + offsets[i][0] if i else start
+            last = min(i + self.max_tokens, len(offsets)) - 1
+            piece_end = start + offsets[last][1] if last < len(offsets) - 1 else end
+            pieces.append((piece_start, piece_end))
+        return pieces
@@ -0,0 +1,36 @@
+import threading
+from dataclasses import dataclass, field
+
+
+@dataclass
+class StageStats:
+    """Статистика стадии конвейера: занятое время, число элементов и глубина входной очереди."""
+    name: str
+    busy_seconds: float = 0.0
+    items: int = 0
+    queue_samples: int = 0
+    queue_depth_total: int = 0
+    max_queue_depth: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, seconds: float, items: int = 1) -> None:
+        with self._lock:
+            self.busy_seconds += seconds
+            self.items += items
+
+    def observe_queue(self, depth: int) -> None:
+        with self._lock:
+            self.queue_samples += 1
+            self.queue_depth_total += depth
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    @property
+    def mean_queue_depth(self) -> float:
+        return self.queue_depth_total / self.queue_samples if self.queue_samples else 0.0
+
+    def summary(self, wall_seconds: float) -> str:
+        utilization = self.busy_seconds / wall_seconds if wall_seconds > 0 else 0.0
+        return (
+            f"{self.name}: {self.items} items, busy {self.busy_seconds:.2f}s ({utilization:.0%}), "
+            f"input queue mean {self.mean_queue_depth:.1f} / max {self.max_queue_depth}"
+        )
@@ -1,14 +1,36 @@
 import logging
+import queue
+import threading
+import time
 
-from typing import Optional, List
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, List, Tuple
 from etl.core.etl.extractors.sql_extractor import SQLExtractor
 from etl.core.etl.transformers.transformer import Transformer
 from etl.core.etl.loaders.sql_loader import SQLLoader
 from etl.core.etl.base import BaseExtractor, BaseLoader, BaseTransformer
+from etl.core.checkpoint import BaseCheckpointStore, CheckpointTracker, resume_tracker
+from etl.core.incremental import IncrementalState
+from etl.core.stage_stats import StageStats
 
 
 logger = logging.getLogger(__name__)
 
+# Маркер конца потока в очередях конвейера
+_DONE = object()
+# Период проверки флага остановки при ожидании на очереди
+_POLL_SECONDS = 0.1
+
+
+class _PipelineStopped(Exception):
+    """Другая стадия конвейера завершилась с ошибкой."""
+
+
+class _DeleteSources(NamedTuple):
+    """Задание потоку загрузки: удалить старые чанки изменённых строк до загрузки новых."""
+    source_ids: List[str]
+
+
 class VectorDB:
     def __init__(
         self,
@@ -16,14 +38,31 @@ class VectorDB:
         transformer: BaseTransformer,
         loader: BaseLoader,
         batch_size: int = 100,
+        pipelined: bool = False,
+        queue_depth: int = 2,
+        checkpoint_store: Optional[BaseCheckpointStore] = None,
+        job_id: str = "default",
+        incremental: Optional[IncrementalState] = None,
     ):
         """
         Универсальный VectorDB, поддерживающий любой loader (SQL, FAISS и т.д.).
+        pipelined=True — extract, transform и load идут параллельно: извлечение в фоновом потоке
+        забегает вперёд, загрузка — в своём потоке; стадии связаны очередями глубиной queue_depth.
+        checkpoint_store — после загрузки каждого батча сохраняется ключ его последней строки,
+        прерванный прогон job_id продолжается с него (извлечение по ключу source_id_column).
+        incremental — извлекаются только новые/изменённые строки (фильтр в SQL экстрактора),
+        старые чанки изменённых source_id удаляются перед загрузкой новых.
         """
         self.extractor = extractor
         self.transformer = transformer
         self.loader = loader
         self.batch_size = batch_size
+        self.pipelined = pipelined
+        self.queue_depth = max(1, queue_depth)
+        self.checkpoint_store = checkpoint_store
+        self.job_id = job_id
+        self.incremental = incremental
+        self.last_run_stats: Dict[str, StageStats] = {}
         logger.info("Intialized VectorDB with extractor, transformer, loader")
 
     def transform_table(
@@ -32,25 +71,210 @@ class VectorDB:
         text_column: str,
         source_id_column: Optional[str] = None,
         columns: Optional[List[str]] = None,
+        after_key: Any = None,
+        until_key: Any = None,
     ):
+        """after_key/until_key — диапазон ключа source_id_column (after_key, until_key] для шарда таблицы."""
         if not text_column:
             raise ValueError("text_column is not defined")
         logger.info(f"Starting transform from '{source_table}' using {type(self.loader).__name__}")
 
-        for batch in self.extractor.extract_batches(
+        key_range = (after_key, until_key)
+        tracker = resume_tracker(
+            self.checkpoint_store,
+            self.job_id,
+            source_id_column,
+            always=self.incremental is not None or key_range != (None, None),
+        )
+        batches = self.extractor.extract_batches(
             table_name=source_table,
             batch_size=self.batch_size,
-            columns=columns,
-        ):
-            if not batch:
+            columns=self.incremental.extract_columns(columns) if self.incremental else columns,
+            **self._resume_options(tracker, source_id_column, key_range),
+        )
+        if self.pipelined:
+            self._run_pipelined(batches, text_column, source_id_column, tracker)
+        else:
+            for batch in batches:
+                if not batch:
+                    continue
+                seq = self._begin_batch(tracker, batch, source_id_column)
+                if self.incremental:
+                    self.loader.delete_sources(self.incremental.source_ids(batch))
+                transformed_batches = self.transformer.transform(
+                    batch_rows=batch,
+                    text_column=text_column,
+                    source_id_column=source_id_column,
+                )
+                for transformed_batch in transformed_batches:
+                    if transformed_batch:
+                        self.loader.load(transformed_batch)
+                if tracker:
+                    tracker.seal(seq)
+        if tracker:
+            tracker.finish()
+        if self.incremental:
+            self.incremental.finish()
+
+        logger.info("Transform and load completed")
+
+    def _resume_options(
+        self,
+        tracker: Optional[CheckpointTracker],
+        key_column: Optional[str],
+        key_range: Tuple[Any, Any] = (None, None),
+    ) -> Dict[str, Any]:
+        if tracker is None:
+            return {}
+        after_key, until_key = key_range
+        # Чекпоинт шарда всегда внутри его диапазона
+        if tracker.checkpoint.last_key is not None:
+            after_key = tracker.checkpoint.last_key
+        options = {"key_column": key_column, "after_key": after_key}
+        if until_key is not None:
+            options["until_key"] = until_key
+        if self.incremental:
+            options["row_filter"] = self.incremental.row_filter()
+        return options
+
+    def _begin_batch(
+        self,
+        tracker: Optional[CheckpointTracker],
+        batch: List[Dict[str, Any]],
+        key_column: Optional[str],
+    ) -> Optional[int]:
+        if tracker is None:
+            return None
+        on_loaded = partial(self.incremental.batch_loaded, batch) if self.incremental else None
+        return tracker.begin_batch(batch[-1][key_column], len(batch), on_loaded=on_loaded)
+
+    def _run_pipelined(
+        self,
+        batches: Iterable[List[Dict[str, Any]]],
+        text_column: str,
+        source_id_column: Optional[str],
+        tracker: Optional[CheckpointTracker] = None,
+    ) -> None:
+        """
+        Extract (фоновый поток) → transform (текущий поток, где живёт модель) → load (фоновый поток).
+        Ошибка любой стадии останавливает остальные и пробрасывается из transform_table.
+        """
+        stats = {name: StageStats(name) for name in ("extract", "transform", "load")}
+        self.last_run_stats = stats
+        extracted: "queue.Queue[Any]" = queue.Queue(maxsize=self.queue_depth)
+        transformed: "queue.Queue[Any]" = queue.Queue(maxsize=self.queue_depth)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        def run_stage(body: Callable[[], None]) -> Callable[[], None]:
+            def target() -> None:
+                try:
+                    body()
+                except _PipelineStopped:
+                    pass
+                except BaseException as e:
+                    errors.append(e)
+                    stop.set()
+            return target
+
+        def extract() -> None:
+            iterator = iter(batches)
+            try:
+                while True:
+                    started = time.perf_counter()
+                    batch = next(iterator, _DONE)
+                    if batch is _DONE:
+                        break
+                    stats["extract"].record(time.perf_counter() - started)
+                    if batch:
+                        self._put(extracted, batch, stop)
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+            self._put(extracted, _DONE, stop)
+
+        def load() -> None:
+            while True:
+                stats["load"].observe_queue(transformed.qsize())
+                item = self._get(transformed, stop)
+                if item is _DONE:
+                    return
+                seq, transformed_batch = item
+                if isinstance(transformed_batch, _DeleteSources):
+                    self.loader.delete_sources(transformed_batch.source_ids)
+                    continue
+                started = time.perf_counter()
+                self.loader.load(transformed_batch)
+                stats["load"].record(time.perf_counter() - started)
+                if tracker:
+                    tracker.part_done(seq)
+
+        workers = [
+            threading.Thread(target=run_stage(extract), name="etl-extract", daemon=True),
+            threading.Thread(target=run_stage(load), name="etl-load", daemon=True),
+        ]
+        wall_started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        try:
+            while True:
+                stats["transform"].observe_queue(extracted.qsize())
+                batch = self._get(extracted, stop)
+                if batch is _DONE:
+                    break
+                seq = self._begin_batch(tracker, batch, source_id_column)
+                if self.incremental:
+                    self._put(transformed, (seq, _DeleteSources(self.incremental.source_ids(batch))), stop)
+                started = time.perf_counter()
+                for transformed_batch in self.transformer.transform(
+                    batch_rows=batch,
+                    text_column=text_column,
+                    source_id_column=source_id_column,
+                ):
+                    if not transformed_batch:
+                        continue
+                    stats["transform"].record(time.perf_counter() - started)
+                    if tracker:
+                        tracker.add_part(seq)
+                    self._put(transformed, (seq, transformed_batch), stop)
+                    started = time.perf_counter()
+                stats["transform"].record(time.perf_counter() - started, items=0)
+                if tracker:
+                    tracker.seal(seq)
+            self._put(transformed, _DONE, stop)
+        except _PipelineStopped:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            for worker in workers:
+                worker.join()
+
+        wall_seconds = time.perf_counter() - wall_started
+        logger.info(f"Pipelined ETL finished in {wall_seconds:.2f}s")
+        for stage in stats.values():
+            logger.info(f"  {stage.summary(wall_seconds)}")
+        if errors:
+            logger.error(f"Pipelined ETL failed: {errors[0]}")
+            raise errors[0]
+
+    @staticmethod
+    def _put(q: "queue.Queue[Any]", item: Any, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+        raise _PipelineStopped()
+
+    @staticmethod
+    def _get(q: "queue.Queue[Any]", stop: threading.Event) -> Any:
+        while not stop.is_set():
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
                 continue
-            transformed_batches = self.transformer.transform(
-                batch_rows=batch,
-                text_column=text_column,
-                source_id_column=source_id_column,
-            )
-            for transformed_batch in transformed_batches:
-                if transformed_batch:
-                    self.loader.load(transformed_batch)
-
-        logger.info("Transform and load completed")
\ No newline at end of file
+        raise _PipelineStopped()
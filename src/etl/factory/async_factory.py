@@ -7,48 +7,58 @@ from etl.core.etl.loaders.async_sql_loader import AsyncSQLLoader
 from etl.core.etl.transformers.transformer import Transformer
 from shared.embedding.sentence_transformer import SentenceTransformerEmbedding
 from shared.embedding.bert import BERTEmbedder
-from shared.models import create_embedding_model
+from shared.embedding.registry import get_provider_class
+from shared.models import create_embedding_model, vector_type_for_dtype
 from etl.core.splitters.semantic_chunker import SemanticChunker
 
 
 class AsyncComponentFactory(BaseComponentFactory):
     def create_connector(self):
-        return AsyncSQLConnector(self.settings.db_url)
+        return AsyncSQLConnector(
+            self.settings.db_url,
+            pool_size=max(5, self.settings.load_concurrency + 1),
+        )
 
     def create_embedder(self):
-        if self.settings.embedding_provider == "sentence-transformers":
-            return SentenceTransformerEmbedding(
-                model_name=self.settings.embedding_model,
-                device=self.settings.device,
-            )
-        elif self.settings.embedding_provider == "bert":
-            return BERTEmbedder(
-                model_name=self.settings.embedding_model,
-                device=self.settings.device,
-            )
-        else:
-            raise NotImplementedError(f"Provider '{self.settings.embedding_provider}' not supported")
-
-    def get_embedding_dim(self, embedder) -> int:
-        test_emb = embedder.embed_text("test")
-        return test_emb.shape[0] if hasattr(test_emb, 'shape') else len(test_emb)
+        return self.build_embedder(
+            get_provider_class(self.settings.embedding_provider),
+            {
+                "model_name": self.settings.embedding_model,
+                "device": self.settings.device,
+                "max_batch_tokens": self.settings.embedding_max_batch_tokens,
+                "quantize": self.settings.embedding_quantize,
+                "compiled_model_path": self.settings.embedding_compiled_path,
+            },
+        )
 
     def create_orm_model(self, embedding_dim: int):
-        return create_embedding_model(dim=embedding_dim, table_name=self.settings.load_table_name)
+        return create_embedding_model(
+            dim=embedding_dim,
+            table_name=self.settings.load_table_name,
+            vector_type=vector_type_for_dtype(self.settings.embedding_dtype),
+            chunk_id_column=self.settings.chunk_id_mode == "deterministic",
+        )
 
     def create_splitter(self):
+        if self.settings.splitter_type == "token":
+            return self.create_token_chunker()
         embedder = self.create_embedder()
         sentence_splitter = SentenceSplitter()
         return SemanticChunker(
             embedder=embedder,
             threshold=0.35,
             min_chunk_size=1,
-            sentence_splitter=sentence_splitter
+            sentence_splitter=sentence_splitter,
+            embedding_batch_size=self.settings.embedding_batch_size,
         )
 
     def create_metadata_builder(self):
         field_mapping = {col: col for col in self.settings.metadata_columns} if self.settings.metadata_columns else {}
-        return MetadataBuilder(field_mapping=field_mapping)
+        return MetadataBuilder(
+            field_mapping=field_mapping,
+            chunk_id_mode=self.settings.chunk_id_mode,
+            model_name=self.settings.embedding_model,
+        )
 
     def create_extractor(self, connector):
         return AsyncSQLExtractor(connector)
@@ -57,6 +67,7 @@ class AsyncComponentFactory(BaseComponentFactory):
         return AsyncSQLLoader(
             orm_class=orm_class,
             batch_size=self.settings.batch_size,
+            **self.get_idempotent_load_options(),
         )
     
     def create_transformer(
@@ -70,4 +81,14 @@ class AsyncComponentFactory(BaseComponentFactory):
             splitter=splitter,
             metadata_builder=metadata_builder,
             metadata_columns=self.settings.metadata_columns,
+            embedding_batch_size=self.settings.embedding_batch_size,
+            chunk_embedding_mode=self.settings.chunk_embedding_mode,
+            split_workers=self.settings.split_workers,
+            chunk_batch_size=self.settings.transform_chunk_batch_size,
+            async_workers=self.settings.transform_async_workers,
+            max_in_flight=self.settings.transform_max_in_flight,
+            dedup_chunks=self.settings.transform_dedup_chunks,
+            dedup_cache_size=self.settings.transform_dedup_cache_size,
+            near_dup_filter=self.create_near_dup_filter(),
+            near_dup_action=self.settings.near_dup_action,
         )
\ No newline at end of file
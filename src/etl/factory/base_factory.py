@@ -1,10 +1,22 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Type
+from sqlalchemy import create_engine
+from transformers import AutoTokenizer
 from etl.config import ETLSettings
 from etl.core.connector.base import BaseConnector
+from etl.core.checkpoint import BaseCheckpointStore, FileCheckpointStore, SQLCheckpointStore
+from etl.core.incremental import IncrementalState
 from shared.embedding.base import BaseEmbedding
+from shared.embedding.cache import CachedEmbedding
+from shared.embedding.process_pool import ProcessPoolEmbedding
+from shared.embedding.postprocess import PostprocessedEmbedding
+from shared.embedding.registry import get_or_create, make_key
 from etl.core.splitters.base import BaseSplitter
+from etl.core.splitters.sentence_splitter import SentenceSplitter
+from etl.core.splitters.token_chunker import TokenChunker
 from etl.core.metadata.base import BaseMetadata
 from etl.core.etl.base import BaseExtractor, BaseLoader, BaseTransformer
+from etl.core.etl.transformers.near_dedup import NearDuplicateFilter
 
 class BaseComponentFactory(ABC):
     def __init__(self, settings: ETLSettings):
@@ -18,10 +30,6 @@ class BaseComponentFactory(ABC):
     def create_embedder(self) -> BaseEmbedding:
         pass
 
-    @abstractmethod
-    def get_embedding_dim(self, embedder: BaseEmbedding) -> int:
-        pass
-
     @abstractmethod
     def create_orm_model(self, embedding_dim: int):
         pass
@@ -51,6 +59,121 @@ class BaseComponentFactory(ABC):
                            ) -> BaseTransformer:
         pass
 
+    def get_idempotent_load_options(self) -> Dict[str, Any]:
+        """
+        Параметры SQL-загрузчика для детерминированных chunk_id: конфликт по chunk_id
+        пропускается, поэтому повторный прогон пишет только новые/изменённые чанки.
+        """
+        if self.settings.chunk_id_mode != "deterministic":
+            return {}
+        return {"conflict_target": ["chunk_id"], "skip_existing": True}
+
+    def create_checkpoint_store(self) -> Optional[BaseCheckpointStore]:
+        """Хранилище чекпоинтов: локальный файл или таблица etl_checkpoints в целевой БД (синхронный движок)."""
+        if self.settings.checkpoint_store == "file":
+            return FileCheckpointStore(self.settings.checkpoint_path)
+        if self.settings.checkpoint_store == "sql":
+            return SQLCheckpointStore(create_engine(self.settings.db_url.replace("+asyncpg", ""), future=True))
+        return None
+
+    def get_checkpoint_job_id(self) -> str:
+        if self.settings.checkpoint_job_id:
+            return self.settings.checkpoint_job_id
+        target = self.settings.faiss_index_path or self.settings.load_table_name
+        return f"{self.settings.extract_table_name}->{target}"
+
+    def create_incremental_state(
+        self,
+        job_id: Optional[str] = None,
+        commit_watermark: bool = True,
+    ) -> Optional[IncrementalState]:
+        """
+        Состояние инкрементального режима в БД источника (синхронный движок).
+        В режиме hash хешируются все извлекаемые колонки: изменение метаданных тоже переиндексирует строку.
+        job_id по умолчанию — задание чекпоинтов; шарды передают общий job_id всей таблицы.
+        """
+        if self.settings.incremental_mode == "none":
+            return None
+        return IncrementalState(
+            engine=create_engine(self.settings.db_url.replace("+asyncpg", ""), future=True),
+            job_id=job_id or self.get_checkpoint_job_id(),
+            mode=self.settings.incremental_mode,
+            key_column=self.settings.source_id,
+            updated_at_column=self.settings.updated_at_column,
+            hash_columns=self.get_columns(),
+            commit_watermark=commit_watermark,
+        )
+
+    def create_near_dup_filter(self) -> Optional[NearDuplicateFilter]:
+        if not self.settings.near_dup_filter:
+            return None
+        return NearDuplicateFilter(
+            threshold=self.settings.near_dup_threshold,
+            max_entries=self.settings.near_dup_max_entries,
+        )
+
+    def create_token_chunker(self) -> TokenChunker:
+        """Чанкер по токенам модели эмбеддингов: чанки упаковываются до её max_length."""
+        tokenizer = AutoTokenizer.from_pretrained(self.settings.embedding_model, use_fast=True)
+        return TokenChunker(
+            tokenizer=tokenizer,
+            max_tokens=self.settings.chunk_max_tokens,
+            sentence_splitter=SentenceSplitter(),
+        )
+
+    def build_embedder(self, embedder_cls: Type[BaseEmbedding], embedder_kwargs: Dict[str, Any]) -> BaseEmbedding:
+        """
+        Возвращает общий для процесса эмбеддер из реестра: раннер, SemanticChunker
+        и FAISSLoader получают один и тот же экземпляр модели.
+        Эмбеддер работает в пуле процессов, если задан embedding_workers,
+        в дисковом кэше, если задан embedding_cache_path, и с постобработкой
+        (усечение размерности, float16), если она включена.
+        """
+        options = {
+            **embedder_kwargs,
+            "workers": self.settings.embedding_workers,
+            "threads_per_worker": self.settings.embedding_threads_per_worker,
+            "cache_path": self.settings.embedding_cache_path,
+            "cache_max_entries": self.settings.embedding_cache_max_entries,
+            "truncate_dim": self.settings.embedding_truncate_dim,
+            "dtype": self.settings.embedding_dtype,
+        }
+        model_name = options.pop("model_name")
+        device = options.pop("device")
+        key = make_key(self.settings.embedding_provider, model_name, device, options)
+        return get_or_create(key, lambda: self._instantiate_embedder(embedder_cls, embedder_kwargs))
+
+    def _instantiate_embedder(self, embedder_cls: Type[BaseEmbedding], embedder_kwargs: Dict[str, Any]) -> BaseEmbedding:
+        if self.settings.embedding_workers > 0:
+            embedder = ProcessPoolEmbedding(
+                embedder_cls,
+                embedder_kwargs,
+                num_workers=self.settings.embedding_workers,
+                threads_per_worker=self.settings.embedding_threads_per_worker,
+            )
+        else:
+            embedder = embedder_cls(**embedder_kwargs)
+
+        if self.settings.embedding_cache_path:
+            embedder = CachedEmbedding(
+                embedder,
+                cache_path=self.settings.embedding_cache_path,
+                max_entries=self.settings.embedding_cache_max_entries,
+                model_name=self.settings.embedding_model,
+            )
+
+        if self.settings.embedding_truncate_dim or self.settings.embedding_dtype != "float32":
+            embedder = PostprocessedEmbedding(
+                embedder,
+                truncate_dim=self.settings.embedding_truncate_dim,
+                dtype=self.settings.embedding_dtype,
+            )
+        return embedder
+
+    def get_embedding_dim(self, embedder: BaseEmbedding) -> int:
+        """Размерность берётся из конфигурации модели, без пробного инференса."""
+        return embedder.embedding_dim
+
     def get_columns(self) -> list[str]:
         """Общая логика — может быть реализована здесь."""
         cols = self.settings.embedding_columns.copy()
@@ -1,3 +1,4 @@
+import argparse
 import logging
 import asyncio
 from etl.pipeline import ETLPipeline
@@ -16,8 +17,16 @@ if not root_logger.handlers:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="ETL: source table → embeddings → vector store")
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the saved checkpoint and process the source table from the beginning",
+    )
+    args = parser.parse_args()
+
     settings = ETLSettings()
-    pipeline = ETLPipeline(settings)
+    pipeline = ETLPipeline(settings, restart=args.restart)
     asyncio.run(pipeline.run()) 
 
 if __name__ == "__main__":
@@ -12,6 +12,7 @@ from etl.schema.async_schema_manager import AsyncSchemaManager
 from etl.core.runner.abc import IETLRunner
 from etl.core.runner.sync_runner import SyncETLRunner
 from etl.core.runner.async_runner import AsyncETLRunner
+from etl.core.runner.sharded_runner import ShardedETLRunner
 
 from shared.embedding.sentence_transformer import SentenceTransformerEmbedding
 from shared.embedding.bert import BERTEmbedder
@@ -21,8 +22,9 @@ logger = logging.getLogger(__name__)
 
 
 class ETLPipeline:
-    def __init__(self, settings: ETLSettings):
+    def __init__(self, settings: ETLSettings, restart: bool = False):
         self.settings = settings
+        self.restart = restart
         self._validate_settings()
         self.runner: IETLRunner = self._create_runner()
 
@@ -35,16 +37,26 @@ class ETLPipeline:
             raise ValueError("load_table_name is required")
         if not self.settings.source_id:
             raise ValueError("source_id is required")
+        if self.settings.shard_count < 1:
+            raise ValueError("shard_count must be >= 1")
+        if self.settings.shard_count > 1 and self.settings.async_mode:
+            raise ValueError("shard_count > 1 runs sync worker processes, set ASYNC_MODE=false")
 
     def _create_runner(self) -> IETLRunner:
+        if self.settings.shard_count > 1:
+            logger.info(f"Создание ShardedETLRunner ({self.settings.shard_count} процессов)")
+            return ShardedETLRunner(self.settings, restart=self.restart)
         if self.settings.async_mode:
             logger.info("Создание AsyncETLRunner")
-            return AsyncETLRunner(self.settings)
+            return AsyncETLRunner(self.settings, restart=self.restart)
         else:
             logger.info("Создание SyncETLRunner")
-            return SyncETLRunner(self.settings)
+            return SyncETLRunner(self.settings, restart=self.restart)
     
     async def run(self) -> None:
         """Единая точка входа — всегда async."""
         logger.info("Запуск ETL через runner")
-        await self.runner.run()
+        try:
+            await self.runner.run()
+        finally:
+            await self.runner.shutdown()
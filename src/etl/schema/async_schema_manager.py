@@ -3,6 +3,7 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncConnection
 from shared.models import Base
+from etl.schema.schema_manager import add_missing_chunk_id_columns
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,7 @@ class AsyncSchemaManager:
         logger.info("Создание таблиц...")
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(add_missing_chunk_id_columns)
         logger.info("✅ Таблицы созданы.")
 
     async def initialize(self):
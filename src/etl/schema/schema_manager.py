@@ -1,11 +1,32 @@
 import logging
-from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.engine import Connection, Engine
 from shared import Base
 
 logger = logging.getLogger(__name__)
 
 
+def add_missing_chunk_id_columns(conn: Connection, metadata: MetaData = Base.metadata) -> None:
+    """
+    create_all не меняет существующие таблицы: таблице чанков, созданной до CHUNK_ID_MODE=deterministic,
+    добавляются колонка chunk_id и уникальный индекс — ключ ON CONFLICT (chunk_id) при загрузке.
+    Старые чанки остаются с chunk_id = NULL.
+    """
+    inspector = inspect(conn)
+    preparer = conn.dialect.identifier_preparer
+    for table in metadata.sorted_tables:
+        if "chunk_id" not in table.columns or not inspector.has_table(table.name, schema=table.schema):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name, schema=table.schema)}
+        if "chunk_id" in existing:
+            continue
+        qualified = preparer.format_table(table)
+        index_name = preparer.quote(f"uq_{table.name}_chunk_id")
+        logger.warning(f"Таблица {qualified} создана без chunk_id — добавляю колонку и уникальный индекс")
+        conn.execute(text(f"ALTER TABLE {qualified} ADD COLUMN chunk_id VARCHAR(36)"))
+        conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {qualified} (chunk_id)"))
+
+
 class SchemaManager:
     def __init__(self, engine: Engine):
         self.engine = engine
@@ -23,6 +44,8 @@ class SchemaManager:
     def create_tables(self):
         logger.info("Создание таблиц...")
         Base.metadata.create_all(bind=self.engine)
+        with self.engine.begin() as conn:
+            add_missing_chunk_id_columns(conn)
         logger.info("✅ Таблицы созданы.")
 
     def initialize(self):
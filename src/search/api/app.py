@@ -5,7 +5,8 @@ from search.api.routes import router as search_router
 from search.api.state import search_service
 from search.config.factory import create_search_backend
 from search.config.settings import settings
-from shared.embedding.sentence_transformer import SentenceTransformerEmbedding
+from shared.embedding.registry import get_embedder
+from shared.embedding.postprocess import PostprocessedEmbedding
 from search.core.embedding import SharedEmbeddingAdapter
 from search.core.service import SearchService
 
@@ -16,13 +17,21 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     backend = create_search_backend()
 
-    # Создаём эмбеддер и получаем его размерность
-    embedder_model = SentenceTransformerEmbedding(
+    # Берём эмбеддер из общего реестра; размерность читается из конфигурации модели
+    embedder_model = get_embedder(
+        "sentence-transformers",
         model_name=settings.embedding_model,
-        device=settings.device
+        device=settings.device,
+        quantize=settings.embedding_quantize,
+        compiled_model_path=settings.embedding_compiled_path,
     )
-    test_vec = embedder_model.embed_text("test")
-    expected_dim = test_vec.shape[0] if hasattr(test_vec, 'shape') else len(test_vec)
+    if settings.embedding_truncate_dim or settings.embedding_dtype != "float32":
+        embedder_model = PostprocessedEmbedding(
+            embedder_model,
+            truncate_dim=settings.embedding_truncate_dim,
+            dtype=settings.embedding_dtype,
+        )
+    expected_dim = embedder_model.embedding_dim
     logger.info(f"Размерность эмбеддера Search: {expected_dim}")
     await backend.initialize(expected_dim=expected_dim)
 
@@ -1,4 +1,5 @@
 import logging
+from typing import List
 from fastapi import APIRouter, HTTPException
 from search.core.query import SearchQuery, SearchResponse
 import search.api.state
@@ -18,4 +19,18 @@ async def search_endpoint(query: SearchQuery):
         return response
     except Exception as e:
         logger.exception("Search failed due to internal error")
+        raise HTTPException(status_code=500, detail="Search service unavailable")
+
+
+@router.post("/search/batch", response_model=List[SearchResponse])
+async def search_batch_endpoint(queries: List[SearchQuery]):
+    service = search.api.state.search_service
+    if service is None:
+        logger.error("Search service not ready")
+        raise HTTPException(status_code=503, detail="Search service is initializing")
+
+    try:
+        return await service.search_batch(queries)
+    except Exception as e:
+        logger.exception("Batch search failed due to internal error")
         raise HTTPException(status_code=500, detail="Search service unavailable")
\ No newline at end of file
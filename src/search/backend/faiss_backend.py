@@ -38,6 +38,13 @@ class FAISSBackend(BaseSearchBackend):
                 f"но метаданных — {len(self.metadata_list)}."
             )
 
+        # Индекс с явными id (IndexIDMap по chunk_id): id вектора → позиция в метаданных
+        self._id_to_position: Optional[Dict[int, int]] = None
+        if isinstance(self.index, faiss.IndexIDMap):
+            self._id_to_position = {
+                meta["faiss_id"]: position for position, meta in enumerate(self.metadata_list)
+            }
+
         logger.info(f"✅ FAISSBackend загружен: {self.ntotal} записей, dim={self.dim}")
 
     async def connect(self) -> None:
@@ -101,7 +108,8 @@ class FAISSBackend(BaseSearchBackend):
 
         q_vec = np.array(query_vector, dtype=np.float32).reshape(1, -1)
 
-        if isinstance(self.index, faiss.IndexFlatIP):
+        is_inner_product = self.index.metric_type == faiss.METRIC_INNER_PRODUCT
+        if is_inner_product:
             faiss.normalize_L2(q_vec)
 
         distances, indices = self.index.search(q_vec, top_k * 5 if metadata_filter else top_k)
@@ -113,13 +121,14 @@ class FAISSBackend(BaseSearchBackend):
             if idx == -1:
                 continue
 
-            meta = self.metadata_list[idx]
+            position = self._id_to_position[idx] if self._id_to_position is not None else idx
+            meta = self.metadata_list[position]
             chunk_text = meta.get("chunk_text", "")
             metadata = meta.get("metadata", {})
 
-            if isinstance(self.index, faiss.IndexFlatIP):
+            if is_inner_product:
                 similarity = float(np.clip(dist, 0.0, 1.0))
-            elif isinstance(self.index, faiss.IndexFlatL2):
+            elif self.index.metric_type == faiss.METRIC_L2:
                 similarity = 1.0 / (1.0 + float(dist))
             else:
                 similarity = float(np.clip(1.0 - dist / 2.0, 0.0, 1.0))
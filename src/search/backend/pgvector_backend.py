@@ -9,11 +9,12 @@ from shared.db_utils import get_embedding_dim_from_db  # ← новая утил
 logger = logging.getLogger(__name__)
 
 class PGVectorBackend(BaseSearchBackend):
-    def __init__(self, db_url: str, table_name: str):
+    def __init__(self, db_url: str, table_name: str, vector_type: str = "vector"):
         if not db_url.startswith("postgresql+asyncpg://"):
             db_url = db_url.replace("postgresql://", "postgresql+asyncpg://")
         self.db_url = db_url
         self.table_name = table_name
+        self.vector_type = vector_type
 
         self.engine = create_async_engine(
             self.db_url,
@@ -49,7 +50,8 @@ class PGVectorBackend(BaseSearchBackend):
 
         self.EmbeddingChapter = create_embedding_model(
             dim=actual_dim,
-            table_name=self.table_name
+            table_name=self.table_name,
+            vector_type=self.vector_type,
         )
         logger.info(f"✅ EmbeddingChapter создан с dim={actual_dim} для таблицы {self.table_name}")
 
@@ -1,13 +1,15 @@
 from .settings import settings
 from search.backend.pgvector_backend import PGVectorBackend
 from search.backend.faiss_backend import FAISSBackend
+from shared.models import vector_type_for_dtype
 
 def create_search_backend():
     backend_type = settings.search_backend
     if backend_type == "pgvector":
         return PGVectorBackend(
             db_url=settings.db_url,
-            table_name=settings.load_table_name
+            table_name=settings.load_table_name,
+            vector_type=vector_type_for_dtype(settings.embedding_dtype),
         )
     elif backend_type == "faiss":
         return FAISSBackend(
@@ -13,6 +13,10 @@ class SearchSettings(BaseSettings):
     min_similarity: float = Field(0.0, ge=0.0, le=1.0, env="SEARCH_MIN_SIMILARITY")
     embedding_model: str = Field("sentence-transformers/all-MiniLM-L6-v2", env="EMBEDDING_MODEL")
     device: str = Field("cpu", env="DEVICE")
+    embedding_quantize: bool = Field(False, env="EMBEDDING_QUANTIZE")
+    embedding_compiled_path: Optional[str] = Field(None, env="EMBEDDING_COMPILED_PATH")
+    embedding_truncate_dim: Optional[int] = Field(None, env="EMBEDDING_TRUNCATE_DIM")
+    embedding_dtype: Literal["float32", "float16"] = Field("float32", env="EMBEDDING_DTYPE")
     load_table_name: str = Field(..., env="LOAD_TABLE_NAME")
 
     faiss_index_path: Optional[str] = Field(None, env="FAISS_INDEX_PATH")
@@ -20,4 +20,7 @@ class BaseSearchBackend(ABC):
 
 class BaseEmbeddingProvider(ABC):
     @abstractmethod
-    def embed_text(self, text: str) -> List[float]: ...
\ No newline at end of file
+    def embed_text(self, text: str) -> List[float]: ...
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_text(text) for text in texts]
\ No newline at end of file
@@ -7,4 +7,7 @@ class SharedEmbeddingAdapter(BaseEmbeddingProvider):
 
     def embed_text(self, text: str) -> list[float]:
         emb = self.embedder.embed_text(text)
-        return emb.tolist() if hasattr(emb, 'tolist') else emb.tolist()
\ No newline at end of file
+        return emb.tolist() if hasattr(emb, 'tolist') else emb.tolist()
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        return self.embedder.embed_texts(texts).tolist()
\ No newline at end of file
@@ -1,4 +1,5 @@
 import logging
+from typing import List
 from .abc import BaseSearchBackend, BaseEmbeddingProvider
 from .query import SearchQuery, SearchResponse
 from .similarity import ensure_normalized_similarity
@@ -18,7 +19,19 @@ class SearchService:
 
     async def search(self, query: SearchQuery) -> SearchResponse:
         vector = self.embedder.embed_text(query.text)
+        return await self._search_by_vector(vector, query)
 
+    async def search_batch(self, queries: List[SearchQuery]) -> List[SearchResponse]:
+        """Эмбеддинг всех запросов одним батчевым вызовом, затем поиск по каждому вектору."""
+        if not queries:
+            return []
+        vectors = self.embedder.embed_texts([query.text for query in queries])
+        return [
+            await self._search_by_vector(vector, query)
+            for vector, query in zip(vectors, queries)
+        ]
+
+    async def _search_by_vector(self, vector: list, query: SearchQuery) -> SearchResponse:
         if self.cache:
             cache_key = self._make_cache_key(vector, query)
             cached = await self.cache.get(cache_key)
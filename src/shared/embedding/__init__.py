@@ -4,8 +4,16 @@
 """
 from .sentence_transformer import SentenceTransformerEmbedding
 from .bert import BERTEmbedder
+from .batching import TokenBudgetBatcher
+from .cache import CachedEmbedding
+from .process_pool import ProcessPoolEmbedding
+from .postprocess import PostprocessedEmbedding
 
 __all__ = [
     "SentenceTransformerEmbedding",
-    "BERTEmbedder"
+    "BERTEmbedder",
+    "TokenBudgetBatcher",
+    "CachedEmbedding",
+    "ProcessPoolEmbedding",
+    "PostprocessedEmbedding",
     ]
@@ -1,5 +1,24 @@
 import numpy as np
+from typing import List
 
 class BaseEmbedding:
     def embed_text(self, text: str) -> np.ndarray:
         raise NotImplementedError
+
+    @property
+    def embedding_dim(self) -> int:
+        """
+        Размерность эмбеддинга. Базовая реализация делает пробный прогон модели;
+        наследники берут её из конфигурации модели без инференса.
+        """
+        return int(np.asarray(self.embed_text("test")).shape[0])
+
+    def embed_texts(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Эмбеддинги для списка текстов — матрица (len(texts), dim) float32.
+        Базовая реализация вызывает embed_text по одному тексту;
+        наследники переопределяют её батчевым forward-проходом.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([np.asarray(self.embed_text(text), dtype=np.float32) for text in texts])
@@ -0,0 +1,86 @@
+import logging
+import numpy as np
+from typing import Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def plan_token_batches(
+    lengths: Sequence[int],
+    max_batch_tokens: int,
+    max_batch_size: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    Группирует индексы входов в микробатчи по бюджету токенов.
+    Входы сортируются по убыванию длины, поэтому в батч попадают тексты близкой длины,
+    а стоимость батча (число строк × самая длинная строка) не превышает max_batch_tokens.
+    Вход длиннее бюджета получает собственный батч.
+    """
+    if max_batch_tokens < 1:
+        raise ValueError("max_batch_tokens must be >= 1")
+    if max_batch_size is not None and max_batch_size < 1:
+        raise ValueError("max_batch_size must be >= 1")
+
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_max = 0
+    for idx in order:
+        length = max(1, lengths[idx])
+        if current:
+            full = max_batch_size is not None and len(current) >= max_batch_size
+            if full or current_max * (len(current) + 1) > max_batch_tokens:
+                batches.append(current)
+                current = []
+        if not current:
+            current_max = length
+        current.append(idx)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class TokenBudgetBatcher:
+    """
+    Батчинг с бакетированием по длине: один раз токенизирует все тексты без паддинга,
+    пакует микробатчи по бюджету токенов, дополняет паддингом только внутри микробатча
+    и раскладывает результаты обратно в исходном порядке.
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        max_batch_tokens: int,
+        max_length: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+    ):
+        self.tokenizer = tokenizer
+        self.max_batch_tokens = max_batch_tokens
+        self.max_length = max_length
+        self.max_batch_size = max_batch_size
+
+    def embed(
+        self,
+        texts: List[str],
+        embed_encoded: Callable[[dict], "np.ndarray"],
+        dim: int,
+    ) -> np.ndarray:
+        encodings = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        keys = list(encodings.keys())
+        lengths = [len(ids) for ids in encodings["input_ids"]]
+        batches = plan_token_batches(lengths, self.max_batch_tokens, self.max_batch_size)
+
+        result = np.empty((len(texts), dim), dtype=np.float32)
+        padded_tokens = 0
+        for indices in batches:
+            features = [{key: encodings[key][i] for key in keys} for i in indices]
+            padded = self.tokenizer.pad(features, padding=True, return_tensors="pt")
+            padded_tokens += padded["input_ids"].numel()
+            result[indices] = embed_encoded(padded)
+
+        if padded_tokens:
+            logger.debug(
+                f"Token-budget batching: {len(texts)} texts → {len(batches)} micro-batches, "
+                f"padding efficiency {sum(lengths) / padded_tokens:.2%}"
+            )
+        return result
@@ -1,7 +1,13 @@
 import torch
 import logging
+import numpy as np
+from typing import List, Optional
 from .base import BaseEmbedding
-from transformers import AutoTokenizer, AutoModel
+from .batching import TokenBudgetBatcher
+from .quantization import quantize_embedder
+from .export import load_encoder
+from shared.utils import batched
+from transformers import AutoTokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -10,28 +16,68 @@ class BERTEmbedder(BaseEmbedding):
                  model_name: str = '',
                  device: str = 'cpu',
                  normalize:bool = True,
-                 max_length:int = 512
+                 max_length:int = 512,
+                 max_batch_tokens: Optional[int] = None,
+                 quantize: bool = False,
+                 quantization_sample: Optional[List[str]] = None,
+                 compiled_model_path: Optional[str] = None
                  ):
+        self.model_name = model_name
         self.device = device
         logger.info(f"Loading BERT model '{model_name}' on {device}, normalize={normalize}")
         self.max_length = max_length
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModel.from_pretrained(model_name).to(self.device)
+        self.model = load_encoder(model_name, self.device, compiled_model_path)
         self.normalize = normalize
+        self.quantize = quantize
+        self.batcher = TokenBudgetBatcher(
+            self.tokenizer,
+            max_batch_tokens=max_batch_tokens,
+            max_length=self.max_length,
+        ) if max_batch_tokens else None
+        self.quantization_report = quantize_embedder(
+            self, sample_texts=quantization_sample
+        ) if quantize else None
 
-    def embed_text(self, text):
-        encoded = self.tokenizer(
-            text,
+    @property
+    def embedding_dim(self) -> int:
+        return int(self.model.config.hidden_size)
+
+    def _encode(self, texts: List[str]):
+        return self.tokenizer(
+            texts,
             padding=True,
             truncation=True,
             return_tensors="pt",
             max_length=self.max_length
-        ).to(self.device)
-        with torch.no_grad():
-            output = self.model(**encoded)
-        embedding = output.last_hidden_state[:,0,:]
+        )
+
+    @torch.no_grad()
+    def _embed_encoded(self, encoded) -> np.ndarray:
+        encoded = encoded.to(self.device)
+        output = self.model(**encoded)
+        # [CLS] у каждой строки батча стоит в позиции 0 независимо от паддинга справа
+        embedding = output.last_hidden_state[:, 0, :]
         if self.normalize:
             embedding = torch.nn.functional.normalize(embedding, p=2, dim=1)
-        logger.debug(f"Embedded text (len={len(text)}) → vector shape {embedding.squeeze(0).shape}")
-        return embedding.squeeze(0).cpu().numpy()
+        return embedding.cpu().numpy()
+
+    def embed_text(self, text):
+        embedding = self._embed_encoded(self._encode([text]))[0]
+        logger.debug(f"Embedded text (len={len(text)}) → vector shape {embedding.shape}")
+        return embedding
 
+    def embed_texts(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        При заданном max_batch_tokens тексты пакуются по бюджету токенов
+        (TokenBudgetBatcher), и batch_size не используется.
+        """
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        if self.batcher is not None:
+            embeddings = self.batcher.embed(texts, self._embed_encoded, self.embedding_dim)
+        else:
+            parts = [self._embed_encoded(self._encode(batch)) for batch in batched(texts, batch_size)]
+            embeddings = np.vstack(parts).astype(np.float32, copy=False)
+        logger.debug(f"Embedded {len(texts)} texts (batch_size={batch_size}) → matrix shape {embeddings.shape}")
+        return embeddings
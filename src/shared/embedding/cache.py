@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+from .base import BaseEmbedding
+from shared.utils import batched
+
+logger = logging.getLogger(__name__)
+
+# Лимит SQLite на число параметров в одном запросе
+_SQLITE_MAX_PARAMS = 900
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Контентно-адресуемый кэш эмбеддингов поверх любого BaseEmbedding.
+    Ключ — (модель, normalize, max_length, sha256(текст)), векторы хранятся в SQLite.
+    При превышении max_entries вытесняются записи с самым старым обращением (LRU).
+    """
+
+    def __init__(
+        self,
+        embedder: BaseEmbedding,
+        cache_path: str,
+        max_entries: int = 1_000_000,
+        model_name: Optional[str] = None,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.embedder = embedder
+        self.cache_path = Path(cache_path)
+        self.max_entries = max_entries
+        self.model_key = self._make_model_key(embedder, model_name)
+        self.hits = 0
+        self.misses = 0
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                model_key TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access INTEGER NOT NULL,
+                PRIMARY KEY (model_key, text_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embedding_cache_last_access ON embedding_cache (last_access)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        logger.info(f"Embedding cache '{self.cache_path}' opened: {self._size} entries, key={self.model_key}")
+
+    @staticmethod
+    def _make_model_key(embedder: BaseEmbedding, model_name: Optional[str]) -> str:
+        name = model_name or getattr(embedder, "model_name", None) or type(embedder).__name__
+        normalize = getattr(embedder, "normalize", None)
+        max_length = getattr(embedder, "max_length", None)
+        # int8-модель даёт другие векторы, чем fp32 — записи кэша у них не общие
+        quantize = getattr(embedder, "quantize", False)
+        return f"{name}|normalize={normalize}|max_length={max_length}|quantize={quantize}"
+
+    @property
+    def embedding_dim(self) -> int:
+        return self.embedder.embedding_dim
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": self._size}
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return self.embedder.embed_texts(texts, batch_size=batch_size)
+
+        hashes = [text_hash(text) for text in texts]
+        found = self._lookup(set(hashes))
+
+        missing: Dict[str, str] = {}
+        for h, text in zip(hashes, texts):
+            if h not in found and h not in missing:
+                missing[h] = text
+        if missing:
+            computed = self.embedder.embed_texts(list(missing.values()), batch_size=batch_size)
+            new_vectors = dict(zip(missing.keys(), np.asarray(computed, dtype=np.float32)))
+            self._store(new_vectors)
+            found.update(new_vectors)
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        logger.debug(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+        return np.vstack([found[h] for h in hashes])
+
+    def _lookup(self, hashes: set) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        now = time.time_ns()
+        with self._lock:
+            for chunk in batched(hashes, _SQLITE_MAX_PARAMS):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embedding_cache "
+                    f"WHERE model_key = ? AND text_hash IN ({placeholders})",
+                    [self.model_key, *chunk],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embedding_cache SET last_access = ? WHERE model_key = ? AND text_hash = ?",
+                        [(now, self.model_key, h) for h, _ in rows],
+                    )
+            self._conn.commit()
+        return found
+
+    def _store(self, vectors: Dict[str, np.ndarray]) -> None:
+        now = time.time_ns()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (model_key, text_hash, vector, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                [(self.model_key, h, vec.tobytes(), now) for h, vec in vectors.items()],
+            )
+            self._size += len(vectors)
+            if self._size > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        overflow = self._size - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embedding_cache WHERE rowid IN "
+            "(SELECT rowid FROM embedding_cache ORDER BY last_access ASC LIMIT ?)",
+            (overflow,),
+        )
+        self._size -= overflow
+        logger.debug(f"Embedding cache: evicted {overflow} least recently used entries")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        if hasattr(self.embedder, "close"):
+            self.embedder.close()
+        logger.info(f"Embedding cache closed: hits={self.hits}, misses={self.misses}, size={self._size}")
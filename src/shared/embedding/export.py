@@ -0,0 +1,121 @@
+import argparse
+import json
+import logging
+import torch
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Optional
+from transformers import AutoModel
+from transformers.modeling_outputs import BaseModelOutput
+
+logger = logging.getLogger(__name__)
+
+EXPORT_INFO_FILE = "export_info.json"
+_TRACE_TEXTS = [
+    "Example text for export.",
+    "A noticeably longer example text so that the exported graph sees padding.",
+]
+
+
+class _LastHiddenState(torch.nn.Module):
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids=None):
+        return self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            token_type_ids=token_type_ids,
+        ).last_hidden_state
+
+
+class CompiledEncoder:
+    """
+    Загруженный артефакт torch.export с интерфейсом AutoModel:
+    model(**encoded).last_hidden_state. Не требует from_pretrained при старте.
+    """
+
+    def __init__(self, path: str, device: str = "cpu"):
+        extra_files = {EXPORT_INFO_FILE: ""}
+        program = torch.export.load(path, extra_files=extra_files)
+        info = json.loads(extra_files[EXPORT_INFO_FILE])
+        self.input_names: List[str] = info["input_names"]
+        self.config = SimpleNamespace(hidden_size=info["hidden_size"], name_or_path=info["model_name"])
+        self.module = program.module().to(device)
+        logger.info(f"Loaded compiled encoder '{path}' (model={info['model_name']}, dim={info['hidden_size']})")
+
+    def __call__(self, **encoded) -> BaseModelOutput:
+        outputs = self.module(*[encoded[name] for name in self.input_names])
+        return BaseModelOutput(last_hidden_state=outputs)
+
+    def eval(self) -> "CompiledEncoder":
+        return self
+
+
+def load_encoder(model_name: str, device: str, compiled_model_path: Optional[str] = None):
+    """Загружает скомпилированный артефакт, если он есть, иначе — AutoModel в eval-режиме."""
+    if compiled_model_path and Path(compiled_model_path).exists():
+        encoder = CompiledEncoder(compiled_model_path, device=device)
+        if encoder.config.name_or_path != model_name:
+            logger.warning(
+                f"Compiled model '{compiled_model_path}' was exported from "
+                f"'{encoder.config.name_or_path}', configured model is '{model_name}'"
+            )
+        return encoder
+    if compiled_model_path:
+        logger.warning(f"Compiled model '{compiled_model_path}' not found, loading '{model_name}' with from_pretrained")
+    model = AutoModel.from_pretrained(model_name).to(device)
+    model.eval()
+    return model
+
+
+def export_embedder(embedder, output_path: str, sample_texts: Optional[List[str]] = None) -> Path:
+    """
+    Экспортирует encoder эмбеддера через torch.export с динамическими batch/seq измерениями.
+    Пулинг и нормализация остаются в эмбеддере, поэтому результаты совпадают с eager-режимом.
+    """
+    if isinstance(embedder.model, CompiledEncoder):
+        raise ValueError("Embedder already uses a compiled model")
+
+    encoded = embedder._encode(sample_texts or _TRACE_TEXTS).to("cpu")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in encoded]
+    batch = torch.export.Dim("batch", min=1, max=65536)
+    seq = torch.export.Dim("seq", min=1, max=embedder.model.config.max_position_embeddings)
+    dynamic_shapes = {name: {0: batch, 1: seq} for name in input_names}
+
+    with torch.no_grad():
+        program = torch.export.export(
+            _LastHiddenState(embedder.model.to("cpu")).eval(),
+            tuple(encoded[name] for name in input_names),
+            dynamic_shapes=dynamic_shapes,
+            strict=False,
+        )
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    info = {
+        "model_name": getattr(embedder, "model_name", ""),
+        "hidden_size": embedder.embedding_dim,
+        "input_names": input_names,
+    }
+    torch.export.save(program, str(output_path), extra_files={EXPORT_INFO_FILE: json.dumps(info)})
+    logger.info(f"Exported compiled encoder to '{output_path}'")
+    return output_path
+
+
+def main():
+    from .registry import get_provider_class
+
+    parser = argparse.ArgumentParser(description="Export embedding model to a torch.export artifact")
+    parser.add_argument("--provider", default="sentence-transformers")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    embedder = get_provider_class(args.provider)(model_name=args.model, device="cpu")
+    export_embedder(embedder, args.output)
+
+
+if __name__ == "__main__":
+    main()
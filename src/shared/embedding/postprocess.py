@@ -0,0 +1,59 @@
+import logging
+import numpy as np
+from typing import List, Optional
+from .base import BaseEmbedding
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+class PostprocessedEmbedding(BaseEmbedding):
+    """
+    Постобработка эмбеддингов: усечение размерности (Matryoshka-style) с повторной
+    L2-нормализацией и вывод в float16. Уменьшает объём хранения и трафик при поиске.
+    """
+
+    def __init__(
+        self,
+        embedder: BaseEmbedding,
+        truncate_dim: Optional[int] = None,
+        dtype: str = "float32",
+        renormalize: bool = True,
+    ):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype '{dtype}', expected one of {SUPPORTED_DTYPES}")
+        full_dim = embedder.embedding_dim
+        if truncate_dim is not None and not 0 < truncate_dim <= full_dim:
+            raise ValueError(f"truncate_dim must be in (0, {full_dim}], got {truncate_dim}")
+        self.embedder = embedder
+        self.truncate_dim = truncate_dim
+        self.dtype = np.dtype(dtype)
+        self.renormalize = renormalize
+        logger.info(
+            f"Embedding post-processing: dim {full_dim} → {self.embedding_dim}, "
+            f"dtype={dtype}, renormalize={renormalize}"
+        )
+
+    @property
+    def embedding_dim(self) -> int:
+        return self.truncate_dim or self.embedder.embedding_dim
+
+    def postprocess(self, embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.truncate_dim is not None:
+            embeddings = embeddings[..., :self.truncate_dim]
+            if self.renormalize:
+                norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+                embeddings = embeddings / np.maximum(norms, 1e-12)
+        return embeddings.astype(self.dtype, copy=False)
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.postprocess(self.embedder.embed_text(text))
+
+    def embed_texts(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return self.postprocess(self.embedder.embed_texts(texts, batch_size=batch_size))
+
+    def close(self) -> None:
+        if hasattr(self.embedder, "close"):
+            self.embedder.close()
@@ -0,0 +1,125 @@
+import os
+import logging
+import multiprocessing as mp
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple, Type
+from .base import BaseEmbedding
+
+logger = logging.getLogger(__name__)
+
+# Эмбеддер, загруженный один раз в каждом процессе-воркере
+_worker_embedder: Optional[BaseEmbedding] = None
+
+
+def _init_worker(
+    embedder_cls: Type[BaseEmbedding],
+    embedder_kwargs: Dict[str, Any],
+    threads_per_worker: int,
+) -> None:
+    global _worker_embedder
+    import torch
+
+    torch.set_num_threads(threads_per_worker)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    _worker_embedder = embedder_cls(**embedder_kwargs)
+
+
+def _worker_dim() -> int:
+    return _worker_embedder.embedding_dim
+
+
+def _worker_embed(
+    shm_name: str,
+    shape: Tuple[int, int],
+    offset: int,
+    texts: List[str],
+    batch_size: int,
+) -> int:
+    embeddings = _worker_embedder.embed_texts(texts, batch_size=batch_size)
+    shm = SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        out[offset:offset + len(texts)] = embeddings
+        del out
+    finally:
+        shm.close()
+    return len(texts)
+
+
+class ProcessPoolEmbedding(BaseEmbedding):
+    """
+    Эмбеддер поверх пула процессов: модель загружается один раз в каждом воркере,
+    torch-потоки делятся между воркерами, а результаты пишутся воркерами напрямую
+    в общий буфер shared memory вместо пиклинга numpy-массивов.
+    """
+
+    def __init__(
+        self,
+        embedder_cls: Type[BaseEmbedding],
+        embedder_kwargs: Optional[Dict[str, Any]] = None,
+        num_workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        chunk_size: int = 64,
+    ):
+        embedder_kwargs = embedder_kwargs or {}
+        cpu_count = os.cpu_count() or 1
+        self.num_workers = num_workers or cpu_count
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.num_workers)
+        self.chunk_size = chunk_size
+        self.model_name = embedder_kwargs.get("model_name")
+        self.normalize = embedder_kwargs.get("normalize")
+        self.max_length = embedder_kwargs.get("max_length")
+        self.quantize = embedder_kwargs.get("quantize", False)
+
+        logger.info(
+            f"Starting ProcessPoolEmbedding: {self.num_workers} workers × "
+            f"{self.threads_per_worker} torch threads ({embedder_cls.__name__})"
+        )
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(embedder_cls, embedder_kwargs, self.threads_per_worker),
+        )
+        self.dim = self._executor.submit(_worker_dim).result()
+
+    @property
+    def embedding_dim(self) -> int:
+        return self.dim
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        n = len(texts)
+        if n == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+
+        shape = (n, self.dim)
+        shm = SharedMemory(create=True, size=n * self.dim * np.dtype(np.float32).itemsize)
+        try:
+            futures = [
+                self._executor.submit(
+                    _worker_embed, shm.name, shape, start, texts[start:start + self.chunk_size], batch_size
+                )
+                for start in range(0, n, self.chunk_size)
+            ]
+            for future in futures:
+                future.result()
+            out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+            result = out.copy()
+            del out
+        finally:
+            shm.close()
+            shm.unlink()
+        logger.debug(f"ProcessPoolEmbedding: embedded {n} texts in {len(futures)} worker tasks")
+        return result
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        logger.info("ProcessPoolEmbedding workers stopped")
@@ -0,0 +1,92 @@
+import argparse
+import json
+import logging
+import numpy as np
+import torch
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_TEXTS = [
+    "The cat is sitting on the mat.",
+    "A kitten is resting on the rug.",
+    "The stock market crashed yesterday.",
+    "Vector databases store embeddings for semantic search.",
+    "Он приехал в Москву и сразу пошёл на встречу.",
+    "Встретимся на ул. Ленина, д. 10, после обеда.",
+    "Значение π приблизительно равно 3.14.",
+    "Глава первая. В которой всё только начинается.",
+]
+
+
+def quantize_dynamic_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """Динамическое int8-квантование Linear-слоёв (только CPU)."""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray, eps: float = 1e-8) -> Dict[str, float]:
+    """Построчное косинусное сходство двух матриц эмбеддингов одних и тех же текстов."""
+    reference = reference / (np.linalg.norm(reference, axis=1, keepdims=True) + eps)
+    candidate = candidate / (np.linalg.norm(candidate, axis=1, keepdims=True) + eps)
+    cosines = np.sum(reference * candidate, axis=1)
+    return {
+        "samples": int(cosines.shape[0]),
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+    }
+
+
+def quantize_embedder(
+    embedder,
+    check: bool = True,
+    sample_texts: Optional[List[str]] = None,
+) -> Optional[Dict[str, float]]:
+    """
+    Заменяет embedder.model на int8-квантованную копию.
+    При check=True сравнивает эмбеддинги квантованной и fp32-модели на выборке
+    и возвращает отчёт о косинусном согласии.
+    """
+    if str(embedder.device) != "cpu":
+        raise ValueError(f"Dynamic int8 quantization is CPU-only, got device '{embedder.device}'")
+    if not isinstance(embedder.model, torch.nn.Module):
+        raise ValueError("Quantization requires an eager PyTorch model, not a compiled artifact")
+
+    sample_texts = sample_texts or DEFAULT_SAMPLE_TEXTS
+    reference = embedder.embed_texts(sample_texts) if check else None
+    embedder.model = quantize_dynamic_int8(embedder.model)
+    if not check:
+        logger.info("Embedding model quantized to int8 (agreement check disabled)")
+        return None
+
+    report = cosine_agreement(reference, embedder.embed_texts(sample_texts))
+    logger.info(
+        f"Embedding model quantized to int8: mean cosine vs fp32 = {report['mean_cosine']:.4f}, "
+        f"min = {report['min_cosine']:.4f} on {report['samples']} samples"
+    )
+    return report
+
+
+def main():
+    from .registry import get_provider_class
+
+    parser = argparse.ArgumentParser(description="Cosine agreement of int8-quantized vs fp32 embeddings")
+    parser.add_argument("--provider", default="sentence-transformers")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--sample-file", help="Text file with one sample per line")
+    args = parser.parse_args()
+
+    sample_texts = None
+    if args.sample_file:
+        with open(args.sample_file, "r", encoding="utf-8") as f:
+            sample_texts = [line.strip() for line in f if line.strip()]
+
+    embedder = get_provider_class(args.provider)(
+        model_name=args.model,
+        quantize=True,
+        quantization_sample=sample_texts,
+    )
+    print(json.dumps(embedder.quantization_report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple, Type
+from .base import BaseEmbedding
+from .bert import BERTEmbedder
+from .sentence_transformer import SentenceTransformerEmbedding
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS: Dict[str, Type[BaseEmbedding]] = {
+    "sentence-transformers": SentenceTransformerEmbedding,
+    "bert": BERTEmbedder,
+}
+
+_registry: Dict[Tuple, BaseEmbedding] = {}
+_lock = threading.Lock()
+
+
+def get_provider_class(provider: str) -> Type[BaseEmbedding]:
+    if provider not in PROVIDERS:
+        raise NotImplementedError(f"Provider '{provider}' not supported")
+    return PROVIDERS[provider]
+
+
+def make_key(provider: str, model_name: str, device: str, options: Dict[str, Hashable]) -> Tuple:
+    return (provider, model_name, device, tuple(sorted(options.items())))
+
+
+def get_or_create(key: Tuple, create: Callable[[], BaseEmbedding]) -> BaseEmbedding:
+    """
+    Возвращает эмбеддер из реестра процесса или создаёт его один раз.
+    Модель грузится под блокировкой, чтобы параллельные вызовы не загрузили её дважды.
+    """
+    with _lock:
+        embedder = _registry.get(key)
+        if embedder is None:
+            logger.info(f"Embedder registry: creating {key[0]} '{key[1]}' on {key[2]}")
+            embedder = create()
+            _registry[key] = embedder
+        else:
+            logger.debug(f"Embedder registry: reusing {key[0]} '{key[1]}' on {key[2]}")
+        return embedder
+
+
+def get_embedder(provider: str, model_name: str, device: str = "cpu", **options: Any) -> BaseEmbedding:
+    embedder_cls = get_provider_class(provider)
+    key = make_key(provider, model_name, device, options)
+    return get_or_create(key, lambda: embedder_cls(model_name=model_name, device=device, **options))
+
+
+def release_embedder(embedder: BaseEmbedding) -> None:
+    """Удаляет эмбеддер из реестра и освобождает его ресурсы (пул процессов, кэш)."""
+    with _lock:
+        for key in [k for k, v in _registry.items() if v is embedder]:
+            del _registry[key]
+    if hasattr(embedder, "close"):
+        embedder.close()
+
+
+def clear_registry() -> None:
+    with _lock:
+        _registry.clear()
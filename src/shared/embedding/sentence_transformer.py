@@ -1,34 +1,85 @@
 import torch
 import logging
+import numpy as np
+from typing import List, Optional
 from .base import BaseEmbedding
-from transformers import AutoTokenizer, AutoModel
+from .batching import TokenBudgetBatcher
+from .quantization import quantize_embedder
+from .export import load_encoder
+from shared.utils import batched
+from transformers import AutoTokenizer
 
 logger = logging.getLogger(__name__)
 
 class SentenceTransformerEmbedding(BaseEmbedding):
-    def __init__(self, model_name: str = '', device: str = 'cpu'):
+    def __init__(
+        self,
+        model_name: str = '',
+        device: str = 'cpu',
+        max_length: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        quantize: bool = False,
+        quantization_sample: Optional[List[str]] = None,
+        compiled_model_path: Optional[str] = None,
+    ):
         self.model_name = model_name
         self.device = device
+        self.max_length = max_length
+        self.quantize = quantize
         logger.info(f"Loading SentenceTransformer model '{model_name}' on {device}")
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModel.from_pretrained(model_name).to(self.device)
-        self.model.eval()
-        
+        self.model = load_encoder(model_name, self.device, compiled_model_path)
+        self.batcher = TokenBudgetBatcher(
+            self.tokenizer,
+            max_batch_tokens=max_batch_tokens,
+            max_length=self.max_length,
+        ) if max_batch_tokens else None
+        self.quantization_report = quantize_embedder(
+            self, sample_texts=quantization_sample
+        ) if quantize else None
+
     def _mean_pooling(self, model_output, attention_mask) -> torch.Tensor:
-        token_embeddings = model_output.last_hidden_state 
+        token_embeddings = model_output.last_hidden_state
         input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
         sum_embeddings = torch.sum(token_embeddings * input_mask_expanded, dim=1)
         sum_mask = input_mask_expanded.sum(dim=1).clamp(min=1e-9)
         return sum_embeddings / sum_mask
 
+    @property
+    def embedding_dim(self) -> int:
+        return int(self.model.config.hidden_size)
+
+    def _encode(self, texts: List[str]):
+        return self.tokenizer(texts,
+                              padding=True,
+                              truncation=True,
+                              max_length=self.max_length,
+                              return_tensors="pt")
+
     @torch.no_grad()
-    def embed_text(self, text: str):
-        encoded_input = self.tokenizer(text,
-                                       padding=True,
-                                       truncation=True,
-                                       return_tensors="pt").to(self.device)
-        with torch.no_grad():
-            model_output = self.model(**encoded_input)
+    def _embed_encoded(self, encoded_input) -> np.ndarray:
+        encoded_input = encoded_input.to(self.device)
+        model_output = self.model(**encoded_input)
+        # Маска исключает паддинг из среднего, поэтому строки батча не влияют друг на друга
         embedding = self._mean_pooling(model_output, encoded_input['attention_mask'])
-        logger.debug(f"Embedded text (len={len(text)}) → vector shape {embedding[0].shape}")
-        return embedding[0].cpu().numpy()
\ No newline at end of file
+        return embedding.cpu().numpy()
+
+    def embed_text(self, text: str):
+        embedding = self._embed_encoded(self._encode([text]))[0]
+        logger.debug(f"Embedded text (len={len(text)}) → vector shape {embedding.shape}")
+        return embedding
+
+    def embed_texts(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        При заданном max_batch_tokens тексты пакуются по бюджету токенов
+        (TokenBudgetBatcher), и batch_size не используется.
+        """
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        if self.batcher is not None:
+            embeddings = self.batcher.embed(texts, self._embed_encoded, self.embedding_dim)
+        else:
+            parts = [self._embed_encoded(self._encode(batch)) for batch in batched(texts, batch_size)]
+            embeddings = np.vstack(parts).astype(np.float32, copy=False)
+        logger.debug(f"Embedded {len(texts)} texts (batch_size={batch_size}) → matrix shape {embeddings.shape}")
+        return embeddings
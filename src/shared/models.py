@@ -1,22 +1,46 @@
-from sqlalchemy import Column, Integer, Text
-from pgvector.sqlalchemy import Vector
+from sqlalchemy import Column, Integer, String, Text
+from pgvector.sqlalchemy import Vector, HALFVEC
 from .types import UTF8JSON
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
-def create_embedding_model(dim: int, table_name: str = "embedding_chapter"):
+VECTOR_TYPES = {
+    "vector": Vector,
+    "halfvec": HALFVEC,
+}
+
+
+def vector_type_for_dtype(dtype: str) -> str:
+    """Тип колонки pgvector для dtype эмбеддингов: float16 хранится в halfvec."""
+    return "halfvec" if dtype == "float16" else "vector"
+
+
+def create_embedding_model(
+    dim: int,
+    table_name: str = "embedding_chapter",
+    vector_type: str = "vector",
+    chunk_id_column: bool = False,
+):
     """
     Динамически создаёт ORM-модель с нужной размерностью эмбеддинга.
+    vector_type: "vector" (float32) или "halfvec" (float16, вдвое меньше места).
+    chunk_id_column: уникальная колонка chunk_id — ключ конфликта для идемпотентной загрузки.
     """
+    if vector_type not in VECTOR_TYPES:
+        raise ValueError(f"Unsupported vector_type '{vector_type}', expected one of {list(VECTOR_TYPES)}")
+    column_type = VECTOR_TYPES[vector_type]
+
     class EmbeddingChapter(Base):
         __tablename__ = table_name
         __table_args__ = {'schema': 'public'}
 
         id = Column(Integer, primary_key=True, autoincrement=True)
         chunk_text = Column(Text, nullable=False)
-        embedding = Column(Vector(dim), nullable=False)
+        embedding = Column(column_type(dim), nullable=False)
         metadata_ = Column("metadata", UTF8JSON, nullable=False)
+        if chunk_id_column:
+            chunk_id = Column(String(36), unique=True, nullable=False)
 
         def __repr__(self):
             return f"<EmbeddingChapter(table={table_name}, dim={dim})>"
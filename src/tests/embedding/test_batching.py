@@ -0,0 +1,46 @@
+import pytest
+
+from shared.embedding.batching import plan_token_batches
+
+
+def test_every_index_planned_once():
+    lengths = [5, 120, 7, 64, 3, 512, 9]
+    batches = plan_token_batches(lengths, max_batch_tokens=256)
+
+    planned = sorted(i for batch in batches for i in batch)
+    assert planned == list(range(len(lengths)))
+
+
+def test_batch_cost_within_budget():
+    lengths = [10, 12, 11, 200, 9, 180, 8, 13]
+    budget = 400
+    batches = plan_token_batches(lengths, max_batch_tokens=budget)
+
+    for batch in batches:
+        cost = len(batch) * max(lengths[i] for i in batch)
+        assert cost <= budget
+
+
+def test_long_input_gets_own_batch():
+    lengths = [512, 4, 4, 4]
+    batches = plan_token_batches(lengths, max_batch_tokens=100)
+
+    assert batches[0] == [0]
+    assert sorted(batches[1]) == [1, 2, 3]
+
+
+def test_similar_lengths_grouped_together():
+    lengths = [500, 5, 480, 6]
+    batches = plan_token_batches(lengths, max_batch_tokens=1000)
+
+    assert [sorted(b) for b in batches] == [[0, 2], [1, 3]]
+
+
+def test_max_batch_size_caps_rows():
+    batches = plan_token_batches([1] * 10, max_batch_tokens=1000, max_batch_size=4)
+    assert [len(b) for b in batches] == [4, 4, 2]
+
+
+def test_invalid_budget():
+    with pytest.raises(ValueError):
+        plan_token_batches([1, 2], max_batch_tokens=0)
@@ -2,7 +2,7 @@ import torch
 import numpy as np
 import pytest
 
-from etl.core.embedding.bert import BERTEmbedder
+from shared.embedding.bert import BERTEmbedder
 from shared.utils import cosine_similarity
 
 
@@ -60,3 +60,22 @@ def test_similarity_of_texts(bert_embedder_norm):
         f"Схожие тексты должны иметь большую близость ({sim_close:.3f}) "
         f"чем несхожие ({sim_far:.3f})"
     )
+
+
+def test_batch_embedding_matches_single(bert_embedder_norm: BERTEmbedder):
+    texts = [
+        "Short text.",
+        "A noticeably longer text that forces padding for the other rows in the batch.",
+        "Medium length text here.",
+    ]
+
+    batch = bert_embedder_norm.embed_texts(texts, batch_size=2)
+
+    assert batch.shape == (3, 768)
+    assert batch.dtype == np.float32
+    for text, row in zip(texts, batch):
+        np.testing.assert_allclose(row, bert_embedder_norm.embed_text(text), atol=1e-5)
+
+
+def test_batch_embedding_empty(bert_embedder_norm: BERTEmbedder):
+    assert bert_embedder_norm.embed_texts([]).shape == (0, 768)
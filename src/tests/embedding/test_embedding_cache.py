@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from shared.embedding.base import BaseEmbedding
+from shared.embedding.cache import CachedEmbedding
+
+
+class CountingEmbedding(BaseEmbedding):
+    model_name = "counting-model"
+    normalize = True
+    max_length = 16
+
+    def __init__(self):
+        self.calls = 0
+        self.embedded = 0
+
+    def embed_text(self, text):
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts, batch_size=32):
+        self.calls += 1
+        self.embedded += len(texts)
+        return np.array([[len(t), t.count("a"), 1.0] for t in texts], dtype=np.float32).reshape(-1, 3)
+
+
+@pytest.fixture
+def inner():
+    return CountingEmbedding()
+
+
+def test_second_run_served_from_cache(tmp_path, inner):
+    cache = CachedEmbedding(inner, cache_path=str(tmp_path / "cache.sqlite"))
+    texts = ["alpha", "beta", "gamma"]
+
+    first = cache.embed_texts(texts)
+    second = cache.embed_texts(texts)
+
+    np.testing.assert_array_equal(first, second)
+    assert inner.embedded == 3
+    assert cache.hits == 3
+    assert cache.misses == 3
+
+
+def test_cache_persists_between_instances(tmp_path, inner):
+    path = str(tmp_path / "cache.sqlite")
+    cache = CachedEmbedding(inner, cache_path=path)
+    cache.embed_texts(["alpha", "beta"])
+    cache.close()
+
+    reopened = CachedEmbedding(inner, cache_path=path)
+    reopened.embed_texts(["beta", "delta"])
+
+    assert inner.embedded == 3
+    assert reopened.hits == 1
+    assert reopened.misses == 1
+
+
+def test_duplicates_in_one_call_embedded_once(tmp_path, inner):
+    cache = CachedEmbedding(inner, cache_path=str(tmp_path / "cache.sqlite"))
+    result = cache.embed_texts(["same", "same", "other"])
+
+    assert inner.embedded == 2
+    assert result.shape == (3, 3)
+    np.testing.assert_array_equal(result[0], result[1])
+
+
+def test_model_key_isolates_models(tmp_path, inner):
+    path = str(tmp_path / "cache.sqlite")
+    CachedEmbedding(inner, cache_path=path).embed_texts(["alpha"])
+    CachedEmbedding(inner, cache_path=path, model_name="other-model").embed_texts(["alpha"])
+
+    assert inner.embedded == 2
+
+
+def test_quantized_model_misses_fp32_entries(tmp_path, inner):
+    path = str(tmp_path / "cache.sqlite")
+    CachedEmbedding(inner, cache_path=path).embed_texts(["alpha"])
+
+    quantized = CountingEmbedding()
+    quantized.quantize = True
+    cache = CachedEmbedding(quantized, cache_path=path)
+    cache.embed_texts(["alpha"])
+
+    assert quantized.embedded == 1
+    assert cache.hits == 0
+
+
+def test_lru_eviction(tmp_path, inner):
+    cache = CachedEmbedding(inner, cache_path=str(tmp_path / "cache.sqlite"), max_entries=2)
+    cache.embed_texts(["a"])
+    cache.embed_texts(["b"])
+    cache.embed_texts(["a"])  # "a" становится самым свежим
+    cache.embed_texts(["c"])  # вытесняет "b"
+
+    assert cache.stats["size"] == 2
+    inner.embedded = 0
+    cache.embed_texts(["a", "c"])
+    assert inner.embedded == 0
+    cache.embed_texts(["b"])
+    assert inner.embedded == 1
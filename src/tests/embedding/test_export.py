@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from transformers import BertConfig, BertModel, BertTokenizerFast
+
+from shared.embedding.bert import BERTEmbedder
+from shared.embedding.export import CompiledEncoder, export_embedder
+from shared.embedding.sentence_transformer import SentenceTransformerEmbedding
+
+VOCAB = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "the", "cat", "sat", "on", "mat", "a", "dog", "."]
+TEXTS = ["the cat sat on the mat .", "a dog", "the dog sat on a cat on the mat on the mat ."]
+
+
+@pytest.fixture(scope="module")
+def tiny_model_dir(tmp_path_factory):
+    """Крошечная BERT-модель со случайными весами, чтобы не скачивать модели из хаба."""
+    path = tmp_path_factory.mktemp("tiny-bert")
+    vocab_file = path / "vocab.txt"
+    vocab_file.write_text("\n".join(VOCAB), encoding="utf-8")
+    BertTokenizerFast(vocab_file=str(vocab_file)).save_pretrained(str(path))
+    config = BertConfig(
+        vocab_size=len(VOCAB),
+        hidden_size=16,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=32,
+        max_position_embeddings=64,
+    )
+    BertModel(config).save_pretrained(str(path))
+    return str(path)
+
+
+@pytest.mark.parametrize("embedder_cls", [BERTEmbedder, SentenceTransformerEmbedding])
+def test_compiled_model_matches_eager(tmp_path, tiny_model_dir, embedder_cls):
+    eager = embedder_cls(model_name=tiny_model_dir)
+    artifact = export_embedder(eager, str(tmp_path / "encoder.pt2"))
+
+    compiled = embedder_cls(model_name=tiny_model_dir, compiled_model_path=str(artifact))
+
+    assert isinstance(compiled.model, CompiledEncoder)
+    assert compiled.embedding_dim == eager.embedding_dim == 16
+    np.testing.assert_allclose(compiled.embed_texts(TEXTS), eager.embed_texts(TEXTS), atol=1e-5)
+    np.testing.assert_allclose(compiled.embed_text("a cat"), eager.embed_text("a cat"), atol=1e-5)
+
+
+def test_missing_artifact_falls_back_to_eager(tmp_path, tiny_model_dir):
+    embedder = BERTEmbedder(model_name=tiny_model_dir, compiled_model_path=str(tmp_path / "missing.pt2"))
+    assert not isinstance(embedder.model, CompiledEncoder)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from shared.embedding.base import BaseEmbedding
+from shared.embedding.postprocess import PostprocessedEmbedding
+from shared.models import create_embedding_model, vector_type_for_dtype
+
+
+class FixedEmbedding(BaseEmbedding):
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.closed = False
+
+    @property
+    def embedding_dim(self):
+        return self.dim
+
+    def embed_text(self, text):
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts, batch_size=32):
+        rng = np.random.default_rng(len(texts))
+        vectors = rng.normal(size=(len(texts), self.dim)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def close(self):
+        self.closed = True
+
+
+def test_truncation_renormalizes():
+    embedder = PostprocessedEmbedding(FixedEmbedding(8), truncate_dim=4)
+    full = FixedEmbedding(8).embed_texts(["a", "b", "c"])
+    vectors = embedder.embed_texts(["a", "b", "c"])
+
+    assert embedder.embedding_dim == 4
+    assert vectors.shape == (3, 4)
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-6)
+    # Направление усечённого вектора совпадает с префиксом полного
+    prefix = full[:, :4] / np.linalg.norm(full[:, :4], axis=1, keepdims=True)
+    np.testing.assert_allclose(vectors, prefix, rtol=1e-6)
+
+
+def test_float16_output():
+    embedder = PostprocessedEmbedding(FixedEmbedding(8), dtype="float16")
+    vectors = embedder.embed_texts(["a", "b"])
+
+    assert vectors.dtype == np.float16
+    assert embedder.embedding_dim == 8
+    assert embedder.embed_text("a").shape == (8,)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        PostprocessedEmbedding(FixedEmbedding(8), truncate_dim=16)
+    with pytest.raises(ValueError):
+        PostprocessedEmbedding(FixedEmbedding(8), dtype="int8")
+
+
+def test_close_propagates():
+    inner = FixedEmbedding(8)
+    PostprocessedEmbedding(inner, truncate_dim=4).close()
+    assert inner.closed
+
+
+def test_halfvec_column_for_float16():
+    assert vector_type_for_dtype("float16") == "halfvec"
+    assert vector_type_for_dtype("float32") == "vector"
+
+    model = create_embedding_model(dim=4, table_name="test_halfvec_chunks", vector_type="halfvec")
+    assert type(model.__table__.c.embedding.type).__name__ == "HALFVEC"
+    with pytest.raises(ValueError):
+        create_embedding_model(dim=4, table_name="test_bad_chunks", vector_type="bit")
@@ -0,0 +1,54 @@
+import os
+import numpy as np
+import pytest
+
+from shared.embedding.base import BaseEmbedding
+from shared.embedding.process_pool import ProcessPoolEmbedding
+
+
+class PidEmbedding(BaseEmbedding):
+    """Детерминированный эмбеддер: длина текста, номер текста и pid воркера."""
+
+    def __init__(self, scale: float = 1.0):
+        self.scale = scale
+
+    @staticmethod
+    def _number(text):
+        tail = text.split()[-1]
+        return float(tail) if tail.isdigit() else -1.0
+
+    def embed_text(self, text):
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts, batch_size=32):
+        return np.array(
+            [[len(t) * self.scale, self._number(t), os.getpid()] for t in texts],
+            dtype=np.float32,
+        )
+
+
+@pytest.fixture(scope="module")
+def pool():
+    embedder = ProcessPoolEmbedding(PidEmbedding, {"scale": 2.0}, num_workers=2, chunk_size=10)
+    yield embedder
+    embedder.close()
+
+
+def test_results_keep_input_order(pool: ProcessPoolEmbedding):
+    texts = [f"text {i}" for i in range(55)]
+    result = pool.embed_texts(texts)
+
+    assert result.shape == (55, 3)
+    assert result.dtype == np.float32
+    np.testing.assert_array_equal(result[:, 1], np.arange(55, dtype=np.float32))
+    np.testing.assert_array_equal(result[:, 0], [len(t) * 2.0 for t in texts])
+
+
+def test_embedding_runs_in_worker_processes(pool: ProcessPoolEmbedding):
+    result = pool.embed_texts([f"text {i}" for i in range(40)])
+    assert os.getpid() not in set(result[:, 2].astype(int))
+
+
+def test_single_and_empty(pool: ProcessPoolEmbedding):
+    assert pool.embed_text("text 7")[1] == 7.0
+    assert pool.embed_texts([]).shape == (0, 3)
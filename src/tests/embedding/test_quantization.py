@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import torch
+
+from shared.embedding.quantization import cosine_agreement, quantize_dynamic_int8, quantize_embedder
+
+
+def test_identical_embeddings_agree():
+    emb = np.random.default_rng(0).normal(size=(5, 16)).astype(np.float32)
+    report = cosine_agreement(emb, emb * 3.0)
+
+    assert report["samples"] == 5
+    assert report["mean_cosine"] == pytest.approx(1.0, abs=1e-6)
+    assert report["min_cosine"] == pytest.approx(1.0, abs=1e-6)
+
+
+def test_opposite_embeddings_disagree():
+    emb = np.eye(3, dtype=np.float32)
+    report = cosine_agreement(emb, -emb)
+    assert report["mean_cosine"] == pytest.approx(-1.0, abs=1e-6)
+
+
+def test_linear_layers_quantized():
+    model = torch.nn.Sequential(torch.nn.Linear(8, 8), torch.nn.ReLU(), torch.nn.Linear(8, 4))
+    quantized = quantize_dynamic_int8(model)
+
+    assert type(quantized[0]) is not torch.nn.Linear
+    assert quantized(torch.randn(2, 8)).shape == (2, 4)
+
+
+def test_quantization_rejects_gpu_device():
+    class GpuEmbedder:
+        device = "cuda"
+
+    with pytest.raises(ValueError):
+        quantize_embedder(GpuEmbedder())
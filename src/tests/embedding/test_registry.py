@@ -0,0 +1,53 @@
+import pytest
+
+from shared.embedding.base import BaseEmbedding
+from shared.embedding import registry
+
+
+class DummyEmbedding(BaseEmbedding):
+    instances = 0
+
+    def __init__(self, model_name: str = "", device: str = "cpu", **options):
+        DummyEmbedding.instances += 1
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def dummy_provider(monkeypatch):
+    monkeypatch.setitem(registry.PROVIDERS, "dummy", DummyEmbedding)
+    DummyEmbedding.instances = 0
+    registry.clear_registry()
+    yield
+    registry.clear_registry()
+
+
+def test_same_key_returns_same_instance():
+    first = registry.get_embedder("dummy", "model-a", device="cpu", max_batch_tokens=512)
+    second = registry.get_embedder("dummy", "model-a", device="cpu", max_batch_tokens=512)
+
+    assert first is second
+    assert DummyEmbedding.instances == 1
+
+
+def test_different_options_create_new_instance():
+    first = registry.get_embedder("dummy", "model-a", device="cpu")
+    second = registry.get_embedder("dummy", "model-a", device="cpu", max_batch_tokens=512)
+    third = registry.get_embedder("dummy", "model-b", device="cpu")
+
+    assert len({id(first), id(second), id(third)}) == 3
+
+
+def test_release_closes_and_forgets():
+    first = registry.get_embedder("dummy", "model-a")
+    registry.release_embedder(first)
+
+    assert first.closed
+    assert registry.get_embedder("dummy", "model-a") is not first
+
+
+def test_unknown_provider():
+    with pytest.raises(NotImplementedError):
+        registry.get_embedder("unknown", "model-a")
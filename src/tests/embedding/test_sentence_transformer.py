@@ -2,7 +2,7 @@ import pytest
 import torch
 import numpy as np
 
-from etl.core.embedding.sentence_transformer import SentenceTransformerEmbedding
+from shared.embedding.sentence_transformer import SentenceTransformerEmbedding
 
 MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
 DEVICE = 'mps' if torch.backends.mps.is_available() else (
@@ -28,3 +28,14 @@ def test_similarity_embeddings(embedder: SentenceTransformerEmbedding):
     emb2 = embedder.embed_text(text)
 
     np.testing.assert_allclose(emb1, emb2, rtol=1e-5)
+
+
+def test_batch_embedding_matches_single(embedder: SentenceTransformerEmbedding):
+    texts = ["Короткий текст", "Гораздо более длинный текст, который заставит остальные строки батча дополняться паддингом"]
+
+    batch = embedder.embed_texts(texts, batch_size=2)
+
+    assert batch.ndim == 2 and batch.shape[0] == len(texts)
+    assert batch.dtype == np.float32
+    for text, row in zip(texts, batch):
+        np.testing.assert_allclose(row, embedder.embed_text(text), atol=1e-5)
@@ -0,0 +1,12 @@
+import os
+
+# etl.config при импорте создаёт settings = ETLSettings(): без обязательных переменных
+# окружения сбор тестов, импортирующих раннеры и фабрики, падает с ValidationError
+for name, value in {
+    "DB_URL": "sqlite://",
+    "EXTRACT_TABLE_NAME": "docs",
+    "LOAD_TABLE_NAME": "chunks",
+    "SOURCE_ID": "doc_id",
+    "BATCH_SIZE": "100",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,134 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from etl.core.etl.chunk_batch import ChunkBatch
+from etl.core.etl.loaders.faiss_loader import FAISSLoader
+from etl.core.metadata.metadata_builder import MetadataBuilder
+from search.backend.faiss_backend import FAISSBackend
+
+DIM = 4
+
+
+def make_rows(texts, source_id="doc_1"):
+    builder = MetadataBuilder(chunk_id_mode="deterministic", model_name="test-model")
+    metas = builder.build_for_row({}, n_chunks=len(texts), source_id=source_id, chunk_texts=texts)
+    rng = np.random.default_rng(0)
+    return [
+        {"chunk_text": text, "embedding": rng.normal(size=DIM).astype(np.float32), "metadata_": meta}
+        for text, meta in zip(texts, metas)
+    ]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "index.faiss"), str(tmp_path / "meta.jsonl")
+
+
+def make_loader(paths, **kwargs):
+    index_path, metadata_path = paths
+    return FAISSLoader(index_path=index_path, metadata_path=metadata_path, embedding_dim=DIM, **kwargs)
+
+
+def test_rerun_with_chunk_ids_is_idempotent(paths):
+    rows = make_rows(["alpha", "beta", "gamma"])
+    make_loader(paths, use_chunk_ids=True).load(rows)
+
+    loader = make_loader(paths, use_chunk_ids=True)
+    loader.load(rows + make_rows(["alpha", "beta", "gamma", "delta"])[3:])
+
+    assert loader._index.ntotal == 4
+    assert len(loader._metadata_list) == 4
+
+
+def test_duplicates_within_batch_skipped(paths):
+    rows = make_rows(["alpha", "beta"])
+    loader = make_loader(paths, use_chunk_ids=True)
+    loader.load(rows + rows)
+
+    assert loader._index.ntotal == 2
+
+
+def test_backend_maps_ids_to_metadata(paths):
+    rows = make_rows(["alpha", "beta", "gamma"])
+    make_loader(paths, use_chunk_ids=True).load(rows)
+
+    backend = FAISSBackend(*paths)
+    results = asyncio.run(backend.search(rows[1]["embedding"].tolist(), top_k=1, min_similarity=0.0))
+
+    assert results[0]["chunk_text"] == "beta"
+    assert results[0]["metadata"]["chunk_id"] == rows[1]["metadata_"]["chunk_id"]
+
+
+def test_loads_chunk_batch_like_rows(paths, tmp_path):
+    rows = make_rows(["alpha", "beta", "gamma"])
+    make_loader(paths, use_chunk_ids=True).load(rows)
+    batch_paths = str(tmp_path / "batch.faiss"), str(tmp_path / "batch.jsonl")
+    make_loader(batch_paths, use_chunk_ids=True).load(ChunkBatch.from_rows(rows))
+
+    with open(paths[1]) as expected, open(batch_paths[1]) as actual:
+        assert actual.read() == expected.read()
+    backend = FAISSBackend(*batch_paths)
+    results = asyncio.run(backend.search(rows[2]["embedding"].tolist(), top_k=1, min_similarity=0.0))
+    assert results[0]["chunk_text"] == "gamma"
+
+
+def test_chunk_batch_skips_known_ids(paths):
+    batch = ChunkBatch.from_rows(make_rows(["alpha", "beta", "gamma"]))
+    loader = make_loader(paths, use_chunk_ids=True)
+    loader.load(batch[:2])
+    loader.load(batch)
+
+    assert loader._index.ntotal == 3
+    assert [m["chunk_text"] for m in loader._metadata_list] == ["alpha", "beta", "gamma"]
+
+
+def test_chunk_batch_rows_share_embedding_matrix():
+    batch = ChunkBatch.from_rows(make_rows(["alpha", "beta"]))
+    rows = batch.rows()
+
+    assert np.shares_memory(rows[1]["embedding"], batch.embeddings)
+    assert len(ChunkBatch.concat([batch, batch[1:]])) == 3
+    with pytest.raises(ValueError):
+        ChunkBatch(["a"], np.zeros((2, DIM), dtype=np.float32), [{}])
+
+
+def test_chunk_ids_require_id_mapped_index(paths):
+    make_loader(paths).load(make_rows(["alpha"]))
+    with pytest.raises(ValueError):
+        make_loader(paths, use_chunk_ids=True)
+
+
+@pytest.mark.parametrize("use_chunk_ids", [False, True])
+def test_delete_sources_removes_vectors_and_metadata(paths, use_chunk_ids):
+    loader = make_loader(paths, use_chunk_ids=use_chunk_ids)
+    kept = make_rows(["alpha", "beta"], source_id="doc_1") + make_rows(["delta"], source_id="doc_3")
+    loader.load(kept[:2] + make_rows(["gamma", "omega"], source_id="doc_2") + kept[2:])
+
+    assert loader.delete_sources(["doc_2"]) == 2
+
+    reloaded = make_loader(paths, use_chunk_ids=use_chunk_ids)
+    assert reloaded._index.ntotal == 3
+    assert [m["chunk_text"] for m in reloaded._metadata_list] == ["alpha", "beta", "delta"]
+    backend = FAISSBackend(*paths)
+    results = asyncio.run(backend.search(kept[1]["embedding"].tolist(), top_k=1, min_similarity=0.0))
+    assert results[0]["chunk_text"] == "beta"
+
+
+@pytest.mark.parametrize("use_chunk_ids", [False, True])
+def test_merge_from_shard_index(paths, tmp_path, use_chunk_ids):
+    shard = make_loader((str(tmp_path / "s.faiss"), str(tmp_path / "s.jsonl")), use_chunk_ids=use_chunk_ids)
+    rows = make_rows(["alpha", "beta", "gamma"])
+    shard.load(rows)
+    target = make_loader(paths, use_chunk_ids=use_chunk_ids)
+
+    assert target.merge_from(shard._index, shard._metadata_list) == 3
+    if use_chunk_ids:
+        # Повторное слияние после сбоя не дублирует чанки
+        assert target.merge_from(shard._index, shard._metadata_list) == 0
+
+    backend = FAISSBackend(*paths)
+    results = asyncio.run(backend.search(rows[2]["embedding"].tolist(), top_k=1, min_similarity=0.0))
+    assert results[0]["chunk_text"] == "gamma"
+    assert make_loader(paths, use_chunk_ids=use_chunk_ids)._index.ntotal == 3
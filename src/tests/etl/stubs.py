@@ -0,0 +1,51 @@
+import threading
+import time
+
+
+class PassThroughTransformer:
+    """
+    Трансформер без модели: по чанку на строку, chunk_text — текст строки (upper=True — в верхнем регистре),
+    source_id — ключ строки, если передан source_id_column. fail_on — ключ первой строки батча, на котором падает.
+    """
+
+    def __init__(self, upper=False, delay=0.0, fail_on=None):
+        self.upper = upper
+        self.delay = delay
+        self.fail_on = fail_on
+
+    def transform(self, batch_rows, text_column="", source_id_column=None):
+        time.sleep(self.delay)
+        if self.fail_on is not None and batch_rows[0][source_id_column or "id"] == self.fail_on:
+            raise RuntimeError("embedding failed")
+        chunks = []
+        for row in batch_rows:
+            chunk = {"chunk_text": row[text_column].upper() if self.upper else row[text_column]}
+            if source_id_column:
+                chunk["source_id"] = str(row[source_id_column])
+            chunks.append(chunk)
+        yield chunks
+
+
+class RecordingLoader:
+    """
+    Загрузчик, запоминающий поле field загруженных чанков, удалённые source_id и потоки загрузки.
+    fail_after — падает, когда загружено столько чанков (0 — на первой загрузке).
+    """
+
+    def __init__(self, field="chunk_text", delay=0.0, fail_after=None):
+        self.field = field
+        self.delay = delay
+        self.fail_after = fail_after
+        self.loaded = []
+        self.deleted = []
+        self.threads = set()
+
+    def load(self, data):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        if self.fail_after is not None and len(self.loaded) >= self.fail_after:
+            raise RuntimeError("load failed")
+        self.loaded.extend(item[self.field] for item in data)
+
+    def delete_sources(self, source_ids):
+        self.deleted.extend(source_ids)
@@ -0,0 +1,243 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from etl.core.async_vector_db import AsyncVectorDB
+from etl.core.checkpoint import FileCheckpointStore
+from etl.core.etl.transformers.transformer import Transformer
+from etl.core.splitters.sentence_splitter import SentenceSplitter
+from shared.embedding.base import BaseEmbedding
+
+
+class FakeSession:
+    def __init__(self, connector):
+        self.connector = connector
+        self.committed = False
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        self.connector.closed += 1
+
+
+class FakeConnector:
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+
+    async def connect(self):
+        self.opened += 1
+        return FakeSession(self)
+
+
+class FakeExtractor:
+    def __init__(self, n_batches):
+        self.connector = FakeConnector()
+        self.n_batches = n_batches
+        self.produced = 0
+        self.closed = False
+
+    async def extract_batches(self, table_name, batch_size=100, columns=None):
+        try:
+            for i in range(self.n_batches):
+                await asyncio.sleep(0)
+                self.produced += 1
+                yield [{"id": i, "text": f"row {i}"}]
+        finally:
+            self.closed = True
+
+
+class FakeTransformer:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+
+    async def atransform_stream(self, batch_rows, text_column="", source_id_column=None):
+        await asyncio.sleep(0.01)
+        if batch_rows[0]["id"] == self.fail_on:
+            raise RuntimeError("embedding failed")
+        yield [{"chunk_text": row[text_column].upper()} for row in batch_rows]
+
+
+class FakeORMLoader:
+    orm_class = object
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.loaded = []
+
+    async def load(self, session, data):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            self.loaded.extend(item["chunk_text"] for item in data)
+        finally:
+            self.active -= 1
+
+
+def test_concurrent_loads_each_with_own_session():
+    extractor, loader = FakeExtractor(8), FakeORMLoader()
+    vdb = AsyncVectorDB(extractor, FakeTransformer(), loader, load_concurrency=3, queue_depth=2)
+
+    asyncio.run(vdb.async_transform_table("t", "text"))
+
+    assert sorted(loader.loaded) == sorted(f"ROW {i}" for i in range(8))
+    assert 1 < loader.max_active <= 3
+    assert extractor.connector.opened == extractor.connector.closed == 8
+    assert vdb.last_run_stats["load"].items == 8
+    assert vdb.last_run_stats["load"].max_queue_depth <= 2
+
+
+def test_transform_error_cancels_pipeline():
+    extractor, loader = FakeExtractor(50), FakeORMLoader(delay=0)
+    vdb = AsyncVectorDB(extractor, FakeTransformer(fail_on=3), loader, load_concurrency=2, queue_depth=2)
+
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        asyncio.run(vdb.async_transform_table("t", "text"))
+    # Извлечение не убегает вперёд дальше глубины очереди
+    assert extractor.produced <= 3 + 2 + 2
+    assert extractor.closed
+
+
+def test_sync_loader_runs_in_thread_without_concurrency():
+    class SyncLoader:
+        def __init__(self):
+            self.loaded = []
+
+        def load(self, data):
+            self.loaded.extend(item["chunk_text"] for item in data)
+
+    loader = SyncLoader()
+    vdb = AsyncVectorDB(FakeExtractor(4), FakeTransformer(), loader, load_concurrency=4)
+    asyncio.run(vdb.async_transform_table("t", "text"))
+
+    assert vdb.load_concurrency == 1
+    assert loader.loaded == [f"ROW {i}" for i in range(4)]
+
+
+class KeysetExtractor(FakeExtractor):
+    async def extract_batches(self, table_name, batch_size=100, columns=None, key_column=None, after_key=None):
+        for i in range((after_key or -1) + 1, self.n_batches):
+            await asyncio.sleep(0)
+            yield [{"id": i, "text": f"row {i}"}]
+
+
+class FailingORMLoader(FakeORMLoader):
+    async def load(self, session, data):
+        if data[0]["chunk_text"] == "ROW 5":
+            raise RuntimeError("connection lost")
+        # Более ранние батчи загружаются дольше — завершения идут не по порядку
+        await asyncio.sleep(0.02 * (8 - len(self.loaded)))
+        self.loaded.extend(item["chunk_text"] for item in data)
+
+
+def test_checkpoint_resumes_after_contiguous_loaded_batches(tmp_path):
+    store = FileCheckpointStore(str(tmp_path / "checkpoints.json"))
+
+    def run(loader):
+        vdb = AsyncVectorDB(KeysetExtractor(8), FakeTransformer(), loader, load_concurrency=3,
+                            checkpoint_store=store, job_id="rows")
+        asyncio.run(vdb.async_transform_table("t", "text", source_id_column="id"))
+
+    crashed = FailingORMLoader()
+    with pytest.raises(RuntimeError):
+        run(crashed)
+    last_key = store.load("rows").last_key
+    assert last_key < 5
+    # Все батчи до чекпоинта действительно загружены
+    assert {f"ROW {i}" for i in range(last_key + 1)} <= set(crashed.loaded)
+
+    resumed = FakeORMLoader(delay=0)
+    run(resumed)
+    assert sorted(resumed.loaded) == sorted(f"ROW {i}" for i in range(last_key + 1, 8))
+    assert store.load("rows") is None
+
+
+class FailingEmbedding(BaseEmbedding):
+    def embed_text(self, text):
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts, batch_size=32):
+        if "row 3" in texts:
+            raise RuntimeError("embedding failed")
+        return np.ones((len(texts), 2), dtype=np.float32)
+
+
+def test_failed_embedding_aborts_run_before_checkpoint(tmp_path):
+    store = FileCheckpointStore(str(tmp_path / "checkpoints.json"))
+    transformer = Transformer(embedding=FailingEmbedding(), splitter=SentenceSplitter())
+    loader = FakeORMLoader(delay=0)
+    vdb = AsyncVectorDB(KeysetExtractor(6), transformer, loader, checkpoint_store=store, job_id="rows")
+
+    try:
+        with pytest.raises(RuntimeError, match="embedding failed"):
+            asyncio.run(vdb.async_transform_table("t", "text", source_id_column="id"))
+    finally:
+        transformer.close()
+
+    # Упавший батч не считается загруженным — продолжение начнётся с него
+    checkpoint = store.load("rows")
+    assert checkpoint is None or checkpoint.last_key < 3
+
+
+class FilteredExtractor(KeysetExtractor):
+    async def extract_batches(self, table_name, batch_size=100, columns=None, key_column=None, after_key=None,
+                              row_filter=None):
+        self.row_filter = row_filter
+        async for batch in super().extract_batches(table_name, batch_size, columns, key_column, after_key):
+            yield batch
+
+
+class RecordingIncremental:
+    def __init__(self):
+        self.loaded_keys = []
+        self.finished = False
+
+    def row_filter(self):
+        return "changed-only"
+
+    def extract_columns(self, columns):
+        return columns
+
+    def source_ids(self, rows):
+        return [str(row["id"]) for row in rows]
+
+    def batch_loaded(self, rows):
+        self.loaded_keys.extend(row["id"] for row in rows)
+
+    def finish(self):
+        self.finished = True
+
+
+class DeletingORMLoader(FakeORMLoader):
+    def __init__(self):
+        super().__init__(delay=0.01)
+        self.events = []
+
+    async def delete_sources(self, session, source_ids):
+        self.events.extend(("delete", source_id) for source_id in source_ids)
+
+    async def load(self, session, data):
+        await super().load(session, data)
+        self.events.extend(("load", item["chunk_text"]) for item in data)
+
+
+def test_incremental_deletes_old_chunks_before_load():
+    extractor, loader, incremental = FilteredExtractor(5), DeletingORMLoader(), RecordingIncremental()
+    vdb = AsyncVectorDB(extractor, FakeTransformer(), loader, load_concurrency=3, incremental=incremental)
+
+    asyncio.run(vdb.async_transform_table("t", "text", source_id_column="id"))
+
+    assert extractor.row_filter == "changed-only"
+    for i in range(5):
+        assert loader.events.index(("delete", str(i))) < loader.events.index(("load", f"ROW {i}"))
+    # Состояние обновляется по порядку батчей, даже если загрузки завершаются вразнобой
+    assert incremental.loaded_keys == list(range(5))
+    assert incremental.finished
@@ -0,0 +1,108 @@
+import datetime
+import decimal
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from etl.core.checkpoint import Checkpoint, CheckpointTracker, FileCheckpointStore, SQLCheckpointStore
+from etl.core.connector.sql_connector import SQLConnector
+from etl.core.etl.extractors.sql_extractor import SQLExtractor
+from etl.core.vector_db import VectorDB
+
+from .stubs import PassThroughTransformer, RecordingLoader
+
+
+@pytest.fixture(params=["file", "sql"])
+def store(request, tmp_path):
+    if request.param == "file":
+        return FileCheckpointStore(str(tmp_path / "checkpoints.json"))
+    return SQLCheckpointStore(create_engine(f"sqlite:///{tmp_path / 'target.db'}"))
+
+
+def test_store_roundtrip(store):
+    assert store.load("job") is None
+    store.save("job", Checkpoint(last_key=42, batches=3, rows=30))
+    store.save("other", Checkpoint(last_key="b-7"))
+    store.save("job", Checkpoint(last_key=50, batches=4, rows=38))
+
+    assert (store.load("job").last_key, store.load("job").rows) == (50, 38)
+    assert store.load("other").last_key == "b-7"
+    store.clear("job")
+    assert store.load("job") is None
+    assert store.load("other") is not None
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        uuid.UUID("5f0c6a4e-2b1d-4c4e-9a57-0d7b1c2e3f40"),
+        datetime.datetime(2024, 5, 17, 12, 30, tzinfo=datetime.timezone.utc),
+        datetime.date(2024, 5, 17),
+        decimal.Decimal("10.50"),
+    ],
+)
+def test_store_roundtrip_keeps_key_type(store, key):
+    store.save("job", Checkpoint(last_key=key, batches=1, rows=10))
+
+    assert store.load("job").last_key == key
+    assert type(store.load("job").last_key) is type(key)
+
+
+def test_file_store_leaves_no_temp_file(tmp_path):
+    store = FileCheckpointStore(str(tmp_path / "checkpoints.json"))
+    store.save("job", Checkpoint(last_key=1))
+
+    assert [p.name for p in tmp_path.iterdir()] == ["checkpoints.json"]
+
+
+def test_tracker_advances_over_contiguous_loaded_batches(tmp_path):
+    store = FileCheckpointStore(str(tmp_path / "checkpoints.json"))
+    tracker = CheckpointTracker(store, "job")
+    first, second = tracker.begin_batch(10, rows=10), tracker.begin_batch(20, rows=10)
+    for seq in (first, second):
+        tracker.add_part(seq)
+        tracker.add_part(seq)
+        tracker.seal(seq)
+
+    tracker.part_done(second)
+    tracker.part_done(second)
+    assert store.load("job") is None
+
+    tracker.part_done(first)
+    tracker.part_done(first)
+    assert (store.load("job").last_key, store.load("job").batches) == (20, 2)
+
+
+@pytest.fixture
+def source(tmp_path):
+    connector = SQLConnector(f"sqlite:///{tmp_path / 'source.db'}")
+    with connector.connect() as session:
+        session.execute(text("CREATE TABLE docs (doc_id INTEGER PRIMARY KEY, body TEXT)"))
+        # Порядок вставки не совпадает с порядком ключей
+        for doc_id in [5, 1, 9, 3, 7, 2, 8, 4, 6, 10]:
+            session.execute(text("INSERT INTO docs VALUES (:id, :body)"), {"id": doc_id, "body": f"doc {doc_id}"})
+        session.commit()
+    yield SQLExtractor(connector)
+    connector.close()
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_interrupted_run_resumes_after_last_loaded_batch(source, tmp_path, pipelined):
+    store = FileCheckpointStore(str(tmp_path / "checkpoints.json"))
+
+    def run(loader):
+        vdb = VectorDB(source, PassThroughTransformer(), loader, batch_size=3,
+                       pipelined=pipelined, checkpoint_store=store, job_id="docs")
+        vdb.transform_table("docs", "body", source_id_column="doc_id", columns=["body"])
+
+    crashed = RecordingLoader(fail_after=6)
+    with pytest.raises(RuntimeError):
+        run(crashed)
+    assert store.load("docs").last_key == 6
+
+    resumed = RecordingLoader()
+    run(resumed)
+    assert crashed.loaded + resumed.loaded == [f"doc {i}" for i in range(1, 11)]
+    # Успешный прогон сбрасывает чекпоинт
+    assert store.load("docs") is None
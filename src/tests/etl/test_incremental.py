@@ -0,0 +1,266 @@
+import asyncio
+import hashlib
+import sqlite3
+
+import numpy as np
+import pytest
+from sqlalchemy import Column, Integer, Text, event, select, text
+from sqlalchemy.orm import declarative_base
+
+from etl.core.async_vector_db import AsyncVectorDB
+from etl.core.connector.sql_connector import SQLConnector
+from etl.core.etl.extractors.sql_extractor import SQLExtractor
+from etl.core.etl.loaders.sql_loader import SQLLoader
+from etl.core.etl.transformers.transformer import Transformer
+from etl.core import incremental
+from etl.core.incremental import IncrementalState
+from etl.core.splitters.sentence_splitter import SentenceSplitter
+from etl.core.vector_db import VectorDB
+from shared.embedding.base import BaseEmbedding
+from shared.types import UTF8JSON
+
+from .stubs import PassThroughTransformer, RecordingLoader
+
+
+# Текстовый вид значений, как у самой БД (а не str() Python)
+_TEXT_FORM = sqlite3.connect(":memory:", check_same_thread=False)
+
+
+def _db_text(value):
+    return value if isinstance(value, str) else _TEXT_FORM.execute("SELECT CAST(? AS TEXT)", (value,)).fetchone()[0]
+
+
+def _register_pg_functions(dbapi_connection, _):
+    # md5/concat_ws как в PostgreSQL — в sqlite их нет
+    dbapi_connection.create_function("md5", 1, lambda value: hashlib.md5(value.encode("utf-8")).hexdigest())
+    dbapi_connection.create_function(
+        "concat_ws", -1, lambda sep, *values: sep.join(_db_text(v) for v in values if v is not None)
+    )
+
+
+@pytest.fixture
+def connector(tmp_path, monkeypatch):
+    connector = SQLConnector(f"sqlite:///{tmp_path / 'source.db'}")
+    event.listen(connector.engine, "connect", _register_pg_functions)
+    monkeypatch.setattr(incremental, "HASH_DIALECTS", ("postgresql", "sqlite"))
+    with connector.connect() as session:
+        session.execute(text("CREATE TABLE docs (doc_id INTEGER PRIMARY KEY, body TEXT, updated_at INTEGER)"))
+        for doc_id in range(1, 8):
+            session.execute(
+                text("INSERT INTO docs VALUES (:id, :body, 100)"), {"id": doc_id, "body": f"doc {doc_id}"}
+            )
+        session.commit()
+    return connector
+
+
+def _update(connector, doc_id, body, updated_at):
+    with connector.connect() as session:
+        session.execute(
+            text("UPDATE docs SET body = :body, updated_at = :ts WHERE doc_id = :id"),
+            {"id": doc_id, "body": body, "ts": updated_at},
+        )
+        session.commit()
+
+
+def _run(connector, mode, pipelined=False):
+    state = IncrementalState(
+        connector.engine,
+        job_id="job",
+        mode=mode,
+        key_column="doc_id",
+        updated_at_column="updated_at",
+        hash_columns=["body"],
+    )
+    loader = RecordingLoader(field="source_id")
+    vdb = VectorDB(
+        SQLExtractor(connector), PassThroughTransformer(), loader, batch_size=3,
+        pipelined=pipelined, incremental=state,
+    )
+    vdb.transform_table("docs", text_column="body", source_id_column="doc_id", columns=["doc_id", "body"])
+    return loader
+
+
+@pytest.mark.parametrize("mode", ["watermark", "hash"])
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_second_run_processes_only_changed_rows(connector, mode, pipelined):
+    first = _run(connector, mode, pipelined)
+    assert first.loaded == [str(i) for i in range(1, 8)]
+
+    assert _run(connector, mode, pipelined).loaded == []
+
+    _update(connector, 5, "doc 5 v2", 200)
+    _update(connector, 2, "doc 2 v2", 150)
+    changed = _run(connector, mode, pipelined)
+    assert changed.loaded == ["2", "5"]
+    assert changed.deleted == ["2", "5"]
+
+    assert _run(connector, mode, pipelined).loaded == []
+
+
+def test_hash_mode_rejects_dialect_without_md5(tmp_path):
+    engine = SQLConnector(f"sqlite:///{tmp_path / 'plain.db'}").engine
+
+    with pytest.raises(ValueError, match="supported only on postgresql"):
+        IncrementalState(engine, "job", "hash", "doc_id", hash_columns=["body"])
+
+
+def test_watermark_is_not_advanced_by_failed_run(connector):
+    _run(connector, "watermark")
+    _update(connector, 3, "doc 3 v2", 300)
+
+    state = IncrementalState(connector.engine, "job", "watermark", "doc_id", updated_at_column="updated_at")
+    vdb = VectorDB(SQLExtractor(connector), PassThroughTransformer(), RecordingLoader(fail_after=0), incremental=state)
+    with pytest.raises(RuntimeError):
+        vdb.transform_table("docs", text_column="body", source_id_column="doc_id")
+
+    assert _run(connector, "watermark").loaded == ["3"]
+
+
+ChunkBase = declarative_base()
+
+
+class Chunk(ChunkBase):
+    __tablename__ = "chunks"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chunk_text = Column(Text, nullable=False)
+    metadata_ = Column("metadata", UTF8JSON, nullable=False)
+
+
+class MetadataTransformer:
+    def transform(self, batch_rows, text_column="", source_id_column=None):
+        yield [
+            {"chunk_text": row[text_column], "metadata_": {"source_id": str(row[source_id_column])}}
+            for row in batch_rows
+        ]
+
+
+@pytest.mark.parametrize("mode", ["watermark", "hash"])
+def test_changed_rows_replace_their_chunks_in_sql_table(connector, mode):
+    with connector.connect() as session:
+        session.execute(text("CREATE TABLE chunks (id INTEGER PRIMARY KEY, chunk_text TEXT, metadata TEXT)"))
+        session.commit()
+
+    def run():
+        state = IncrementalState(
+            connector.engine, "job", mode, "doc_id", updated_at_column="updated_at", hash_columns=["body"]
+        )
+        loader = SQLLoader(connector, "chunks", orm_class=Chunk)
+        vdb = VectorDB(SQLExtractor(connector), MetadataTransformer(), loader, batch_size=3, incremental=state)
+        vdb.transform_table("docs", text_column="body", source_id_column="doc_id", columns=["doc_id", "body"])
+
+    run()
+    _update(connector, 2, "doc 2 v2", 150)
+    run()
+
+    with connector.connect() as session:
+        chunks = [row.chunk_text for row in session.query(Chunk)]
+    # Старый чанк изменённой строки удалён, а не продублирован
+    assert sorted(chunks) == sorted(["doc 1", "doc 2 v2", *(f"doc {i}" for i in range(3, 8))])
+
+
+def test_hash_mode_is_stable_for_non_text_columns(connector):
+    with connector.connect() as session:
+        session.execute(text("CREATE TABLE scores (doc_id INTEGER PRIMARY KEY, body TEXT, score REAL)"))
+        # Текстовый вид float в БД ('1.0e+20') отличается от str() в Python ('1e+20')
+        session.execute(text("INSERT INTO scores VALUES (1, 'doc 1', 1e20), (2, 'doc 2', NULL)"))
+        session.commit()
+
+    def run():
+        state = IncrementalState(connector.engine, "scores", "hash", "doc_id", hash_columns=["body", "score"])
+        loader = RecordingLoader(field="source_id")
+        VectorDB(SQLExtractor(connector), PassThroughTransformer(), loader, incremental=state).transform_table(
+            "scores", text_column="body", source_id_column="doc_id", columns=["doc_id", "body"]
+        )
+        return loader.loaded
+
+    assert run() == ["1", "2"]
+    assert run() == []
+
+
+class FakeSession:
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class AsyncSourceExtractor:
+    """Асинхронная обёртка над SQLExtractor (sqlite) с фейковыми сессиями для загрузчика."""
+
+    def __init__(self, connector):
+        self.sync = SQLExtractor(connector)
+        self.connector = self
+
+    async def connect(self):
+        return FakeSession()
+
+    async def extract_batches(self, table_name, **options):
+        for batch in self.sync.extract_batches(table_name, **options):
+            yield batch
+
+
+class AsyncRecordingLoader:
+    orm_class = object
+
+    async def load(self, session, data):
+        pass
+
+    async def delete_sources(self, session, source_ids):
+        pass
+
+
+class FailingEmbedding(BaseEmbedding):
+    def embed_text(self, text):
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts, batch_size=32):
+        if any("v2" in text for text in texts):
+            raise RuntimeError("embedding failed")
+        return np.ones((len(texts), 2), dtype=np.float32)
+
+
+def _saved_hashes(state):
+    table = state.hash_table
+    with state.engine.connect() as conn:
+        return dict(conn.execute(select(table.c.source_id, table.c.content_hash)).all())
+
+
+def _run_async(connector, mode):
+    state = IncrementalState(
+        connector.engine, "job", mode, "doc_id", updated_at_column="updated_at", hash_columns=["body"]
+    )
+    transformer = Transformer(embedding=FailingEmbedding(), splitter=SentenceSplitter())
+    vdb = AsyncVectorDB(
+        AsyncSourceExtractor(connector), transformer, AsyncRecordingLoader(), batch_size=3, incremental=state
+    )
+    try:
+        asyncio.run(vdb.async_transform_table("docs", "body", source_id_column="doc_id", columns=["doc_id", "body"]))
+    finally:
+        transformer.close()
+    return state
+
+
+@pytest.mark.parametrize("mode", ["watermark", "hash"])
+def test_async_failed_embedding_saves_no_incremental_state(connector, mode):
+    state = _run_async(connector, mode)
+    hashes_before = _saved_hashes(state) if mode == "hash" else None
+
+    _update(connector, 2, "doc 2 v2", 150)
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        _run_async(connector, mode)
+
+    state = IncrementalState(
+        connector.engine, "job", mode, "doc_id", updated_at_column="updated_at", hash_columns=["body"]
+    )
+    if mode == "hash":
+        assert _saved_hashes(state) == hashes_before
+    else:
+        assert state.watermark == 100
+    # Старые чанки строки уже удалены — она должна остаться изменённой для следующего прогона
+    batches = SQLExtractor(connector).extract_batches("docs", key_column="doc_id", row_filter=state.row_filter())
+    assert [row["doc_id"] for batch in batches for row in batch] == [2]
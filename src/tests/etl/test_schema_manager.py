@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text, create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from etl.schema.schema_manager import add_missing_chunk_id_columns
+
+
+def test_chunk_id_added_to_existing_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE chunks (id INTEGER PRIMARY KEY, chunk_text TEXT NOT NULL)"))
+        conn.execute(text("INSERT INTO chunks (chunk_text) VALUES ('old chunk')"))
+
+    metadata = MetaData()
+    Table(
+        "chunks",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("chunk_text", Text, nullable=False),
+        Column("chunk_id", String(36), unique=True, nullable=False),
+    )
+    for _ in range(2):
+        with engine.begin() as conn:
+            add_missing_chunk_id_columns(conn, metadata)
+
+    assert "chunk_id" in {column["name"] for column in inspect(engine).get_columns("chunks")}
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO chunks (chunk_text, chunk_id) VALUES ('new', 'c-1')"))
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO chunks (chunk_text, chunk_id) VALUES ('again', 'c-1')"))
@@ -0,0 +1,115 @@
+import asyncio
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+from etl.config import ETLSettings
+from etl.core.connector.sql_connector import SQLConnector
+from etl.core.etl.chunk_batch import ChunkBatch
+from etl.core.etl.extractors.sql_extractor import SQLExtractor
+from etl.core.etl.loaders.faiss_loader import FAISSLoader
+from etl.core.runner.sharded_runner import ShardEvent, ShardedETLRunner, shard_settings
+from etl.core.vector_db import VectorDB
+
+from .stubs import PassThroughTransformer, RecordingLoader
+
+KEYS = [3, 7, 8, 12, 15, 21, 22, 30, 31, 33, 40, 41, 47, 50, 52, 60, 61, 65, 70, 77, 81, 90, 99]
+DIM = 4
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'source.db'}"
+    connector = SQLConnector(url)
+    with connector.connect() as session:
+        session.execute(text("CREATE TABLE docs (doc_id INTEGER PRIMARY KEY, body TEXT)"))
+        for key in reversed(KEYS):
+            session.execute(text("INSERT INTO docs VALUES (:id, :body)"), {"id": key, "body": f"doc {key}"})
+        session.commit()
+    connector.close()
+    return url
+
+
+def test_key_ranges_cover_table_disjointly(db_url):
+    extractor = SQLExtractor(SQLConnector(db_url))
+    boundaries = extractor.key_boundaries("docs", "doc_id", 4)
+    edges = [None, *boundaries, None]
+
+    shards = []
+    for after_key, until_key in zip(edges, edges[1:]):
+        loader = RecordingLoader(field="source_id")
+        VectorDB(extractor, PassThroughTransformer(), loader, batch_size=2).transform_table(
+            "docs", text_column="body", source_id_column="doc_id", after_key=after_key, until_key=until_key
+        )
+        shards.append(loader.loaded)
+
+    assert len(shards) == 4
+    assert sorted(int(key) for shard in shards for key in shard) == KEYS
+    assert max(map(len, shards)) - min(map(len, shards)) <= 1
+
+
+def test_small_table_yields_fewer_shards(db_url):
+    extractor = SQLExtractor(SQLConnector(db_url))
+
+    assert len(extractor.key_boundaries("docs", "doc_id", 50)) == len(KEYS) - 1
+    with extractor.connector.connect() as session:
+        session.execute(text("DELETE FROM docs"))
+        session.commit()
+    assert extractor.key_boundaries("docs", "doc_id", 4) == []
+
+
+def fake_shard(settings, shard, table_job_id, restart, events, schema_lock):
+    """Шард без модели: пишет по вектору на ключ своего диапазона в шардовый FAISS-индекс."""
+    if shard.index == 1 and not Path(f"{settings.checkpoint_path}.healthy").exists():
+        events.put(ShardEvent(shard.index, "failed", error="RuntimeError: connection lost"))
+        raise SystemExit(1)
+    keys = [
+        key for key in KEYS
+        if (shard.after_key is None or key > shard.after_key) and (shard.until_key is None or key <= shard.until_key)
+    ]
+    own = shard_settings(settings, shard)
+    loader = FAISSLoader(own.faiss_index_path, own.faiss_metadata_path, embedding_dim=DIM)
+    embeddings = np.stack([np.eye(DIM, dtype=np.float32)[key % DIM] for key in keys])
+    loader.load(ChunkBatch([f"doc {key}" for key in keys], embeddings, [{"source_id": str(key)} for key in keys]))
+    events.put(ShardEvent(shard.index, "progress", batches=1, rows=len(keys)))
+    events.put(ShardEvent(shard.index, "done"))
+
+
+class FakeShardedRunner(ShardedETLRunner):
+    worker_target = staticmethod(fake_shard)
+
+
+def test_failed_shard_is_rerun_and_faiss_shards_merged(db_url, tmp_path):
+    settings = ETLSettings(
+        db_url=db_url,
+        extract_table_name="docs",
+        load_table_name="chunks",
+        source_id="doc_id",
+        batch_size=10,
+        embedding_columns=["body"],
+        shard_count=3,
+        checkpoint_store="file",
+        checkpoint_path=str(tmp_path / "checkpoints.json"),
+        faiss_index_path=str(tmp_path / "index.faiss"),
+        faiss_metadata_path=str(tmp_path / "meta.jsonl"),
+    )
+
+    failing = FakeShardedRunner(settings)
+    with pytest.raises(RuntimeError, match="1 of 3 shards failed"):
+        asyncio.run(failing.run())
+    assert sorted(failing.done) == [0, 2]
+    assert not (tmp_path / "index.faiss").exists()
+
+    Path(f"{settings.checkpoint_path}.healthy").touch()
+    resumed = FakeShardedRunner(settings)
+    asyncio.run(resumed.run())
+
+    # Повторно запускается только упавший шард
+    assert set(resumed.progress) == {1}
+    merged = FAISSLoader(settings.faiss_index_path, settings.faiss_metadata_path, embedding_dim=DIM)
+    assert merged._index.ntotal == len(KEYS)
+    assert [meta["metadata"]["source_id"] for meta in merged._metadata_list] == [str(key) for key in KEYS]
+    assert not list(tmp_path.glob("*.shard*"))
+    assert resumed.store.load(resumed.job_id) is None
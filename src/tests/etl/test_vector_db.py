@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from etl.core.vector_db import VectorDB
+
+from .stubs import PassThroughTransformer, RecordingLoader
+
+
+class ListExtractor:
+    def __init__(self, batches, delay=0.0):
+        self.batches = batches
+        self.delay = delay
+        self.closed = False
+
+    def extract_batches(self, table_name, batch_size=100, columns=None):
+        try:
+            for batch in self.batches:
+                time.sleep(self.delay)
+                yield batch
+        finally:
+            self.closed = True
+
+
+BATCHES = [[{"id": i, "text": f"row {i}"}] for i in range(6)]
+
+
+def make_vdb(extractor, transformer, loader, pipelined):
+    return VectorDB(extractor, transformer, loader, batch_size=1, pipelined=pipelined, queue_depth=2)
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_modes_load_same_data_in_order(pipelined):
+    loader = RecordingLoader()
+    make_vdb(ListExtractor(BATCHES), PassThroughTransformer(upper=True), loader, pipelined).transform_table("t", "text")
+
+    assert loader.loaded == [f"ROW {i}" for i in range(6)]
+
+
+class SignallingTransformer(PassThroughTransformer):
+    def __init__(self):
+        super().__init__(upper=True)
+        self.second_batch_started = threading.Event()
+
+    def transform(self, batch_rows, text_column="", source_id_column=None):
+        if batch_rows[0]["id"] == 1:
+            self.second_batch_started.set()
+        yield from super().transform(batch_rows, text_column, source_id_column)
+
+
+class WaitingLoader(RecordingLoader):
+    """Первая загрузка ждёт, пока трансформер возьмётся за следующий батч: так видно перекрытие стадий."""
+
+    def __init__(self, transformer):
+        super().__init__()
+        self.transformer = transformer
+        self.overlapped = None
+
+    def load(self, data):
+        if self.overlapped is None:
+            self.overlapped = self.transformer.second_batch_started.wait(timeout=5)
+        super().load(data)
+
+
+def test_pipelined_overlaps_stages_and_reports_stats():
+    transformer = SignallingTransformer()
+    loader = WaitingLoader(transformer)
+    vdb = make_vdb(ListExtractor(BATCHES), transformer, loader, pipelined=True)
+
+    vdb.transform_table("t", "text")
+
+    # Батч 1 трансформируется, пока батч 0 ещё загружается
+    assert loader.overlapped
+    assert loader.threads == {"etl-load"}
+    assert {name: stage.items for name, stage in vdb.last_run_stats.items()} == {
+        "extract": 6, "transform": 6, "load": 6,
+    }
+    assert vdb.last_run_stats["load"].busy_seconds > 0
+
+
+def test_pipelined_transform_error_stops_extraction():
+    extractor = ListExtractor(BATCHES)
+    loader = RecordingLoader()
+    vdb = make_vdb(extractor, PassThroughTransformer(upper=True, fail_on=2), loader, pipelined=True)
+
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        vdb.transform_table("t", "text")
+    assert extractor.closed
+    # Уже трансформированные батчи могут не успеть загрузиться до остановки — гарантирован только префикс
+    assert loader.loaded == ["ROW 0", "ROW 1"][:len(loader.loaded)]
+
+
+def test_pipelined_load_error_propagates():
+    vdb = make_vdb(
+        ListExtractor(BATCHES), PassThroughTransformer(upper=True), RecordingLoader(fail_after=0), pipelined=True
+    )
+
+    with pytest.raises(RuntimeError, match="load failed"):
+        vdb.transform_table("t", "text")
+    assert not any(t.name.startswith("etl-") for t in threading.enumerate())
@@ -0,0 +1,48 @@
+import pytest
+
+from etl.core.etl.transformers.near_dedup import NearDuplicateFilter
+
+ORIGINAL = (
+    "Все счастливые семьи похожи друг на друга, каждая несчастливая семья "
+    "несчастлива по-своему. Всё смешалось в доме Облонских."
+)
+REVISION = (
+    "Все счастливые семьи похожи друг на друга, каждая несчастливая семья "
+    "несчастлива по-своему. Всё смешалось в доме Облонских!"
+)
+OTHER = "Вектора хранятся в FAISS-индексе, метаданные — в отдельном jsonl-файле рядом с ним."
+
+
+def test_revision_matches_canonical():
+    near_dup = NearDuplicateFilter(threshold=0.8)
+    entry, duplicate = near_dup.find_or_add(ORIGINAL, {"source_id": "1", "chunk_index": 0})
+    assert not duplicate
+
+    match, duplicate = near_dup.find_or_add(REVISION, {"source_id": "2", "chunk_index": 0})
+    assert duplicate
+    assert match.canonical == {"source_id": "1", "chunk_index": 0}
+    assert near_dup.duplicates == 1
+
+
+def test_different_text_is_not_duplicate():
+    near_dup = NearDuplicateFilter(threshold=0.8)
+    near_dup.find_or_add(ORIGINAL, {"source_id": "1", "chunk_index": 0})
+    _, duplicate = near_dup.find_or_add(OTHER, {"source_id": "2", "chunk_index": 0})
+
+    assert not duplicate
+
+
+def test_evicted_entries_no_longer_match():
+    near_dup = NearDuplicateFilter(threshold=0.8, max_entries=1)
+    near_dup.find_or_add(ORIGINAL, {"source_id": "1", "chunk_index": 0})
+    near_dup.find_or_add(OTHER, {"source_id": "2", "chunk_index": 0})
+    _, duplicate = near_dup.find_or_add(REVISION, {"source_id": "3", "chunk_index": 0})
+
+    assert not duplicate
+    indexed = {entry_id for band in near_dup._buckets for bucket in band.values() for entry_id in bucket}
+    assert indexed == set(near_dup._entries)
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        NearDuplicateFilter(num_perm=100, bands=32)
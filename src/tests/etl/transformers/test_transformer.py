@@ -0,0 +1,277 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from etl.core.etl.transformers.near_dedup import NearDuplicateFilter
+from etl.core.etl.transformers.transformer import Transformer
+from etl.core.splitters.semantic_chunker import SemanticChunker
+from etl.core.splitters.sentence_splitter import SentenceSplitter
+from shared.embedding.base import BaseEmbedding
+
+
+TOPICS = {
+    "кот": [1.0, 0.0, 0.0],
+    "кошка": [0.8, 0.6, 0.0],
+    "рынок": [0.0, 0.0, 1.0],
+}
+
+
+class TopicEmbedding(BaseEmbedding):
+    """Эмбеддинг по первому найденному слову темы; запоминает, какие тексты прошли через модель."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_text(self, text):
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts, batch_size=32):
+        self.embedded.extend(texts)
+        vectors = []
+        for text in texts:
+            words = text.lower().replace(".", "").split()
+            topic = next(word for word in words if word in TOPICS)
+            vectors.append(TOPICS[topic])
+        return np.array(vectors, dtype=np.float32)
+
+
+ROWS = [
+    {"id": 1, "text": "Кот спит. Кошка ест. Рынок упал."},
+    {"id": 2, "text": "Рынок вырос."},
+]
+
+
+def make_transformer(mode):
+    embedder = TopicEmbedding()
+    splitter = SemanticChunker(embedder=embedder, sentence_splitter=SentenceSplitter(), threshold=0.4)
+    return embedder, Transformer(embedding=embedder, splitter=splitter, chunk_embedding_mode=mode)
+
+
+def run(transformer):
+    return [r for batch in transformer.transform(ROWS, text_column="text", source_id_column="id") for r in batch]
+
+
+def test_embed_mode_embeds_every_chunk():
+    embedder, transformer = make_transformer("embed")
+    results = run(transformer)
+
+    assert [r["chunk_text"] for r in results] == ["Кот спит. Кошка ест.", "Рынок упал.", "Рынок вырос."]
+    # 3 предложения для разбиения + 3 чанка
+    assert len(embedder.embedded) == 6
+    assert transformer.reused_embeddings == 0
+
+
+def test_reuse_mode_skips_single_sentence_chunks():
+    embedder, transformer = make_transformer("reuse")
+    results = run(transformer)
+
+    assert embedder.embedded[3:] == ["Кот спит. Кошка ест.", "Рынок вырос."]
+    assert transformer.reused_embeddings == 1
+    np.testing.assert_array_equal(results[1]["embedding"], TOPICS["рынок"])
+
+
+def test_pool_mode_pools_sentence_embeddings():
+    embedder, transformer = make_transformer("pool")
+    results = run(transformer)
+
+    assert embedder.embedded[3:] == ["Рынок вырос."]
+    assert transformer.reused_embeddings == 2
+    expected = np.mean([TOPICS["кот"], TOPICS["кошка"]], axis=0)
+    expected /= np.linalg.norm(expected)
+    np.testing.assert_allclose(results[0]["embedding"], expected, rtol=1e-6)
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        make_transformer("guess")
+
+
+def test_split_workers_match_inline_splitting():
+    rows = [{"id": i, "text": text} for i, text in enumerate([
+        "Кот спит. Кошка ест. Рынок упал.",
+        "",
+        "Рынок вырос. Кот спит.",
+        "Рынок вырос.",
+    ] * 5)]
+    embedder = TopicEmbedding()
+    splitter = SemanticChunker(embedder=embedder, sentence_splitter=SentenceSplitter(), threshold=0.4)
+    inline = Transformer(embedding=embedder, splitter=splitter)
+    parallel = Transformer(embedding=embedder, splitter=splitter, split_workers=2)
+    try:
+        expected = [r for batch in inline.transform(rows, text_column="text", source_id_column="id") for r in batch]
+        results = [r for batch in parallel.transform(rows, text_column="text", source_id_column="id") for r in batch]
+    finally:
+        parallel.close()
+
+    assert [r["chunk_text"] for r in results] == [r["chunk_text"] for r in expected]
+    assert [r["metadata_"]["source_id"] for r in results] == [r["metadata_"]["source_id"] for r in expected]
+
+
+def test_chunks_of_different_rows_embedded_together():
+    rows = [{"id": i, "text": "Рынок вырос."} for i in range(5)]
+    embedder = TopicEmbedding()
+    splitter = SemanticChunker(embedder=embedder, sentence_splitter=SentenceSplitter())
+    calls = []
+    original = embedder.embed_texts
+
+    def counting_embed_texts(texts, batch_size=32):
+        calls.append(len(texts))
+        return original(texts, batch_size=batch_size)
+
+    embedder.embed_texts = counting_embed_texts
+    transformer = Transformer(embedding=embedder, splitter=splitter, chunk_batch_size=2)
+    sub_batches = list(transformer.transform(rows, text_column="text", source_id_column="id"))
+
+    assert [len(batch) for batch in sub_batches] == [2, 2, 1]
+    assert calls == [2, 2, 1]
+    sources = [r["metadata_"]["source_id"] for batch in sub_batches for r in batch]
+    assert sources == ["0", "1", "2", "3", "4"]
+
+
+def test_sub_batch_splits_row_metadata_consistently():
+    embedder, transformer = make_transformer("embed")
+    transformer.chunk_batch_size = 1
+    results = [r for batch in transformer.transform(ROWS, text_column="text", source_id_column="id") for r in batch]
+
+    assert [(r["metadata_"]["chunk_index"], r["metadata_"]["total_chunks"]) for r in results] == [(0, 2), (1, 2), (0, 1)]
+
+
+class SlowEmbedding(TopicEmbedding):
+    """Запоминает максимальное число одновременных вызовов embed_texts."""
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def embed_texts(self, texts, batch_size=32):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        try:
+            return super().embed_texts(texts, batch_size)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def test_atransform_stream_bounds_in_flight_tasks():
+    rows = [{"id": i, "text": "Рынок вырос."} for i in range(40)]
+    embedder = SlowEmbedding()
+    transformer = Transformer(
+        embedding=embedder,
+        splitter=SemanticChunker(embedder=embedder, sentence_splitter=SentenceSplitter()),
+        chunk_batch_size=2,
+        async_workers=8,
+        max_in_flight=3,
+    )
+
+    async def collect():
+        return [batch async for batch in transformer.atransform_stream(rows, "text", "id")]
+
+    try:
+        sub_batches = asyncio.run(collect())
+    finally:
+        transformer.close()
+
+    assert embedder.max_active <= 3
+    assert len(sub_batches) == 20
+    sources = sorted(int(r["metadata_"]["source_id"]) for batch in sub_batches for r in batch)
+    assert sources == list(range(40))
+
+
+class FailingEmbedding(TopicEmbedding):
+    def embed_texts(self, texts, batch_size=32):
+        if any("упал" in text for text in texts):
+            raise RuntimeError("CUDA out of memory")
+        return super().embed_texts(texts, batch_size)
+
+
+def test_atransform_stream_raises_on_failed_sub_batch():
+    rows = [{"id": i, "text": text} for i, text in enumerate(["Рынок вырос.", "Рынок упал.", "Кот спит."])]
+    transformer = Transformer(embedding=FailingEmbedding(), splitter=SentenceSplitter(), chunk_batch_size=1)
+
+    async def collect():
+        return [batch async for batch in transformer.atransform_stream(rows, "text", "id")]
+
+    try:
+        with pytest.raises(RuntimeError, match="out of memory"):
+            asyncio.run(collect())
+    finally:
+        transformer.close()
+
+
+def test_dedup_embeds_repeated_chunks_once():
+    rows = [{"id": i, "text": text} for i, text in enumerate(["Рынок вырос.", "Рынок  вырос. ", "Кот спит."] * 3)]
+    embedder = TopicEmbedding()
+    transformer = Transformer(
+        embedding=embedder,
+        splitter=SemanticChunker(embedder=TopicEmbedding(), sentence_splitter=SentenceSplitter()),
+        dedup_chunks=True,
+    )
+    batch = next(transformer.transform(rows, text_column="text", source_id_column="id"))
+
+    assert embedder.embedded == ["Рынок вырос.", "Кот спит."]
+    assert transformer.dedup_saved_passes == 7
+    assert len(batch) == 9
+    np.testing.assert_array_equal(batch.embeddings[4], TOPICS["рынок"])
+    np.testing.assert_array_equal(batch.embeddings[8], TOPICS["кот"])
+
+
+def test_dedup_cache_spans_batches():
+    embedder = TopicEmbedding()
+    transformer = Transformer(
+        embedding=embedder,
+        splitter=SemanticChunker(embedder=TopicEmbedding(), sentence_splitter=SentenceSplitter()),
+        dedup_chunks=True,
+        dedup_cache_size=1,
+    )
+    for text in ["Рынок вырос.", "Рынок вырос.", "Кот спит.", "Рынок вырос."]:
+        list(transformer.transform([{"id": 1, "text": text}], text_column="text"))
+
+    # Ёмкость кэша 1: "Рынок" вытеснен "Кот" и эмбеддится повторно
+    assert embedder.embedded == ["Рынок вырос.", "Кот спит.", "Рынок вырос."]
+    assert transformer.dedup_saved_passes == 1
+
+
+def make_near_dup_transformer(action):
+    embedder = TopicEmbedding()
+    transformer = Transformer(
+        embedding=embedder,
+        splitter=SemanticChunker(embedder=TopicEmbedding(), sentence_splitter=SentenceSplitter()),
+        near_dup_filter=NearDuplicateFilter(threshold=0.7, shingle_size=3),
+        near_dup_action=action,
+    )
+    return embedder, transformer
+
+
+NEAR_DUP_ROWS = [
+    {"id": 1, "text": "Рынок акций вырос на открытии торгов."},
+    {"id": 2, "text": "Кот спит."},
+    {"id": 3, "text": "Рынок акций вырос на открытии торгов!"},
+]
+
+
+def test_near_dup_skip_drops_duplicates_before_embedding():
+    embedder, transformer = make_near_dup_transformer("skip")
+    batch = next(transformer.transform(NEAR_DUP_ROWS, text_column="text", source_id_column="id"))
+
+    assert batch.texts == ["Рынок акций вырос на открытии торгов.", "Кот спит."]
+    assert embedder.embedded == batch.texts
+    assert transformer.near_duplicates == 1
+
+
+def test_near_dup_merge_reuses_canonical_vector():
+    embedder, transformer = make_near_dup_transformer("merge")
+    first = next(transformer.transform(NEAR_DUP_ROWS[:2], text_column="text", source_id_column="id"))
+    second = next(transformer.transform(NEAR_DUP_ROWS[2:], text_column="text", source_id_column="id"))
+
+    assert embedder.embedded == first.texts
+    assert second.metadata[0]["near_duplicate_of"] == {"source_id": "1", "chunk_index": 0}
+    np.testing.assert_array_equal(second.embeddings[0], first.embeddings[0])
+    assert "near_duplicate_of" not in first.metadata[0]
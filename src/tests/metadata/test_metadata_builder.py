@@ -123,4 +123,75 @@ def test_invalid_field_types():
             chunk_index="bad",  # строка вместо int
             total_chunks=3,
         )
-    assert "chunk_index" in str(exc_info3.value)
\ No newline at end of file
+    assert "chunk_index" in str(exc_info3.value)
+
+@pytest.mark.parametrize("strict", [False, True])
+def test_build_for_row_matches_build(strict):
+    builder = MetadataBuilder(field_mapping={"author": "creator"}, strict=strict)
+    row_data = {"author": "Гоголь", "title": "Мёртвые души"}
+
+    metas = builder.build_for_row(row_data, n_chunks=3, source_id="book_002")
+    expected = [builder.build(row_data, i, 3, "book_002") for i in range(3)]
+
+    def without_ids(items):
+        return [{k: v for k, v in m.items() if k != "chunk_id"} for m in items]
+
+    assert without_ids(metas) == without_ids(expected)
+    assert len({m["chunk_id"] for m in metas}) == 3
+    for m in metas:
+        UUID(m["chunk_id"])
+        MetadataModel(**m)
+
+
+def test_build_for_row_selected_indices():
+    builder = MetadataBuilder()
+    metas = builder.build_for_row({"title": "X"}, n_chunks=4, chunk_indices=[0, 2])
+
+    assert [m["chunk_index"] for m in metas] == [0, 2]
+    assert all(m["total_chunks"] == 4 for m in metas)
+
+
+def test_build_for_row_chunk_data_not_shared():
+    metas = MetadataBuilder().build_for_row({"title": "X"}, n_chunks=2)
+    metas[0]["data"]["title"] = "Y"
+    assert metas[1]["data"]["title"] == "X"
+
+
+@pytest.mark.parametrize("strict", [False, True])
+def test_build_for_row_validates_invariants(strict):
+    builder = MetadataBuilder(strict=strict)
+    with pytest.raises(ValueError):
+        builder.build_for_row({"title": "X"}, n_chunks=2, chunk_indices=[0, 2])
+    with pytest.raises(ValueError):
+        builder.build_for_row({"title": "X"}, n_chunks=0, chunk_indices=[0])
+
+
+def test_deterministic_chunk_ids_are_stable():
+    builder = MetadataBuilder(chunk_id_mode="deterministic", model_name="model-a")
+    first = builder.build_for_row({"title": "X"}, n_chunks=2, source_id="s1", chunk_texts=["a", "b"])
+    second = builder.build_for_row({"title": "Y"}, n_chunks=2, source_id="s1", chunk_texts=["a", "b"])
+
+    assert [m["chunk_id"] for m in first] == [m["chunk_id"] for m in second]
+    assert first[0]["chunk_id"] != first[1]["chunk_id"]
+    assert builder.build({"title": "X"}, 0, 2, "s1", chunk_text="a")["chunk_id"] == first[0]["chunk_id"]
+    UUID(first[0]["chunk_id"])
+
+
+@pytest.mark.parametrize("change", [
+    {"source_id": "s2"},
+    {"chunk_texts": ["a2"]},
+])
+def test_deterministic_chunk_id_depends_on_content(change):
+    builder = MetadataBuilder(chunk_id_mode="deterministic", model_name="model-a")
+    kwargs = {"row_data": {}, "n_chunks": 1, "source_id": "s1", "chunk_texts": ["a"]}
+    base = builder.build_for_row(**kwargs)[0]["chunk_id"]
+
+    assert builder.build_for_row(**{**kwargs, **change})[0]["chunk_id"] != base
+    other_model = MetadataBuilder(chunk_id_mode="deterministic", model_name="model-b")
+    assert other_model.build_for_row(**kwargs)[0]["chunk_id"] != base
+
+
+def test_deterministic_chunk_id_requires_text():
+    builder = MetadataBuilder(chunk_id_mode="deterministic")
+    with pytest.raises(ValueError):
+        builder.build_for_row({}, n_chunks=1)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from etl.core.splitters.semantic_chunker import SemanticChunker
+from etl.core.splitters.sentence_splitter import SentenceSplitter
+from shared.embedding.base import BaseEmbedding
+
+
+TOPICS = {
+    "кот": [1.0, 0.0, 0.0],
+    "рынок": [0.0, 1.0, 0.0],
+    "поезд": [0.0, 0.0, 1.0],
+}
+
+
+class TopicEmbedding(BaseEmbedding):
+    """Эмбеддинг по ключевому слову темы; считает вызовы embed_texts."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_text(self, text):
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts, batch_size=32):
+        self.calls += 1
+        vectors = []
+        for text in texts:
+            topic = next(word for word in TOPICS if word in text.lower())
+            vectors.append(TOPICS[topic])
+        return np.array(vectors, dtype=np.float32)
+
+
+@pytest.fixture
+def embedder():
+    return TopicEmbedding()
+
+
+@pytest.fixture
+def chunker(embedder):
+    return SemanticChunker(embedder=embedder, sentence_splitter=SentenceSplitter(), threshold=0.4)
+
+
+def test_splits_on_topic_change(chunker, embedder):
+    text = "Кот спит. Кот ест. Рынок упал. Рынок вырос. Поезд ушёл."
+    chunks = chunker.split(text)
+
+    assert chunks == ["Кот спит. Кот ест.", "Рынок упал. Рынок вырос.", "Поезд ушёл."]
+    assert embedder.calls == 1
+
+
+def test_split_many_uses_single_embedding_call(chunker, embedder):
+    texts = [
+        "Кот спит. Рынок упал.",
+        "",
+        "Поезд ушёл.",
+        "Рынок упал. Рынок вырос. Кот ест.",
+    ]
+    result = chunker.split_many(texts)
+
+    assert result == [
+        ["Кот спит.", "Рынок упал."],
+        [],
+        ["Поезд ушёл."],
+        ["Рынок упал. Рынок вырос.", "Кот ест."],
+    ]
+    assert embedder.calls == 1
+
+
+def test_min_chunk_size_merges_short_chunks(embedder):
+    chunker = SemanticChunker(
+        embedder=embedder, sentence_splitter=SentenceSplitter(), threshold=0.4, min_chunk_size=2
+    )
+    chunks = chunker.split("Кот спит. Кот ест. Рынок упал.")
+
+    assert chunks == ["Кот спит. Кот ест. Рынок упал."]
+
+
+def test_falls_back_to_sentences_on_embedding_error():
+    class FailingEmbedding(BaseEmbedding):
+        def embed_texts(self, texts, batch_size=32):
+            raise RuntimeError("model unavailable")
+
+    chunker = SemanticChunker(embedder=FailingEmbedding(), sentence_splitter=SentenceSplitter())
+
+    assert chunker.split_many(["Кот спит. Рынок упал."]) == [["Кот спит.", "Рынок упал."]]
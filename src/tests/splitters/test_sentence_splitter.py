@@ -34,4 +34,21 @@ def test_parentheses(splitter):
 def test_mixed_language(splitter):
     text = "This is English. А это русский."
     sentences = splitter.split(text)
-    assert sentences == ["This is English.", "А это русский."]
\ No newline at end of file
+    assert sentences == ["This is English.", "А это русский."]
+
+def test_spans_point_into_normalized_text(splitter):
+    text = "Первое  предложение.\nВторое на ул. Ленина!  Третье"
+    normalized, spans = splitter.split_spans(text)
+    assert normalized == "Первое предложение. Второе на ул. Ленина! Третье"
+    assert [normalized[start:end] for start, end in spans] == splitter.split(text)
+    assert spans == [(0, 19), (20, 41), (42, 48)]
+
+def test_long_abbreviation_run(splitter):
+    text = "см. " * 2000 + "Конец. Начало."
+    sentences = splitter.split(text)
+    assert len(sentences) == 2
+    assert sentences[0].endswith("см. Конец.")
+    assert sentences[1] == "Начало."
+
+def test_empty_text(splitter):
+    assert splitter.split("") == [""]
@@ -0,0 +1,48 @@
+import pytest
+from transformers import BertTokenizerFast
+
+from etl.core.splitters.token_chunker import TokenChunker
+
+VOCAB = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "the", "cat", "sat", "on", "mat", "a", "dog", "ran", "."]
+
+
+@pytest.fixture(scope="module")
+def tokenizer(tmp_path_factory):
+    vocab_file = tmp_path_factory.mktemp("vocab") / "vocab.txt"
+    vocab_file.write_text("\n".join(VOCAB), encoding="utf-8")
+    return BertTokenizerFast(vocab_file=str(vocab_file), model_max_length=16)
+
+
+def token_count(tokenizer, text):
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def test_packs_sentences_up_to_max_tokens(tokenizer):
+    chunker = TokenChunker(tokenizer, max_tokens=8)
+    # 4 токена на предложение → по два предложения в чанке
+    text = "the cat sat. a dog ran. the cat ran. a dog sat. the mat."
+    chunks = chunker.split(text)
+
+    assert chunks == ["the cat sat. a dog ran.", "the cat ran. a dog sat.", "the mat."]
+    assert all(token_count(tokenizer, chunk) <= 8 for chunk in chunks)
+
+
+def test_long_sentence_split_without_losing_text(tokenizer):
+    chunker = TokenChunker(tokenizer, max_tokens=4)
+    text = "the cat sat on the mat on a mat. a dog."
+    chunks = chunker.split(text)
+
+    assert chunks == ["the cat sat on", "the mat on a", "mat.", "a dog."]
+    assert " ".join(chunks) == text
+
+
+def test_default_max_tokens_reserves_special_tokens(tokenizer):
+    chunker = TokenChunker(tokenizer)
+    assert chunker.max_tokens == 16 - 2
+
+
+def test_split_many_keeps_document_order(tokenizer):
+    chunker = TokenChunker(tokenizer, max_tokens=8)
+    result = chunker.split_many(["a dog ran.", "", "the cat sat. the mat."])
+
+    assert result == [["a dog ran."], [], ["the cat sat. the mat."]]